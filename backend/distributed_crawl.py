@@ -0,0 +1,425 @@
+"""
+Multi-process crawling over a shared SQLite frontier.
+
+Worker processes lease URLs from one frontier file with a visibility
+timeout, so a URL held by a crashed worker returns to the queue on its
+own. Request slots per domain are reserved in the same file, so the
+crawl delay holds across all workers, and extracted recipes go to a
+shared sink table that a single indexer drains into Chroma (the Chroma
+client is not safe to share between processes).
+
+Throughput grows with the number of workers until every domain is
+fetched at its politeness limit. Workers on other hosts can join a crawl
+when the database sits on a filesystem with working POSIX locks (NFS
+often lacks them), since SQLite's WAL mode relies on them:
+
+    python -m backend.distributed_crawl SEED_URL --workers 8       # coordinator
+    python -m backend.distributed_crawl --worker --workers 4       # extra host
+"""
+import json
+import multiprocessing as mp
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .ingest_writer import BatchedChromaWriter
+from .recipe_log import RecipeLog
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / 'data' / 'crawl.db'
+LEASE_TIMEOUT = 120.0  # seconds before an unfinished URL is handed to another worker
+IDLE_POLL = 0.5        # seconds between polls when there is nothing to do
+
+
+class RecipeSink:
+    """
+    Shared table of extracted recipes waiting to be indexed, plus per-worker
+    crawl counters. Lives in the same SQLite file as the frontier.
+
+    Usage:
+        sink = RecipeSink("data/crawl.db")
+        sink.put(url, title, fingerprint, raw_recipe_data)   # workers
+        for row in sink.pending(after_id):                   # indexer
+            ...
+        sink.mark_indexed(urls)
+    """
+
+    def __init__(self, db_path: str = None) -> None:
+        """
+        Args:
+            db_path: SQLite file. Defaults to data/crawl.db
+        """
+        self.db_path = Path(db_path or DEFAULT_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS recipes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    fingerprint TEXT,
+                    data TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'queued'
+                        CHECK (state IN ('queued', 'indexed')),
+                    created_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_recipes_state ON recipes (state, id)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker TEXT PRIMARY KEY,
+                    pages INTEGER NOT NULL DEFAULT 0,
+                    recipes INTEGER NOT NULL DEFAULT 0,
+                    errors INTEGER NOT NULL DEFAULT 0,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+
+    def put(self, url: str, title: str, fingerprint: str, recipe_data: list) -> bool:
+        """Queue an extracted recipe. Returns False if the URL was already queued."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute('''
+                INSERT OR IGNORE INTO recipes (url, title, fingerprint, data, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (url, title, fingerprint, json.dumps(recipe_data, ensure_ascii=False),
+                  time.time()))
+            return cursor.rowcount > 0
+
+    def pending(self, after_id: int = 0, limit: int = 100) -> list[dict]:
+        """Queued recipes with an id above after_id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT id, url, title, fingerprint, data, created_at FROM recipes
+                WHERE state = 'queued' AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, limit)).fetchall()
+        return [{'id': row[0], 'url': row[1], 'title': row[2], 'fingerprint': row[3],
+                 'data': json.loads(row[4]), 'created_at': row[5]} for row in rows]
+
+    def mark_indexed(self, urls) -> None:
+        """Record recipes whose chunks are all written."""
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE recipes SET state = 'indexed' WHERE url = ?",
+                                   [(url,) for url in urls])
+
+    def record_page(self, worker: str, recipe: bool = False, error: bool = False) -> None:
+        """Count one fetch (successful unless error) for a worker."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT INTO workers (worker, pages, recipes, errors, started_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(worker) DO UPDATE SET
+                    pages = pages + excluded.pages,
+                    recipes = recipes + excluded.recipes,
+                    errors = errors + excluded.errors,
+                    updated_at = excluded.updated_at
+            ''', (worker, int(not error), int(recipe), int(error), now, now))
+
+    def pages(self) -> int:
+        """Pages fetched by all workers of the current crawl."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COALESCE(SUM(pages), 0) FROM workers').fetchone()[0]
+
+    def worker_stats(self) -> list[dict]:
+        """Counters of every worker, by worker name."""
+        fields = ('worker', 'pages', 'recipes', 'errors', 'started_at', 'updated_at')
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {", ".join(fields)} FROM workers ORDER BY worker').fetchall()
+        return [dict(zip(fields, row)) for row in rows]
+
+    def reset_stats(self) -> None:
+        """Start a new crawl budget (queued recipes are kept)."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM workers')
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def crawl_worker(db_path: str, max_pages: int, worker_id: str = None,
+                 lease_timeout: float = LEASE_TIMEOUT, delay: float = 0.8) -> None:
+    """
+    Crawl from the shared frontier until the crawl budget is spent or no
+    URLs are left. Runs in its own process; any number may run at once.
+
+    Args:
+        db_path: Shared SQLite file (frontier, domain slots and sink)
+        max_pages: Pages fetched by all workers together before they stop
+        worker_id: Name recorded with leases and counters
+        lease_timeout: Seconds before a leased URL is handed to another worker
+        delay: Minimum seconds between requests to one domain, across workers
+    """
+    from scraper.AllRecipesWebCrawler import AllRecipesCrawler, is_recipe_url
+    from scraper.WebScraper import WebScraper
+    from scraper.frontier import SQLiteFrontier
+    from scraper.politeness import SharedDomainThrottle
+    from scraper.seen_store import content_fingerprint
+    from scraper.utils import open_seen_store
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    crawler = AllRecipesCrawler(delay=delay, keep_text=False)
+    scraper = WebScraper()
+    # Other workers may hold leases, so in-flight URLs are left alone
+    frontier = SQLiteFrontier(db_path, requeue_on_open=False)
+    throttle = SharedDomainThrottle(db_path, delay=delay)
+    sink = RecipeSink(db_path)
+    seen = open_seen_store()
+
+    try:
+        while sink.pages() < max_pages:
+            url = frontier.lease(worker_id, timeout=lease_timeout)
+            if url is None:
+                # Links may still arrive from pages other workers are fetching
+                if not frontier.stats()['in_flight']:
+                    break
+                time.sleep(IDLE_POLL)
+                continue
+
+            keep_html = is_recipe_url(url)
+            result, retry = crawler.fetch_page(url, keep_html=keep_html, throttle=throttle)
+
+            if not result:
+                frontier.mark_failed(url, retry=retry, owner=worker_id)
+                sink.record_page(worker_id, error=True)
+                continue
+
+            frontier.add_many([(link, crawler.url_priority(link)) for link in result['links']
+                               if not (is_recipe_url(link) and link in seen)])
+
+            recipe = False
+            if keep_html and url not in seen and not seen.has_legacy_title(result['title']):
+                try:
+                    raw_recipe_data = scraper.extract_from_html(result.pop('html'))
+                    recipe = sink.put(url, result['title'],
+                                      content_fingerprint(raw_recipe_data), raw_recipe_data)
+                except Exception as e:
+                    print(f"[Error] {url}: {e}")
+            if not frontier.mark_done(url, owner=worker_id):
+                print(f"[Lease expired] {url} was handed to another worker")
+            sink.record_page(worker_id, recipe=recipe)
+    finally:
+        frontier.close()
+        throttle.close()
+        sink.close()
+        seen.close()
+
+
+def index_recipes(db_path: str = None, collection_name: str = "recipes",
+                  embedding_pool=None, until=None) -> int:
+    """
+    Drain the shared sink into Chroma.
+
+    Only one indexer should run per collection. Recipes enter the seen
+    store and are marked indexed once all of their chunks are written.
+    Recipes left queued by an interrupted run are logged again by the
+    next one (e.g. with --index-only); RecipeLog.iter_records(latest_only=True),
+    which offline_ingest.ingest_log() reads, keeps one record per URL.
+
+    Args:
+        db_path: Shared SQLite file. Defaults to data/crawl.db
+        collection_name: Chroma collection to upsert into
+        embedding_pool: Optional EmbeddingWorkerPool computing chunk embeddings
+        until: Optional callable; keep polling for new recipes until it
+            returns True (e.g. when all workers have exited)
+
+    Returns:
+        Number of recipes indexed
+    """
+    from scraper.RecipeTransformer import RecipeTransformer
+    from scraper.utils import open_seen_store
+    from .database import get_chromadb_client
+
+    sink = RecipeSink(db_path)
+    seen = open_seen_store()
+    collection = get_chromadb_client().get_or_create_collection(name=collection_name)
+    indexed = 0
+
+    def on_flush(tags):
+        nonlocal indexed
+        seen.add_many(tags)
+        sink.mark_indexed([url for url, _, _ in tags])
+        indexed += len(tags)
+
+    writer = BatchedChromaWriter(
+        collection,
+        embed=embedding_pool.embed_text if embedding_pool is not None else None,
+        on_flush=on_flush)
+    recipe_log = RecipeLog.from_env()
+
+    try:
+        last_id = 0
+        while True:
+            # Checked before reading, so recipes put by exiting workers are not missed
+            finished = until is None or until()
+            rows = sink.pending(after_id=last_id)
+            for row in rows:
+                last_id = row['id']
+                try:
+                    if recipe_log is not None:
+                        recipe_log.append(row['url'], row['data'], title=row['title'],
+                                          fetched_at=row['created_at'],
+                                          fingerprint=row['fingerprint'])
+                    chroma_data = RecipeTransformer(
+                        row['data'], source_url=row['url']).transform_for_chroma()
+                    writer.add_recipe(chroma_data,
+                                      tag=(row['url'], row['title'], row['fingerprint']))
+                except Exception as e:
+                    # Left queued, so the next run retries it
+                    print(f"⚠️  Skipping {row['url']}: {e}")
+            if not rows:
+                if finished:
+                    break
+                time.sleep(IDLE_POLL)
+
+        writer.close()
+    finally:
+        if recipe_log is not None:
+            recipe_log.close()
+    print(f"📦 Indexed {indexed} recipes ({writer.items} chunks in {writer.batches} batches)")
+    sink.close()
+    seen.close()
+    return indexed
+
+
+def run_distributed_crawl(seed_url, workers=4, max_pages=200, db_path=None,
+                          collection_name="recipes", embedding_pool=None,
+                          use_sitemaps=False, lease_timeout=LEASE_TIMEOUT, delay=0.8):
+    """
+    Crawl with several worker processes and index what they extract.
+
+    Seeds the shared frontier, starts the workers and indexes recipes
+    while they crawl. Workers started on other hosts with crawl_worker()
+    (or the --worker CLI flag) against the same file share the budget.
+
+    Args:
+        seed_url: Starting URL
+        workers: Local worker processes
+        max_pages: Crawl budget shared by all workers
+        db_path: Shared SQLite file. Defaults to data/crawl.db
+        collection_name: Chroma collection to upsert into
+        embedding_pool: Optional EmbeddingWorkerPool computing chunk embeddings
+        use_sitemaps: Also queue recipe URLs from the site's sitemaps
+        lease_timeout: Seconds before a leased URL is handed to another worker
+        delay: Minimum seconds between requests to one domain, across workers
+
+    Returns:
+        Per-worker counters (see RecipeSink.worker_stats)
+    """
+    from scraper.AllRecipesWebCrawler import AllRecipesCrawler, is_recipe_url
+    from scraper.frontier import SQLiteFrontier
+    from scraper.urls import canonicalize_url
+
+    db_path = str(db_path or DEFAULT_DB_PATH)
+
+    # Starting a crawl: leases left by a previous run are stale
+    frontier = SQLiteFrontier(db_path)
+    crawler = AllRecipesCrawler(delay=delay, keep_text=False)
+    seed_url = canonicalize_url(seed_url)
+    frontier.add(seed_url, crawler.url_priority(seed_url))
+    if use_sitemaps:
+        from scraper.utils import open_seen_store
+        seen = open_seen_store()
+        crawler.seed_from_sitemaps(seed_url, frontier, limit=max_pages, seen=seen)
+        seen.close()
+    frontier.close()
+
+    sink = RecipeSink(db_path)
+    sink.reset_stats()
+
+    ctx = mp.get_context("spawn")
+    host = socket.gethostname()
+    processes = [ctx.Process(target=crawl_worker, args=(db_path, max_pages),
+                             kwargs={"worker_id": f"{host}-{i}", "lease_timeout": lease_timeout,
+                                     "delay": delay},
+                             name=f"crawl-worker-{i}")
+                 for i in range(workers)]
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+    print(f"🕸️  Started {workers} crawl workers on {db_path}")
+
+    try:
+        index_recipes(db_path, collection_name, embedding_pool,
+                      until=lambda: not any(process.is_alive() for process in processes))
+    finally:
+        for process in processes:
+            process.join()
+
+    elapsed = time.monotonic() - start
+    stats = sink.worker_stats()
+    sink.close()
+    for worker in stats:
+        print(f"  {worker['worker']:<24} {worker['pages']:>6} pages "
+              f"{worker['recipes']:>5} recipes {worker['errors']:>4} errors")
+    pages = sum(worker['pages'] for worker in stats)
+    print(f"Total: {pages} pages in {elapsed:.1f}s ({pages / max(elapsed, 1e-9):.2f} pages/s)")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multi-process crawl over a shared frontier")
+    parser.add_argument("seed_url", nargs="?", help="Starting URL (coordinator only)")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Shared SQLite file")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes on this host")
+    parser.add_argument("--max-pages", type=int, default=200, help="Crawl budget for all workers")
+    parser.add_argument("--delay", type=float, default=0.8,
+                        help="Seconds between requests to one domain")
+    parser.add_argument("--collection", default="recipes", help="Chroma collection")
+    parser.add_argument("--sitemaps", action="store_true", help="Seed from the site's sitemaps")
+    parser.add_argument("--worker", action="store_true",
+                        help="Only run workers, joining a crawl started elsewhere")
+    parser.add_argument("--index-only", action="store_true",
+                        help="Only index recipes already in the sink")
+    parser.add_argument("--embed-workers", type=int, default=0,
+                        help="Embed chunks on an ImageBind worker pool of this many "
+                             "processes (for ImageBind collections)")
+
+    args = parser.parse_args()
+
+    embedding_pool = None
+    if args.embed_workers and not args.worker:
+        from .embedding_pool import EmbeddingWorkerPool
+        embedding_pool = EmbeddingWorkerPool(num_workers=args.embed_workers)
+
+    try:
+        if args.index_only:
+            index_recipes(args.db, args.collection, embedding_pool=embedding_pool)
+        elif args.worker:
+            ctx = mp.get_context("spawn")
+            processes = [ctx.Process(target=crawl_worker, args=(args.db, args.max_pages),
+                                     kwargs={"delay": args.delay})
+                         for _ in range(args.workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        elif args.seed_url:
+            run_distributed_crawl(args.seed_url, workers=args.workers, max_pages=args.max_pages,
+                                  db_path=args.db, collection_name=args.collection,
+                                  embedding_pool=embedding_pool, use_sitemaps=args.sitemaps,
+                                  delay=args.delay)
+        else:
+            parser.print_help()
+    finally:
+        if embedding_pool is not None:
+            embedding_pool.close()
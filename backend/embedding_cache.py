@@ -0,0 +1,247 @@
+"""
+Content-addressed on-disk cache for embedding vectors.
+
+Vectors live in a fixed-size memory-mapped float32 file and are located
+through a small SQLite hash index, so repeated queries, re-ingested chunks
+and migration reruns never pay for the same embedding twice.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "embedding_cache"
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+class EmbeddingCache:
+    """
+    Size-bounded embedding cache keyed by (model id, modality, content hash).
+
+    Layout on disk:
+        vectors.f32  - memory-mapped (max_entries x dim) float32 matrix
+        index.db     - SQLite table mapping content keys to matrix slots
+
+    When the cache is full, the least recently used entries give up their
+    slots to new vectors.
+
+    Usage:
+        cache = EmbeddingCache()
+        key = EmbeddingCache.make_key("imagebind_huge", "text", "pasta")
+        cache.put_many({key: vector})
+        cache.get_many([key])  # -> {key: vector}
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        dim: int = 1024,
+        max_entries: int = None
+    ) -> None:
+        """
+        Open (or create) an embedding cache.
+
+        Args:
+            cache_dir: Directory for cache files. Defaults to EMBEDDING_CACHE_DIR
+                or data/embedding_cache
+            dim: Embedding dimension
+            max_entries: Maximum number of cached vectors. Defaults to
+                EMBEDDING_CACHE_MAX_ENTRIES or 200,000
+        """
+        self.cache_dir = Path(
+            cache_dir or os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.max_entries = max_entries or int(
+            os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+        self.index_path = self.cache_dir / "index.db"
+        self.vectors_path = self.cache_dir / "vectors.f32"
+        self._lock = threading.Lock()
+
+        self._init_index()
+        self._vectors = self._open_vectors()
+
+    @staticmethod
+    def make_key(model_id: str, modality: str, content) -> str:
+        """
+        Build a cache key from the model, the modality and the raw content.
+
+        Args:
+            model_id: Identifier of the embedding model
+            modality: "text", "vision", "audio", ...
+            content: str or bytes that fully determine the embedding
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256()
+        digest.update(f"{model_id}\0{modality}\0".encode("utf-8"))
+        digest.update(content)
+        return digest.hexdigest()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for index connections."""
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_index(self):
+        """Create the index schema, resetting it if the layout changed."""
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_entries_last_used
+                ON entries (last_used)
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+
+            layout = f"{self.dim}x{self.max_entries}"
+            row = conn.execute(
+                "SELECT value FROM meta WHERE name = 'layout'").fetchone()
+            if row is None or row[0] != layout:
+                # Dimension or capacity changed: slots are no longer valid
+                conn.execute("DELETE FROM entries")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('layout', ?)",
+                    (layout,))
+                if self.vectors_path.exists():
+                    self.vectors_path.unlink()
+
+    def _open_vectors(self) -> np.memmap:
+        """Memory-map the vector matrix, allocating it on first use."""
+        shape = (self.max_entries, self.dim)
+        mode = "r+" if self.vectors_path.exists() else "w+"
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=shape)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            keys: Keys built with make_key()
+
+        Returns:
+            Dict mapping each cached key to its vector (misses are omitted)
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return {}
+
+        found = {}
+        with self._lock, self._get_connection() as conn:
+            # SQLite caps bound parameters, so look up in chunks
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, slot in rows:
+                    found[key] = self._vectors[slot].tolist()
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found])
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """
+        Store vectors, evicting least recently used entries when full.
+
+        Args:
+            items: Dict mapping keys to vectors
+        """
+        if not items:
+            return
+
+        with self._lock, self._get_connection() as conn:
+            # Serialize slot allocation across processes sharing the cache
+            conn.execute("BEGIN IMMEDIATE")
+            existing = {}
+            keys = list(items)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(conn.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall())
+
+            new_keys = [key for key in keys if key not in existing]
+            # Never try to keep more than the cache can hold
+            new_keys = new_keys[-self.max_entries:]
+
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            free = self.max_entries - count
+            slots = list(range(count, count + min(free, len(new_keys))))
+
+            evict_count = len(new_keys) - len(slots)
+            if evict_count > 0:
+                # Keys being rewritten are never victims; the rest of the
+                # batch gets only the slots left once they are kept
+                evict_count = min(evict_count, count - len(existing))
+                new_keys = new_keys[len(new_keys) - len(slots) - evict_count:]
+                victims = conn.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?",
+                    (evict_count + len(existing),)
+                ).fetchall()
+                victims = [(key, slot) for key, slot in victims
+                           if key not in existing][:evict_count]
+                conn.executemany(
+                    "DELETE FROM entries WHERE key = ?",
+                    [(key,) for key, _ in victims])
+                slots.extend(slot for _, slot in victims)
+
+            now = time.time()
+            for key, slot in zip(new_keys, slots):
+                self._vectors[slot] = np.asarray(items[key], dtype=np.float32)
+            for key, slot in existing.items():
+                self._vectors[slot] = np.asarray(items[key], dtype=np.float32)
+            self._vectors.flush()
+
+            conn.executemany(
+                "INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(new_keys, slots)])
+            # A rewritten entry is as recently used as a new one
+            conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(now, key) for key in existing])
+
+    def __len__(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self) -> None:
+        """Drop every cached vector."""
+        with self._lock, self._get_connection() as conn:
+            conn.execute("DELETE FROM entries")
@@ -0,0 +1,215 @@
+"""
+Multi-process worker pool for bulk embedding jobs (migration, ingestion).
+
+Each worker process loads its own ImageBind model and is pinned to a
+disjoint set of CPU cores, so re-embedding tens of thousands of chunks
+uses the whole machine instead of a single interpreter.
+"""
+import multiprocessing as mp
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from .embedding_cache import EmbeddingCache
+
+# Must match ImageBindEmbedder.model_id so the parent shares its cache keys
+MODEL_ID = "imagebind_huge"
+
+# Per-process embedder, created by _init_worker
+_worker_embedder = None
+
+
+def _available_cores() -> list[int]:
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_worker(device: str, threads: int, pin_threads: bool, worker_counter) -> None:
+    """Load the model in a worker process and pin its threads."""
+    global _worker_embedder
+
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+
+    # Thread pools must be sized before torch initializes them
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    # The parent process owns the embedding cache
+    os.environ["EMBEDDING_CACHE"] = "off"
+
+    if pin_threads and hasattr(os, "sched_setaffinity"):
+        cores = _available_cores()
+        start = (worker_index * threads) % len(cores)
+        worker_cores = [cores[(start + i) % len(cores)] for i in range(threads)]
+        os.sched_setaffinity(0, worker_cores)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    from .imagebind_embeddings import ImageBindEmbedder
+    # Workers live only as long as the job, so never unload between batches
+    _worker_embedder = ImageBindEmbedder(device=device, pinned=True)
+
+
+def _embed_text_in_worker(texts: list[str]) -> list[list[float]]:
+    """Embed a batch of texts with the worker's model."""
+    return _worker_embedder.embed_text(texts)
+
+
+class EmbeddingWorkerPool:
+    """
+    Process pool that embeds batches of documents in parallel.
+
+    Batches are sharded across workers and results are yielded in input
+    order. At most `max_pending` batches are in flight at any time, so the
+    input stream is only consumed as fast as the workers keep up.
+
+    Usage:
+        with EmbeddingWorkerPool(num_workers=4) as pool:
+            for vectors in pool.imap_text(batches):
+                collection.add(..., embeddings=vectors)
+    """
+
+    def __init__(
+        self,
+        num_workers: int = None,
+        threads_per_worker: int = None,
+        device: str = "cpu",
+        pin_threads: bool = True,
+        max_pending: int = None,
+        cache: EmbeddingCache = None
+    ) -> None:
+        """
+        Start the worker processes.
+
+        Args:
+            num_workers: Number of worker processes (default: one per 4 cores)
+            threads_per_worker: Torch threads per worker (default: cores / workers)
+            device: Device each worker loads the model on
+            pin_threads: Pin each worker to its own set of CPU cores
+            max_pending: Maximum batches in flight (default: 2 per worker)
+            cache: Embedding cache checked before dispatching work. Defaults to
+                the shared on-disk cache unless EMBEDDING_CACHE=off
+        """
+        core_count = len(_available_cores())
+        self.num_workers = num_workers or max(1, core_count // 4)
+        self.threads_per_worker = threads_per_worker or max(
+            1, core_count // self.num_workers)
+        self.max_pending = max_pending or 2 * self.num_workers
+
+        if cache is None and os.getenv("EMBEDDING_CACHE", "on").lower() != "off":
+            cache = EmbeddingCache(dim=1024)
+        self.cache = cache
+
+        # spawn: torch and forked model state do not mix
+        context = mp.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(device, self.threads_per_worker,
+                      pin_threads, context.Value("i", 0))
+        )
+        print(f"🧵 Started {self.num_workers} embedding workers "
+              f"({self.threads_per_worker} threads each)")
+
+    def _submit(self, texts: list[str]):
+        """Dispatch the cache misses of a batch to the pool."""
+        keys = None
+        hits = {}
+        misses = texts
+        if self.cache is not None:
+            keys = [EmbeddingCache.make_key(MODEL_ID, "text", text)
+                    for text in texts]
+            hits = self.cache.get_many(keys)
+            misses = list(dict.fromkeys(
+                text for text, key in zip(texts, keys) if key not in hits))
+
+        future = self._executor.submit(
+            _embed_text_in_worker, misses) if misses else None
+        return texts, keys, hits, misses, future
+
+    def _collect(self, pending) -> list[list[float]]:
+        """Wait for a batch and merge worker output with cache hits."""
+        texts, keys, hits, misses, future = pending
+        computed = future.result() if future is not None else []
+
+        if self.cache is None:
+            return computed
+
+        if computed:
+            new_vectors = {
+                EmbeddingCache.make_key(MODEL_ID, "text", text): vector
+                for text, vector in zip(misses, computed)
+            }
+            self.cache.put_many(new_vectors)
+            hits.update(new_vectors)
+        return [hits[key] for key in keys]
+
+    def imap_text(
+        self,
+        batches: Iterable[list[str]],
+        return_exceptions: bool = False
+    ) -> Iterator:
+        """
+        Embed a stream of text batches, yielding results in input order.
+
+        Args:
+            batches: Iterable of lists of texts
+            return_exceptions: Yield a failed batch's exception instead of raising
+
+        Yields:
+            List of embedding vectors for each input batch
+        """
+        pending = deque()
+        batches = iter(batches)
+
+        def fill():
+            while len(pending) < self.max_pending:
+                batch = next(batches, None)
+                if batch is None:
+                    return
+                pending.append(self._submit(list(batch)))
+
+        fill()
+        while pending:
+            head = pending.popleft()
+            try:
+                result = self._collect(head)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+            fill()
+            yield result
+
+    def embed_text(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """
+        Embed a list of texts across the pool.
+
+        Args:
+            texts: List of text strings
+            batch_size: Texts per worker task
+
+        Returns:
+            List of embedding vectors, in input order
+        """
+        batches = (texts[i:i + batch_size] for i in range(0, len(texts), batch_size))
+        vectors = []
+        for batch_vectors in self.imap_text(batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
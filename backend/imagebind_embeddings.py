@@ -5,47 +5,268 @@ Enables multimodal search (text, image, video) in the same vector space.
 from imagebind.models.imagebind_model import ModalityType
 from imagebind.models import imagebind_model
 from imagebind import data
+import gc
+import itertools
+import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 import torch
 import numpy as np
 
+from .embedding_cache import EmbeddingCache
+from .media_pipeline import MediaInput, MediaPreprocessor, media_fingerprint, read_media
+
 # Add ImageBind to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "ImageBind"))
 
+# Where imagebind_huge(pretrained=True) downloads its pickle checkpoint
+PICKLE_CHECKPOINT = Path(".checkpoints") / "imagebind_huge.pth"
+# Converted, memory-mappable state dict (see convert_checkpoint)
+MMAP_CHECKPOINT = Path(__file__).parent.parent / ".checkpoints" / "imagebind_huge.mmap.pt"
+
+
+def convert_checkpoint(src: str = None, dst: str = None) -> Path:
+    """
+    Convert the ImageBind checkpoint into a memory-mappable state dict.
+
+    The result is a plain tensor state dict in torch's zip format, which
+    torch.load(mmap=True) maps straight from the page cache instead of
+    unpickling into fresh memory. Run once per machine.
+
+    Args:
+        src: Original checkpoint (default: .checkpoints/imagebind_huge.pth)
+        dst: Output path (default: MMAP_CHECKPOINT or IMAGEBIND_WEIGHTS)
+
+    Returns:
+        Path of the converted checkpoint
+    """
+    src = Path(src or PICKLE_CHECKPOINT)
+    dst = Path(dst or os.getenv("IMAGEBIND_WEIGHTS", MMAP_CHECKPOINT))
+
+    if not src.exists():
+        # Let ImageBind download it
+        imagebind_model.imagebind_huge(pretrained=True)
+
+    print(f"🔄 Converting {src} -> {dst}...")
+    state = torch.load(src, map_location="cpu", weights_only=True)
+    # Own, contiguous storage per tensor so every entry maps cleanly
+    state = {name: tensor.contiguous().clone() for name, tensor in state.items()}
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_suffix(".tmp")
+    torch.save(state, tmp)
+    tmp.replace(dst)
+    print(f"✅ Saved memory-mappable checkpoint ({dst.stat().st_size / 1e9:.1f} GB)")
+    return dst
+
 
 class ImageBindEmbedder:
     """
     Wrapper for ImageBind to generate embeddings for text, images, and video.
     All modalities produce 1024-dim vectors in the same embedding space.
+
+    Embeddings are served from an on-disk EmbeddingCache when possible, so
+    only content the model has never seen is run through it. Set
+    EMBEDDING_CACHE=off to disable the cache.
+
+    The model is loaded on first use and released again after
+    IMAGEBIND_IDLE_MINUTES (default 15) without requests; the next request
+    reloads it. Set IMAGEBIND_PIN_MODEL=1 (or pinned=True) to keep it
+    resident for latency-critical deployments.
     """
 
     _instance = None
     _model = None
 
-    def __new__(cls, device: str = None):
+    model_id = "imagebind_huge"
+
+    def __new__(cls, device: str = None, cache: EmbeddingCache = None,
+                idle_minutes: float = None, pinned: bool = None):
         """Singleton pattern to avoid loading model multiple times."""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self, device: str = None):
+    def __init__(self, device: str = None, cache: EmbeddingCache = None,
+                 idle_minutes: float = None, pinned: bool = None):
         if self._initialized:
             return
 
         self.device = device or (
             "cuda:0" if torch.cuda.is_available() else "cpu")
 
-        # Load model once
+        # Idle unload policy (0 minutes disables unloading)
+        if idle_minutes is None:
+            idle_minutes = float(os.getenv("IMAGEBIND_IDLE_MINUTES", "15"))
+        if pinned is None:
+            pinned = os.getenv("IMAGEBIND_PIN_MODEL", "0").lower() in ("1", "true", "yes")
+        self.idle_timeout = idle_minutes * 60
+        self.pinned = pinned or idle_minutes <= 0
+
+        self._lock = threading.RLock()
+        self._active_calls = 0
+        self._last_used = time.monotonic()
+        self._reaper = None
+
+        # Pinned deployments pay the load cost up front
+        if self.pinned:
+            self._load_model()
+
+        if cache is None and os.getenv("EMBEDDING_CACHE", "on").lower() != "off":
+            cache = EmbeddingCache(dim=1024)
+        self.cache = cache
+
+        # Decodes and transforms images/videos on worker threads
+        self.preprocessor = MediaPreprocessor()
+
+        self._initialized = True
+
+    @property
+    def model(self):
+        """The ImageBind model, loaded on demand."""
+        with self._lock:
+            if self._model is None:
+                self._load_model()
+            self._last_used = time.monotonic()
+            return self._model
+
+    @staticmethod
+    def _build_model():
+        """
+        Build imagebind_huge, preferring the memory-mapped checkpoint.
+
+        With a converted checkpoint, weights are mapped from the page cache
+        (shared by every process on the machine) and assigned to a model
+        skeleton built on the meta device, so nothing is allocated or
+        randomly initialized up front.
+        """
+        weights = Path(os.getenv("IMAGEBIND_WEIGHTS", MMAP_CHECKPOINT))
+        if not weights.exists():
+            return imagebind_model.imagebind_huge(pretrained=True)
+
+        state = torch.load(weights, map_location="cpu", mmap=True, weights_only=True)
+        with torch.device("meta"):
+            model = imagebind_model.imagebind_huge(pretrained=False)
+        model.load_state_dict(state, assign=True)
+
+        tensors = itertools.chain(model.parameters(), model.buffers())
+        if any(tensor.is_meta for tensor in tensors):
+            # Some buffer is not part of the checkpoint: build it for real
+            model = imagebind_model.imagebind_huge(pretrained=False)
+            model.load_state_dict(state, assign=True)
+        return model
+
+    def _load_model(self) -> None:
+        """Load the model and, unless pinned, start watching for idleness."""
         print(f"🔄 Loading ImageBind model on {self.device}...")
-        self.model = imagebind_model.imagebind_huge(pretrained=True)
-        self.model.eval()
-        self.model.to(self.device)
+        model = self._build_model()
+        model.eval()
+        model.to(self.device)
+        self._model = model
+        self._last_used = time.monotonic()
         print("✅ ImageBind model loaded!")
 
-        self._initialized = True
+        if not self.pinned and (self._reaper is None or not self._reaper.is_alive()):
+            self._reaper = threading.Thread(
+                target=self._unload_when_idle, name="imagebind-reaper", daemon=True)
+            self._reaper.start()
+
+    def _unload_when_idle(self) -> None:
+        """Background loop releasing the model once it has been idle long enough."""
+        while True:
+            time.sleep(min(self.idle_timeout, 60))
+            with self._lock:
+                if self._model is None:
+                    return
+                idle_for = time.monotonic() - self._last_used
+                if self._active_calls == 0 and idle_for >= self.idle_timeout:
+                    self.unload()
+                    print("💤 ImageBind model unloaded after idle timeout")
+                    return
+
+    def unload(self) -> None:
+        """Release the model weights; the next request reloads them."""
+        with self._lock:
+            if self._model is None:
+                return
+            self._model = None
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def close(self) -> None:
+        """Release the model and stop the media decoding threads."""
+        self.unload()
+        self.preprocessor.close()
+
+    @contextmanager
+    def _model_in_use(self):
+        """Hold the model for one forward pass so it cannot be unloaded mid-call."""
+        with self._lock:
+            model = self.model
+            self._active_calls += 1
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._active_calls -= 1
+                self._last_used = time.monotonic()
+
+    def _embed_cached(self, modality: str, items: list, contents: list, compute) -> list[list[float]]:
+        """
+        Serve embeddings from the cache and compute only the misses.
+
+        Args:
+            modality: Cache namespace ("text", "vision", ...)
+            items: Inputs passed to compute() for cache misses
+            contents: Raw content (str/bytes) identifying each item
+            compute: Function embedding a list of items
+
+        Returns:
+            List of embedding vectors, in input order
+        """
+        if self.cache is None:
+            return compute(items)
+
+        keys = [EmbeddingCache.make_key(self.model_id, modality, content)
+                for content in contents]
+        vectors = self.cache.get_many(keys)
+
+        # Embed each missing key once, even if it appears several times
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in vectors and key not in missing:
+                missing[key] = item
+
+        if missing:
+            computed = compute(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def _embed_vision_stream(self, sources: list, kind: str, batch_size: int) -> list[list[float]]:
+        """
+        Run the vision encoder over media decoded by the preprocessing pool.
+
+        The next batch is decoded by the worker threads while the model runs
+        on the current one.
+        """
+        vectors = []
+        for _, pixels in self.preprocessor.iter_batches(sources, kind, batch_size):
+            inputs = {ModalityType.VISION: pixels.to(self.device)}
+
+            with self._model_in_use() as model, torch.no_grad():
+                embeddings = model(inputs)
+
+            vectors.extend(embeddings[ModalityType.VISION].cpu().numpy().tolist())
+        return vectors
 
     def embed_text(self, texts: list[str]) -> list[list[float]]:
         """
@@ -60,60 +281,63 @@ class ImageBindEmbedder:
         if not texts:
             return []
 
+        return self._embed_cached("text", texts, texts, self._embed_text_batch)
+
+    def _embed_text_batch(self, texts: list[str]) -> list[list[float]]:
+        """Run the model on a batch of texts (no caching)."""
         inputs = {
             ModalityType.TEXT: data.load_and_transform_text(texts, self.device)
         }
 
-        with torch.no_grad():
-            embeddings = self.model(inputs)
+        with self._model_in_use() as model, torch.no_grad():
+            embeddings = model(inputs)
 
         return embeddings[ModalityType.TEXT].cpu().numpy().tolist()
 
-    def embed_image(self, image_paths: list[str]) -> list[list[float]]:
+    def embed_image(self, images: list[MediaInput], batch_size: int = 32) -> list[list[float]]:
         """
-        Embed images from file paths.
+        Embed images from paths or in-memory data.
 
         Args:
-            image_paths: List of paths to image files
+            images: List of image paths, bytes, file-like objects, PIL images
+                or HxWxC arrays
+            batch_size: Number of images per forward pass
 
         Returns:
             List of 1024-dimensional embedding vectors
         """
-        if not image_paths:
+        if not images:
             return []
 
-        inputs = {
-            ModalityType.VISION: data.load_and_transform_vision_data(
-                image_paths, self.device)
-        }
+        images = [read_media(image) for image in images]
+        contents = [media_fingerprint(image) for image in images]
+        return self._embed_cached(
+            "vision", images, contents,
+            lambda items: self._embed_vision_stream(items, "image", batch_size))
 
-        with torch.no_grad():
-            embeddings = self.model(inputs)
-
-        return embeddings[ModalityType.VISION].cpu().numpy().tolist()
-
-    def embed_video(self, video_paths: list[str]) -> list[list[float]]:
+    def embed_video(self, videos: list[MediaInput], batch_size: int = 4) -> list[list[float]]:
         """
-        Embed videos from file paths.
+        Embed videos from paths or in-memory data.
+
+        Frames are sampled clip by clip, so whole videos are never decoded
+        into memory.
 
         Args:
-            video_paths: List of paths to video files
+            videos: List of video paths, bytes, file-like objects or
+                TxHxWxC uint8 frame arrays
+            batch_size: Number of videos per forward pass
 
         Returns:
             List of 1024-dimensional embedding vectors
         """
-        if not video_paths:
+        if not videos:
             return []
 
-        inputs = {
-            ModalityType.VISION: data.load_and_transform_video_data(
-                video_paths, self.device)
-        }
-
-        with torch.no_grad():
-            embeddings = self.model(inputs)
-
-        return embeddings[ModalityType.VISION].cpu().numpy().tolist()
+        videos = [read_media(video) for video in videos]
+        contents = [media_fingerprint(video) for video in videos]
+        return self._embed_cached(
+            "video", videos, contents,
+            lambda items: self._embed_vision_stream(items, "video", batch_size))
 
     def embed_audio(self, audio_paths: list[str]) -> list[list[float]]:
         """
@@ -128,13 +352,18 @@ class ImageBindEmbedder:
         if not audio_paths:
             return []
 
+        contents = [media_fingerprint(path) for path in audio_paths]
+        return self._embed_cached("audio", audio_paths, contents, self._embed_audio_batch)
+
+    def _embed_audio_batch(self, audio_paths: list[str]) -> list[list[float]]:
+        """Run the model on a batch of audio files (no caching)."""
         inputs = {
             ModalityType.AUDIO: data.load_and_transform_audio_data(
                 audio_paths, self.device)
         }
 
-        with torch.no_grad():
-            embeddings = self.model(inputs)
+        with self._model_in_use() as model, torch.no_grad():
+            embeddings = model(inputs)
 
         return embeddings[ModalityType.AUDIO].cpu().numpy().tolist()
 
@@ -153,7 +382,14 @@ class ImageBindEmbeddingFunction:
     """
 
     def __init__(self, embedder: ImageBindEmbedder = None):
-        self.embedder = embedder or ImageBindEmbedder()
+        self._embedder = embedder
+
+    @property
+    def embedder(self) -> ImageBindEmbedder:
+        """Load the embedder on first use, so creating a collection stays cheap."""
+        if self._embedder is None:
+            self._embedder = ImageBindEmbedder()
+        return self._embedder
 
     def __call__(self, input: list[str]) -> list[list[float]]:
         """
@@ -185,3 +421,20 @@ class ImageBindEmbeddingFunction:
 
         # ImageBind expects a list, so we wrap the single string
         return [self.__call__(input=[query_text])[0]]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ImageBind embedding utilities")
+    parser.add_argument("--convert-checkpoint", action="store_true",
+                        help="Convert the checkpoint to the memory-mappable format")
+    parser.add_argument("--src", help="Source checkpoint path")
+    parser.add_argument("--dst", help="Output checkpoint path")
+
+    args = parser.parse_args()
+
+    if args.convert_checkpoint:
+        convert_checkpoint(args.src, args.dst)
+    else:
+        parser.print_help()
@@ -0,0 +1,342 @@
+"""
+Batched, size-adaptive Chroma writer for ingestion.
+
+Chunks from many recipes are grouped into upserts bounded by item count
+and payload size, flushed when full or after a delay, and retried with
+backoff. Upserts are keyed by chunk id, so a retried batch overwrites
+rather than duplicates what a failed attempt may have written.
+
+If the collection has a PCA-reduced index (see
+migrate_to_imagebind.build_reduced_index), every upsert and delete is
+applied to it too, so image and video search keep finding new recipes.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+
+MAX_BATCH_ITEMS = 300          # Chroma's per-request item limit (see cleanup_duplicates.py)
+MAX_BATCH_BYTES = 4 * 1024**2  # keep request bodies well under server limits
+MAX_DELAY = 5.0                # seconds a chunk may wait for its batch to fill
+LOOKUP_RECIPES = 50            # recipes whose stored chunks add_recipe() looks up at once
+
+
+class BatchedChromaWriter:
+    """
+    Buffers chunks and upserts them to a collection in large batches.
+
+    Usage:
+        with BatchedChromaWriter(collection, on_flush=seen.update) as writer:
+            for title, chroma_data in recipes:
+                writer.add(chroma_data, tag=title)
+        # on_flush receives the tags whose chunks are all written
+    """
+
+    def __init__(self, collection, max_items: int = MAX_BATCH_ITEMS,
+                 max_bytes: int = MAX_BATCH_BYTES, max_delay: float = MAX_DELAY,
+                 max_retries: int = 5, embed=None, on_flush=None,
+                 lookup_recipes: int = LOOKUP_RECIPES, reduced_index=None) -> None:
+        """
+        Args:
+            collection: Chroma collection to upsert into
+            max_items: Maximum chunks per upsert
+            max_bytes: Approximate maximum payload per upsert
+            max_delay: Flush a non-empty buffer after this many seconds
+                (None to flush on size and close only)
+            max_retries: Attempts per batch before the error is raised
+            embed: Optional callable documents -> embeddings, applied per batch
+                (e.g. EmbeddingWorkerPool.embed_text)
+            on_flush: Optional callable receiving the list of tags completed
+                by each successful upsert
+            lookup_recipes: Recipes queued by add_recipe() before their stored
+                chunks are looked up in one request
+            reduced_index: Optional (PCAProjection, collection) to mirror
+                writes into, instead of the reduced index named in the
+                collection's metadata
+        """
+        self.collection = collection
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.embed = embed
+        self.on_flush = on_flush
+        self.lookup_recipes = lookup_recipes
+
+        self.batches = 0
+        self.items = 0
+        self.retries = 0
+        self.unchanged = 0  # chunks add_recipe() found already stored
+        self.deleted = 0    # stale chunks deleted
+
+        self._reduced = reduced_index or self._open_reduced_index()
+        self._rows = []      # (id, document, metadata, tag, recipe)
+        self._bytes = 0
+        self._pending = {}   # tag -> chunks not yet written
+        self._recipes = []   # (chroma_data, tag) queued by add_recipe(), not yet diffed
+        self._oldest = None  # monotonic time the buffer became non-empty
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._timer = None
+        if max_delay:
+            self._timer = threading.Thread(target=self._flush_when_stale,
+                                           name="chroma-writer", daemon=True)
+            self._timer.start()
+
+    def _open_reduced_index(self):
+        """Projection and reduced collection to keep in step, if there are any."""
+        if not (self.collection.metadata or {}).get("reduced_collection"):
+            return None
+        from .database import get_chromadb_client
+        from .projection import open_reduced_index
+        try:
+            return open_reduced_index(get_chromadb_client(), self.collection)
+        except Exception as e:
+            print(f"⚠️  Not updating the reduced index, search will use full vectors: {e}")
+            return None
+
+    @staticmethod
+    def _row_bytes(doc_id: str, document: str, metadata: dict) -> int:
+        return len(doc_id) + len(document.encode("utf-8")) + len(json.dumps(metadata))
+
+    def add(self, chroma_data: dict, tag=None) -> None:
+        """
+        Buffer the output of RecipeTransformer.transform_for_chroma().
+
+        Args:
+            chroma_data: Dict with 'ids', 'documents' and 'metadatas'
+            tag: Optional label (e.g. the recipe title) passed to on_flush
+                once all of these chunks are written
+        """
+        rows = list(zip(chroma_data["ids"], chroma_data["documents"], chroma_data["metadatas"]))
+        with self._lock:
+            self._buffer(rows, tag)
+
+    def _buffer(self, rows: list[tuple], tag, stale: list[str] = (),
+                flush: bool = True) -> None:
+        """
+        Buffer (id, document, metadata) rows of one recipe.
+
+        All of the rows are queued before anything is flushed, so a failed
+        flush leaves whole recipes buffered and their tags pending. Stale
+        chunk IDs are deleted once all of the rows are written, so a failed
+        or interrupted flush never leaves the recipe without chunks.
+        """
+        if not rows:
+            self._delete_all(list(stale))
+            self._complete([] if tag is None else [tag])
+            return
+        recipe = {"rows": len(rows), "stale": list(stale)} if stale else None
+        if tag is not None:
+            self._pending[tag] = self._pending.get(tag, 0) + len(rows)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        for doc_id, document, metadata in rows:
+            self._rows.append((doc_id, document, metadata, tag, recipe))
+            self._bytes += self._row_bytes(doc_id, document, metadata)
+        if flush and self._full():
+            self.flush()
+
+    def _full(self) -> bool:
+        return len(self._rows) >= self.max_items or self._bytes >= self.max_bytes
+
+    def add_recipe(self, chroma_data: dict, tag=None) -> None:
+        """
+        Add one recipe's chunks, skipping unchanged ones and deleting stale ones.
+
+        Relies on the deterministic IDs and 'recipe_key' metadata written by
+        RecipeTransformer: chunks whose ID is already stored are identical and
+        are neither re-embedded nor re-written, and stored chunks of the recipe
+        that are no longer produced are deleted once its new chunks are
+        written. Recipes are queued and their stored chunks looked up
+        lookup_recipes at a time, in one request.
+
+        Chunks written before deterministic IDs (random IDs, no 'recipe_key')
+        record no source URL and are left alone; titles are not unique
+        enough to tell which recipe they belong to. Rebuild the collection
+        (offline_ingest --rebuild) to replace them.
+
+        The writer's unchanged and deleted counters add up the outcome.
+        """
+        recipe_keys = {metadata.get("recipe_key") for metadata in chroma_data["metadatas"]}
+        recipe_keys.discard(None)
+        with self._lock:
+            if len(recipe_keys) != 1:
+                self.add(chroma_data, tag=tag)
+                return
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._recipes.append((chroma_data, tag))
+            if len(self._recipes) >= self.lookup_recipes:
+                self._resolve_recipes()
+                if self._full():
+                    self.flush()
+
+    def _get_all(self, where: dict) -> dict:
+        """collection.get(where=...) of ids and metadatas, paged by max_items."""
+        ids, metadatas = [], []
+        while True:
+            page = self.collection.get(where=where, include=["metadatas"],
+                                       limit=self.max_items, offset=len(ids))
+            ids.extend(page["ids"])
+            metadatas.extend(page["metadatas"])
+            if len(page["ids"]) < self.max_items:
+                return {"ids": ids, "metadatas": metadatas}
+
+    def _resolve_recipes(self) -> None:
+        """Diff the queued recipes against their stored chunks and buffer them."""
+        recipes = self._recipes
+        if not recipes:
+            return
+        keys = sorted({data["metadatas"][0]["recipe_key"] for data, _ in recipes})
+        stored = self._get_all({"recipe_key": {"$in": keys}})
+        self._recipes = []  # after the lookup, so a failed one loses nothing
+
+        by_key = defaultdict(set)
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            by_key[metadata["recipe_key"]].add(doc_id)
+
+        queued = set()
+        for chroma_data, tag in recipes:
+            stored_ids = by_key[chroma_data["metadatas"][0]["recipe_key"]]
+            stale = stored_ids - set(chroma_data["ids"])
+            rows = [row for row in zip(chroma_data["ids"], chroma_data["documents"],
+                                       chroma_data["metadatas"])
+                    if row[0] not in stored_ids and row[0] not in queued]
+            queued.update(row[0] for row in rows)
+            self.unchanged += len(chroma_data["ids"]) - len(rows)
+            # Flushed together below, so every recipe is queued first
+            self._buffer(rows, tag, sorted(stale), flush=False)
+
+    def delete_recipe(self, recipe_key: str) -> int:
+        """
+        Delete every stored chunk of a recipe.
+
+        Returns:
+            Number of chunks deleted
+        """
+        ids = self._get_all({"recipe_key": recipe_key})["ids"]
+        self._delete_all(ids)
+        return len(ids)
+
+    def flush(self) -> None:
+        """Upsert everything buffered so far, in batches within the limits."""
+        with self._lock:
+            self._resolve_recipes()
+            while self._rows:
+                self._write_batch()
+            self._oldest = None
+
+    def _write_batch(self) -> None:
+        """Upsert the oldest max_items / max_bytes of the buffered rows."""
+        end, size = 0, 0
+        for doc_id, document, metadata, *_ in self._rows[:self.max_items]:
+            row_size = self._row_bytes(doc_id, document, metadata)
+            if end and size + row_size > self.max_bytes:
+                break
+            end, size = end + 1, size + row_size
+        rows = self._rows[:end]
+        batch = {
+            "ids": [row[0] for row in rows],
+            "documents": [row[1] for row in rows],
+            "metadatas": [row[2] for row in rows],
+        }
+        if self.embed is not None:
+            batch["embeddings"] = self.embed(batch["documents"])
+        # Rows stay buffered until written, so a failed flush loses nothing
+        self._retry("upsert", batch)
+        if self._reduced is not None:
+            self._upsert_reduced(batch)
+        del self._rows[:end]
+        self._bytes -= size
+
+        self.batches += 1
+        self.items += len(rows)
+        done = []
+        stale = []
+        for *_, tag, recipe in rows:
+            if recipe is not None:
+                recipe["rows"] -= 1
+                if recipe["rows"] == 0:
+                    stale.extend(recipe["stale"])
+            if tag is None:
+                continue
+            self._pending[tag] -= 1
+            if self._pending[tag] == 0:
+                del self._pending[tag]
+                done.append(tag)
+        # Replacements of these chunks are written now
+        self._delete_all(stale)
+        self._complete(done)
+
+    def _upsert_reduced(self, batch: dict) -> None:
+        """Project a written batch into the reduced collection."""
+        projection, reduced_collection = self._reduced
+        if "embeddings" in batch:
+            ids, embeddings = batch["ids"], batch["embeddings"]
+        else:
+            # Embedded by the collection's embedding function during the upsert
+            stored = self.collection.get(ids=batch["ids"], include=["embeddings"])
+            ids, embeddings = stored["ids"], stored["embeddings"]
+        self._retry("upsert", {"ids": ids,
+                               "embeddings": projection.transform(embeddings).tolist()},
+                    collection=reduced_collection)
+
+    def _delete_all(self, ids: list[str]) -> None:
+        """Delete chunks from the collection and its reduced index."""
+        for start in range(0, len(ids), self.max_items):
+            batch = {"ids": ids[start:start + self.max_items]}
+            self._retry("delete", batch)
+            if self._reduced is not None:
+                self._retry("delete", batch, collection=self._reduced[1])
+        self.deleted += len(ids)
+
+    def _retry(self, operation: str, batch: dict, collection=None) -> None:
+        """
+        Run collection.<operation>(**batch), retrying with exponential backoff.
+
+        Args:
+            operation: Collection method, e.g. "upsert"
+            batch: Its keyword arguments
+            collection: Target collection (default: the writer's)
+        """
+        collection = collection if collection is not None else self.collection
+        for attempt in range(self.max_retries):
+            try:
+                getattr(collection, operation)(**batch)
+                return
+            except Exception as e:
+                if attempt + 1 == self.max_retries:
+                    raise
+                wait = 2 ** attempt
+                print(f"⚠️  {operation.capitalize()} of {len(batch['ids'])} chunks failed ({e}); "
+                      f"retrying in {wait}s")
+                self.retries += 1
+                time.sleep(wait)
+
+    def _complete(self, tags: list) -> None:
+        if tags and self.on_flush is not None:
+            self.on_flush(tags)
+
+    def _flush_when_stale(self) -> None:
+        """Background loop flushing buffers older than max_delay."""
+        while not self._closed.wait(self.max_delay / 4):
+            with self._lock:
+                if self._oldest is not None and time.monotonic() - self._oldest >= self.max_delay:
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        print(f"⚠️  Timed flush failed: {e}")
+
+    def close(self) -> None:
+        """Flush what is left and stop the background flusher."""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
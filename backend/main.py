@@ -1,26 +1,42 @@
 from scraper.WebScraper import WebScraper
-from scraper.AllRecipesWebCrawler import AllRecipesCrawler
+from scraper.AllRecipesWebCrawler import AllRecipesCrawler, is_recipe_url
 from scraper.RecipeTransformer import RecipeTransformer
-from scraper.utils import load_seen_urls, save_seen_urls
+from scraper.frontier import MemoryFrontier
+from scraper.seen_store import content_fingerprint
+from scraper.utils import open_seen_store
 from .database import get_chromadb_client
+from .ingest_writer import BatchedChromaWriter
+from .recipe_log import RecipeLog
 from backend.search import HybridRecipeSearch
 
 
-def run_recipe_pipeline(seed_url, max_recipes=5, debug=False):
+def run_recipe_pipeline(seed_url, max_recipes=5, debug=False,
+                        collection_name="recipes", embedding_pool=None,
+                        use_sitemaps=False):
+    """
+    Crawl, scrape and index recipes starting from seed_url.
+
+    If embedding_pool (an EmbeddingWorkerPool) is given, chunk embeddings are
+    computed by its worker processes and passed to Chroma explicitly; use it
+    with an ImageBind collection such as "recipes_imagebind".
+
+    With use_sitemaps, recipe URLs listed in the site's sitemaps are queued
+    alongside the seed instead of being discovered only through hub pages.
+    """
     # init tools
-    crawler = AllRecipesCrawler(delay=0.8)
+    crawler = AllRecipesCrawler(delay=0.8, keep_text=False)  # page text is unused
     scraper = WebScraper()
     client = get_chromadb_client()
     
-    # Load previously seen recipes
-    seen_recipes = load_seen_urls()
-    print(f"Loaded {len(seen_recipes)} seen recipes")
+    # Open the store of previously seen recipes (keyed by canonical URL)
+    seen = open_seen_store()
+    print(f"Loaded {len(seen)} seen recipes")
 
     # Create fresh collection
-    collection = client.get_or_create_collection(name="recipes")
+    collection = client.get_or_create_collection(name=collection_name)
 
     # Determine if seed URL is a recipe page (leaf node)
-    is_recipe_page = '/recipe/' in seed_url.lower() or '-recipe-' in seed_url.lower()
+    is_recipe_page = is_recipe_url(seed_url)
 
     # Set fallback URL to a category page if starting from a recipe page
     fallback_url = None
@@ -29,19 +45,27 @@ def run_recipe_pipeline(seed_url, max_recipes=5, debug=False):
         print(
             f"📌 Starting from recipe page. Fallback URL set to: {fallback_url}")
 
-    # Crawl pages (includes both recipes and category pages)
-    crawl_results = crawler.crawl(seed_url, max_pages=max_recipes)
+    # Crawl pages (includes both recipes and category pages); recipe pages
+    # keep their HTML so they are scraped without a second download, and
+    # recipes seen before are not fetched at all
+    frontier = MemoryFrontier()
+    if use_sitemaps:
+        # Sitemap lastmod dates also reschedule changed recipes for run_recrawl
+        crawler.seed_from_sitemaps(seed_url, frontier, limit=max_recipes, seen=seen)
+    crawl_results = crawler.crawl(
+        seed_url, max_pages=max_recipes, keep_html=is_recipe_url, frontier=frontier,
+        skip=lambda url: is_recipe_url(url) and url in seen)
 
     # Filter to only actual recipe pages (not category pages)
     recipe_urls = {url: info for url, info in crawl_results.items()
-                   if '/recipe/' in url.lower() or '-recipe-' in url.lower()}
+                   if is_recipe_url(url)}
 
     print(
         f"\n🎯 Found {len(recipe_urls)} recipe pages out of {len(crawl_results)} crawled pages")
 
-    # Filter out already-seen recipes
+    # Filter out already-seen recipes (the seed, and titles from the legacy list)
     new_recipe_urls = {url: info for url, info in recipe_urls.items()
-                       if info['title'] not in seen_recipes}
+                       if url not in seen and not seen.has_legacy_title(info['title'])}
     
     if len(recipe_urls) - len(new_recipe_urls) > 0:
         print(f"⏭️  Skipped {len(recipe_urls) - len(new_recipe_urls)} already-seen recipes")
@@ -50,38 +74,63 @@ def run_recipe_pipeline(seed_url, max_recipes=5, debug=False):
     # Limit to max_recipes
     new_recipe_urls = dict(list(new_recipe_urls.items())[:max_recipes])
 
-    for url, info in new_recipe_urls.items():
-        print(f"📖 Scraping recipe: {info['title']}")
-
-        # Get the BeautifulSoup object for the specific recipe
-        soup = scraper.get_data(url)
-
-        # Extract the structured recipe data (the list of dicts)
-        try:
-            raw_recipe_data = scraper.extract_data(soup)
-
-            # Transform the data for ChromaDB
-            transformer = RecipeTransformer(raw_recipe_data)
-            chroma_data = transformer.transform_for_chroma()
-
-            # 4. Step 4: Load into ChromaDB
-            collection.upsert(
-                documents=chroma_data["documents"],
-                metadatas=chroma_data["metadatas"],
-                ids=chroma_data["ids"]
-            )
-            print(
-                f"✅ Indexed {len(chroma_data['ids'])} chunks for {info['title']}")
-            
-            # Mark recipe as seen
-            seen_recipes.add(info['title'])
-
-        except Exception as e:
-            print(
-                f"⚠️  Skipping {url} - possibly not a recipe page. Error: {e}")
-
-    # Save updated seen_recipes.json
-    save_seen_urls(seen_recipes)
+    # Release page bodies that will not be scraped
+    for url, info in crawl_results.items():
+        if url not in new_recipe_urls:
+            info.pop('html', None)
+
+    # Chunks are upserted in large batches across recipes; a recipe enters
+    # the seen store once all of its chunks are written
+    writer = BatchedChromaWriter(
+        collection,
+        embed=embedding_pool.embed_text if embedding_pool is not None else None,
+        on_flush=seen.add_many)
+    # Structured copy of every extracted recipe, for rebuilding indexes
+    recipe_log = RecipeLog.from_env()
+
+    try:
+        for url, info in new_recipe_urls.items():
+            print(f"📖 Scraping recipe: {info['title']}")
+
+            # Use the page kept by the crawler (download only if it is missing)
+            html = info.pop('html', None)
+            if html is None:
+                response = scraper.get(url)
+                if response.status_code != 200:
+                    print(f"⚠️  Skipping {url} - HTTP {response.status_code}")
+                    continue
+                html = response.text
+
+            # Extract the structured recipe data (the list of dicts), from the
+            # page's JSON-LD when it has one
+            try:
+                raw_recipe_data = scraper.extract_from_html(html)
+
+                # Transform the data for ChromaDB
+                fingerprint = content_fingerprint(raw_recipe_data)
+                if recipe_log is not None:
+                    recipe_log.append(url, raw_recipe_data, title=info['title'],
+                                      fingerprint=fingerprint)
+                transformer = RecipeTransformer(raw_recipe_data, source_url=url)
+                chroma_data = transformer.transform_for_chroma()
+
+                # 4. Step 4: Queue for loading into ChromaDB (unchanged chunks
+                # are skipped, stale ones deleted)
+                writer.add_recipe(chroma_data, tag=(url, info['title'], fingerprint))
+                print(f"✅ Queued {len(chroma_data['ids'])} chunks for {info['title']}")
+
+            except Exception as e:
+                print(
+                    f"⚠️  Skipping {url} - possibly not a recipe page. Error: {e}")
+
+        writer.close()
+        print(f"📦 Indexed {writer.items} chunks in {writer.batches} batches "
+              f"({writer.unchanged} unchanged, {writer.deleted} stale removed)")
+    finally:
+        if recipe_log is not None:
+            recipe_log.close()
+
+    seen.close()
     
     print("\n✨ Ingestion Complete! Your RAG database is ready.")
 
@@ -110,8 +159,108 @@ def run_recipe_pipeline(seed_url, max_recipes=5, debug=False):
     ))
 
 
+def run_recrawl(max_urls=100, collection_name="recipes", embedding_pool=None):
+    """
+    Recheck the recipes that are due and re-index the ones that changed.
+
+    Unchanged pages cost one conditional request (or one extraction when
+    the page bytes changed but the recipe did not) and no embedding.
+    Recipes whose pages are gone are removed from the index.
+    """
+    import time
+    from scraper.recrawl import CHANGED, GONE, RecrawlScheduler
+
+    crawler = AllRecipesCrawler(delay=0.8, keep_text=False)
+    scraper = WebScraper()
+    collection = get_chromadb_client().get_or_create_collection(name=collection_name)
+    seen = open_seen_store()
+    scheduler = RecrawlScheduler(seen)
+
+    due = scheduler.due(limit=max_urls)
+    print(f"🔁 {len(due)} recipes due for a recheck")
+    outcomes = {}
+    changed = {}
+
+    def on_flush(tags):
+        for url, fingerprint in tags:
+            scheduler.record(changed.pop(url), CHANGED, fingerprint)
+
+    writer = BatchedChromaWriter(
+        collection,
+        embed=embedding_pool.embed_text if embedding_pool is not None else None,
+        on_flush=on_flush)
+    recipe_log = RecipeLog.from_env()
+
+    try:
+        for record in due:
+            url = record['url']
+            status, raw_recipe_data = scheduler.check(crawler, scraper, record)
+            outcomes[status] = outcomes.get(status, 0) + 1
+
+            if status == CHANGED:
+                # Re-index; the recipe is rescheduled once its chunks are written
+                fingerprint = content_fingerprint(raw_recipe_data)
+                if recipe_log is not None:
+                    recipe_log.append(url, raw_recipe_data, title=record['title'],
+                                      fingerprint=fingerprint)
+                chroma_data = RecipeTransformer(
+                    raw_recipe_data, source_url=url).transform_for_chroma()
+                changed[url] = record
+                writer.add_recipe(chroma_data, tag=(url, fingerprint))
+                print(f"✏️  {record['title']}: changed, re-indexing")
+            else:
+                if status == GONE:
+                    writer.delete_recipe(RecipeTransformer([], source_url=url).recipe_key())
+                    print(f"🗑️  {record['title']}: page is gone, removed from the index")
+                scheduler.record(record, status)
+
+            if not crawler.offline:
+                time.sleep(crawler.request_delay(url))
+
+        writer.close()
+    finally:
+        if recipe_log is not None:
+            recipe_log.close()
+    seen.close()
+    print(f"\n✨ Recrawl complete: {outcomes}")
+    print(f"📦 Wrote {writer.items} chunks ({writer.unchanged} unchanged, "
+          f"{writer.deleted} stale removed)")
+    return outcomes
+
+
 if __name__ == "__main__":
+    import argparse
+
     START_URL = "https://www.allrecipes.com/recipe/162845/chinese-tomato-and-egg/"
 
-    # Enable debug mode to see link discovery details
-    run_recipe_pipeline(START_URL, max_recipes=1)
+    parser = argparse.ArgumentParser(description="Crawl, scrape and index recipes")
+    parser.add_argument("seed_url", nargs="?", default=START_URL, help="Starting URL")
+    parser.add_argument("--max-recipes", type=int, default=1,
+                        help="Recipes to index (with --streaming: pages to crawl)")
+    parser.add_argument("--collection", default="recipes", help="Chroma collection")
+    parser.add_argument("--sitemaps", action="store_true", help="Seed from the site's sitemaps")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Overlap crawling, scraping and indexing (see backend/pipeline.py)")
+    parser.add_argument("--embed-workers", type=int, default=0,
+                        help="Embed chunks on an ImageBind worker pool of this many "
+                             "processes (for ImageBind collections)")
+
+    args = parser.parse_args()
+
+    embedding_pool = None
+    if args.embed_workers:
+        from .embedding_pool import EmbeddingWorkerPool
+        embedding_pool = EmbeddingWorkerPool(num_workers=args.embed_workers)
+    try:
+        if args.streaming:
+            from .pipeline import run_streaming_pipeline
+            run_streaming_pipeline(args.seed_url, max_pages=args.max_recipes,
+                                   collection_name=args.collection,
+                                   embedding_pool=embedding_pool, use_sitemaps=args.sitemaps)
+        else:
+            run_recipe_pipeline(args.seed_url, max_recipes=args.max_recipes,
+                                collection_name=args.collection,
+                                embedding_pool=embedding_pool, use_sitemaps=args.sitemaps)
+    finally:
+        if embedding_pool is not None:
+            embedding_pool.close()
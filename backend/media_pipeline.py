@@ -0,0 +1,294 @@
+"""
+Parallel decode and preprocessing of images and videos for ImageBind.
+
+Decoding, resizing and normalization run on a pool of worker threads
+(PIL, decord and torch release the GIL while they work), and the results
+are handed to the model as ready-made batches. Transforms match
+imagebind.data.load_and_transform_vision_data / _video_data.
+
+Media can be given as file paths, raw bytes, file-like objects, PIL images
+or pre-decoded numpy arrays (HxWxC for images, TxHxWxC for videos), so
+uploads never need a round trip through a temporary file.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Union
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+# CLIP normalization constants used by ImageBind
+MEAN = (0.48145466, 0.4578275, 0.40821073)
+STD = (0.26862954, 0.26130258, 0.27577711)
+
+# Anything the loaders below accept
+MediaInput = Union[str, os.PathLike, bytes, bytearray, io.IOBase, Image.Image, np.ndarray]
+
+# Frame rate assumed for videos passed as pre-decoded frame arrays
+ARRAY_VIDEO_FPS = 30.0
+
+_image_transform = transforms.Compose([
+    transforms.Resize(224, interpolation=transforms.InterpolationMode.BICUBIC),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=MEAN, std=STD),
+])
+
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_media(source: MediaInput) -> MediaInput:
+    """
+    Drain file-like objects into bytes so they can be hashed and re-read.
+
+    Every other input type is returned unchanged.
+    """
+    if hasattr(source, "read") and not isinstance(source, Image.Image):
+        data = source.read()
+        return data.encode() if isinstance(data, str) else data
+    return source
+
+
+def media_fingerprint(source: MediaInput) -> str:
+    """
+    Content hash of a media input, used as its embedding cache key.
+
+    Args:
+        source: Path, bytes, PIL image or array (drain streams with read_media first)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    if _is_path(source):
+        with open(source, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    digest = hashlib.sha256()
+    if isinstance(source, Image.Image):
+        digest.update(f"pil:{source.mode}:{source.size}".encode())
+        digest.update(source.tobytes())
+    elif isinstance(source, np.ndarray):
+        digest.update(f"array:{source.dtype}:{source.shape}".encode())
+        digest.update(np.ascontiguousarray(source).tobytes())
+    else:
+        digest.update(bytes(source))
+    return digest.hexdigest()
+
+
+def describe_media(source) -> str:
+    """Short human-readable description of a media input for log output."""
+    if isinstance(source, (list, tuple)):
+        return f"{len(source)} inputs"
+    if _is_path(source):
+        return str(source)
+    if isinstance(source, (bytes, bytearray)):
+        return f"<{len(source)} bytes>"
+    if isinstance(source, np.ndarray):
+        return f"<array {source.shape}>"
+    return f"<{type(source).__name__}>"
+
+
+def _to_pil(source: MediaInput) -> Image.Image:
+    """Decode any supported image input into an RGB PIL image."""
+    if isinstance(source, Image.Image):
+        return source.convert("RGB")
+    if isinstance(source, np.ndarray):
+        array = source
+        if array.dtype != np.uint8:
+            # Float arrays are expected in [0, 1]
+            array = (np.clip(array, 0, 1) * 255).astype(np.uint8)
+        return Image.fromarray(array).convert("RGB")
+    if _is_path(source):
+        with open(source, "rb") as f:
+            return Image.open(f).convert("RGB")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source).convert("RGB")
+
+
+def load_image_tensor(source: MediaInput) -> torch.Tensor:
+    """
+    Decode and transform a single image.
+
+    Args:
+        source: Path, bytes, file-like object, PIL image or HxWxC array
+
+    Returns:
+        (3, 224, 224) float tensor
+    """
+    return _image_transform(_to_pil(source))
+
+
+def _open_video(source: MediaInput):
+    """
+    Open a video for random frame access.
+
+    Returns:
+        (frame count, fps, function mapping frame indices to a THWC uint8 tensor)
+    """
+    if isinstance(source, np.ndarray):
+        frames = source
+        return len(frames), ARRAY_VIDEO_FPS, lambda indices: torch.from_numpy(
+            np.ascontiguousarray(frames[indices]))
+
+    from decord import VideoReader, cpu
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif _is_path(source):
+        source = str(source)
+    reader = VideoReader(source, ctx=cpu(0))
+    return len(reader), reader.get_avg_fps(), lambda indices: torch.from_numpy(
+        reader.get_batch(indices).asnumpy())
+
+
+def load_video_tensor(
+    source: MediaInput,
+    clip_duration: float = 2,
+    clips_per_video: int = 5
+) -> torch.Tensor:
+    """
+    Sample and transform the clips of a single video.
+
+    Only the frames that end up in the model input are decoded (two per
+    clip), instead of decoding every frame of each clip and subsampling.
+
+    Args:
+        source: Path, bytes, file-like object or TxHxWxC uint8 frame array
+        clip_duration: Length of each clip in seconds
+        clips_per_video: Number of clips sampled across the video
+
+    Returns:
+        (clips_per_video * 3, 3, frames, 224, 224) float tensor
+    """
+    from imagebind.data import SpatialCrop, get_clip_timepoints
+    from pytorchvideo import transforms as pv_transforms
+    from pytorchvideo.data.clip_sampling import ConstantClipsPerVideoSampler
+    from torchvision.transforms._transforms_video import NormalizeVideo
+
+    video_transform = transforms.Compose([
+        pv_transforms.ShortSideScale(224),
+        NormalizeVideo(mean=MEAN, std=STD),
+    ])
+    # ImageBind samples as many frames per clip as the clip lasts in seconds
+    frames_per_clip = int(clip_duration)
+
+    frame_count, fps, get_frames = _open_video(source)
+    clip_sampler = ConstantClipsPerVideoSampler(
+        clip_duration=clip_duration, clips_per_video=clips_per_video)
+
+    clips = []
+    for start, end in get_clip_timepoints(clip_sampler, frame_count / fps):
+        first = min(int(float(start) * fps), frame_count - 1)
+        last = max(first, min(int(float(end) * fps) - 1, frame_count - 1))
+        indices = torch.linspace(first, last, frames_per_clip).long().tolist()
+
+        # (T, H, W, C) uint8 -> (C, T, H, W) float in [0, 1]
+        frames = get_frames(indices)
+        clip = frames.permute(3, 0, 1, 2).float() / 255.0
+        clips.append(video_transform(clip))
+
+    clips = SpatialCrop(224, num_crops=3)(clips)
+    return torch.stack(clips, dim=0)
+
+
+LOADERS = {
+    "image": load_image_tensor,
+    "video": load_video_tensor,
+}
+
+
+class MediaPreprocessor:
+    """
+    Worker pool that decodes media and yields model-ready batches.
+
+    Threads are started on first use and stopped by close(); a closed
+    preprocessor starts them again if it is used later.
+
+    Usage:
+        with MediaPreprocessor(num_workers=8) as preprocessor:
+            for sources, pixels in preprocessor.iter_batches(paths, "image", 32):
+                model({ModalityType.VISION: pixels.to(device)})
+    """
+
+    def __init__(self, num_workers: int = None, prefetch_batches: int = 2) -> None:
+        """
+        Args:
+            num_workers: Decode threads (default: number of CPUs, max 8)
+            prefetch_batches: Batches decoded ahead of the consumer
+        """
+        self.num_workers = num_workers or min(8, os.cpu_count() or 1)
+        self.prefetch_batches = prefetch_batches
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.num_workers, thread_name_prefix="media")
+            return self._executor
+
+    def iter_batches(
+        self,
+        sources: Iterable,
+        kind: str = "image",
+        batch_size: int = 32
+    ) -> Iterator[tuple[list, torch.Tensor]]:
+        """
+        Decode a stream of media, yielding stacked batches in input order.
+
+        At most (prefetch_batches + 1) * batch_size items are decoded ahead of
+        the consumer, so memory stays bounded for arbitrarily long streams.
+
+        Args:
+            sources: Iterable of media to load
+            kind: "image" or "video"
+            batch_size: Items per yielded batch
+
+        Yields:
+            (batch sources, stacked tensor)
+        """
+        loader = LOADERS[kind]
+        executor = self._pool()
+        max_pending = (self.prefetch_batches + 1) * batch_size
+        pending = deque()
+        sources = iter(sources)
+        exhausted = False
+
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    source = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((source, executor.submit(loader, source)))
+
+            if not pending:
+                return
+
+            batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+            tensors = [future.result() for _, future in batch]
+            yield [source for source, _ in batch], torch.stack(tensors, dim=0)
+
+    def close(self) -> None:
+        """Stop the worker threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
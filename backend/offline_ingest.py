@@ -0,0 +1,431 @@
+"""
+Bulk ingestion from saved pages, without crawling.
+
+Reads directories of saved .html pages, WARC files (.warc, .warc.gz) and
+fixture archives (see scraper/fixtures.py), extracts recipes on a pool
+of worker processes with WebScraper's extractor, and streams the chunks
+into batched Chroma writes. Rebuilding a collection after a chunking or
+embedding change is then bounded by CPU (and embedding) time instead of
+crawl politeness.
+
+Recipes extracted from pages are also appended to the recipe log (see
+backend/recipe_log.py); ingest_log() re-indexes from that log alone.
+
+Usage:
+    python -m backend.offline_ingest data/pages crawl.warc.gz --workers 8
+    python -m backend.offline_ingest data/fixtures/archive --rebuild --collection recipes_v2
+    python -m backend.offline_ingest --from-log --rebuild --collection recipes_v2
+    python -m backend.offline_ingest --from-log --rebuild --collection recipes_imagebind \
+        --embed-workers 4
+"""
+import multiprocessing as mp
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from pathlib import Path
+
+from .ingest_writer import BatchedChromaWriter
+from .recipe_log import RecipeLog
+
+HTML_SUFFIXES = ('.html', '.htm')
+REBUILD_SUFFIX = "_rebuild"
+RETIRED_SUFFIX = "_old"  # a replaced collection, kept until its rebuild is in place
+
+_LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_CANONICAL_REL = re.compile(r'\brel\s*=\s*["\']?canonical\b', re.IGNORECASE)
+_HREF = re.compile(r'\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+
+# Per-process scraper, created by _init_worker
+_worker_scraper = None
+
+
+def canonical_url(html: str) -> str | None:
+    """The page's <link rel="canonical"> URL, if it declares one."""
+    end = _HEAD_END.search(html)
+    head = html[:end.start()] if end else html
+    for tag in _LINK_TAG.findall(head):
+        if _CANONICAL_REL.search(tag):
+            match = _HREF.search(tag)
+            if match:
+                return match.group(1)
+    return None
+
+
+def iter_pages(paths):
+    """
+    Iterate over the saved pages under the given files and directories.
+
+    Directories are searched recursively; a directory holding a fixture
+    archive's index.json is read as that archive. Saved .html files get
+    their URL from the page's canonical link, later, in the workers.
+
+    Yields:
+        (URL or None, fetch time or None, HTML text)
+    """
+    from scraper.fixtures import FixtureArchive
+    from scraper.warc import is_warc, iter_warc_pages
+
+    for path in map(Path, paths):
+        if path.is_dir() and (path / "index.json").exists():
+            archive = FixtureArchive(path)
+            for url in archive.urls():
+                status, content_type, body = archive.get(url)
+                if status == 200 and content_type.startswith("text/html"):
+                    yield url, None, body.decode("utf-8", errors="replace")
+            continue
+
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            if is_warc(file):
+                yield from iter_warc_pages(file)
+            elif file.suffix.lower() in HTML_SUFFIXES:
+                yield None, file.stat().st_mtime, file.read_text(encoding="utf-8",
+                                                                  errors="replace")
+
+
+def _init_worker() -> None:
+    """Create the worker's scraper; pages never touch the network here."""
+    global _worker_scraper
+    os.environ["HTTP_CACHE"] = "off"
+    from scraper.WebScraper import WebScraper
+    _worker_scraper = WebScraper()
+
+
+def _extract_batch(pages: list[tuple]) -> list[dict]:
+    """Extract and transform a batch of (url, fetched_at, html) in a worker."""
+    from scraper.RecipeTransformer import RecipeTransformer
+    from scraper.seen_store import content_fingerprint
+    from scraper.urls import canonicalize_url
+
+    results = []
+    for url, fetched_at, html in pages:
+        url = url or canonical_url(html)
+        url = canonicalize_url(url) if url else None
+        try:
+            raw_recipe_data = _worker_scraper.extract_from_html(html)
+        except Exception as e:
+            results.append({"status": "error", "url": url, "error": str(e)})
+            continue
+        if not any(chunk["metadata"]["type"] == "ingredients" for chunk in raw_recipe_data):
+            results.append({"status": "skipped", "url": url})  # not a recipe page
+            continue
+        results.append({
+            "status": "extracted",
+            "url": url,
+            "fetched_at": fetched_at,
+            "title": raw_recipe_data[0]["metadata"].get("recipe"),
+            "fingerprint": content_fingerprint(raw_recipe_data),
+            "data": raw_recipe_data,
+            "chroma_data": RecipeTransformer(
+                raw_recipe_data, source_url=url).transform_for_chroma(),
+        })
+    return results
+
+
+def _batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _embedding_function(metadata: dict):
+    """ImageBind embedding function for ImageBind collections, else None (Chroma's default)."""
+    if str(metadata.get("embedding_model", "")).startswith("imagebind"):
+        from .imagebind_embeddings import ImageBindEmbeddingFunction
+        return ImageBindEmbeddingFunction()  # loads the model only if Chroma embeds
+    return None
+
+
+def _open_writer(collection_name: str, embedding_pool, rebuild: bool,
+                 on_flush=None) -> BatchedChromaWriter:
+    """
+    Writer for a collection, opened with the embedder its metadata names.
+
+    On rebuild, the writer fills an empty '<name>_rebuild' collection with
+    the same metadata, embedder and distance function instead, and a
+    '<reduced>_rebuild' copy of the collection's reduced index if it has
+    one. _swap_in_rebuild() replaces the live collections once it is done,
+    so search keeps the old index meanwhile and a failed rebuild loses
+    nothing.
+    """
+    from .database import get_chromadb_client
+    from .projection import distance_space, open_reduced_index
+
+    client = get_chromadb_client()
+    try:
+        source = client.get_collection(collection_name)
+    except Exception:
+        source = _restore_retired(client, collection_name)
+    metadata = dict(source.metadata or {}) if source is not None else {}
+    kwargs = {}
+    embedding_function = _embedding_function(metadata)
+    if embedding_function is not None:
+        kwargs["embedding_function"] = embedding_function
+    embed = embedding_pool.embed_text if embedding_pool is not None else None
+
+    if not rebuild:
+        collection = client.get_or_create_collection(name=collection_name, **kwargs)
+        return BatchedChromaWriter(collection, embed=embed, on_flush=on_flush)
+
+    reduced_index = None
+    if source is not None:
+        metadata["hnsw:space"] = distance_space(source)
+        try:
+            reduced_index = open_reduced_index(client, source)
+        except Exception as e:
+            print(f"⚠️  Not rebuilding the reduced index: {e}")
+            for key in ("reduced_collection", "projection_file", "projection_version"):
+                metadata.pop(key, None)
+    if reduced_index is not None:
+        projection, reduced_collection = reduced_index
+        reduced_index = (projection, _create_empty(
+            client, reduced_collection.name + REBUILD_SUFFIX, reduced_collection.metadata))
+        print(f"   Reusing projection v{projection.version}; if the embedding model changed, "
+              "refit it afterwards with migrate_to_imagebind.py --reduce-only")
+
+    collection = _create_empty(client, collection_name + REBUILD_SUFFIX, metadata, **kwargs)
+    print(f"🏗️  Rebuilding '{collection_name}' into '{collection.name}'")
+    return BatchedChromaWriter(collection, embed=embed, on_flush=on_flush,
+                               reduced_index=reduced_index)
+
+
+def _restore_retired(client, collection_name: str):
+    """Put back a collection that a swap interrupted after renaming it aside."""
+    try:
+        retired = client.get_collection(collection_name + RETIRED_SUFFIX)
+    except Exception:
+        return None
+    retired.modify(name=collection_name)
+    print(f"↩️  Restored '{collection_name}' from an interrupted swap")
+    return retired
+
+
+def _create_empty(client, name: str, metadata: dict, **kwargs):
+    """Create a collection, replacing what an interrupted run left under its name."""
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    return client.create_collection(name=name, metadata=metadata or None, **kwargs)
+
+
+def _swap_in_rebuild(collection_name: str) -> None:
+    """
+    Replace a collection and its reduced index with their finished rebuilds.
+
+    The live collection is renamed to '<name>_old' first and deleted only
+    once the rebuild holds its name. A failed rename is rolled back, and
+    the next run restores a collection left aside by a crash in between.
+    """
+    from .database import get_chromadb_client
+
+    client = get_chromadb_client()
+    rebuilt = client.get_collection(collection_name + REBUILD_SUFFIX)
+    renames = [(rebuilt.name, collection_name)]
+    reduced_name = (rebuilt.metadata or {}).get("reduced_collection")
+    if reduced_name:
+        renames.insert(0, (reduced_name + REBUILD_SUFFIX, reduced_name))
+    for temporary, final in renames:
+        retired = final + RETIRED_SUFFIX
+        try:
+            client.delete_collection(retired)  # left by an interrupted swap
+        except Exception:
+            pass
+        try:
+            client.get_collection(final).modify(name=retired)
+        except Exception:
+            retired = None  # no live collection yet
+        try:
+            client.get_collection(temporary).modify(name=final)
+        except Exception:
+            if retired is not None:
+                client.get_collection(retired).modify(name=final)
+            raise
+        if retired is not None:
+            client.delete_collection(retired)
+    print(f"🔁 Swapped the rebuilt '{collection_name}' in "
+          "(restart running search services to pick it up)")
+
+
+def ingest_archives(paths, collection_name: str = "recipes", workers: int = None,
+                    batch_size: int = 16, embedding_pool=None, rebuild: bool = False,
+                    update_seen: bool = True) -> Counter:
+    """
+    Extract recipes from saved pages in parallel and index them.
+
+    Args:
+        paths: Files and directories (see iter_pages)
+        collection_name: Chroma collection to upsert into
+        workers: Extraction processes (default: one per core)
+        batch_size: Pages per worker task
+        embedding_pool: Optional EmbeddingWorkerPool computing chunk embeddings
+        rebuild: Index into a fresh copy of the collection, without diffing
+            against stored chunks, and swap it in once every page is done
+        update_seen: Record indexed recipes in the seen store
+
+    Returns:
+        Page counts by outcome: extracted, duplicate, skipped (no recipe), error
+    """
+    from scraper.utils import open_seen_store
+
+    seen = open_seen_store() if update_seen else None
+    writer = _open_writer(collection_name, embedding_pool, rebuild,
+                          on_flush=seen.add_many if seen is not None else None)
+    recipe_log = RecipeLog.from_env()
+
+    counts = Counter()
+    indexed_urls = set()
+    start = time.monotonic()
+    next_report = 1000
+
+    def handle(results):
+        nonlocal next_report
+        for result in results:
+            url = result["url"]
+            if result["status"] != "extracted":
+                counts[result["status"]] += 1
+                continue
+            if url is not None:
+                if url in indexed_urls:
+                    counts["duplicate"] += 1  # e.g. revisits in WARC files
+                    continue
+                indexed_urls.add(url)
+            counts["extracted"] += 1
+            if recipe_log is not None:
+                recipe_log.append(url, result["data"], title=result["title"],
+                                  fetched_at=result["fetched_at"],
+                                  fingerprint=result["fingerprint"])
+
+            tag = (url, result["title"], result["fingerprint"]) if url and seen is not None else None
+            if rebuild:
+                writer.add(result["chroma_data"], tag=tag)
+            else:
+                writer.add_recipe(result["chroma_data"], tag=tag)
+
+        pages = sum(counts.values())
+        if pages >= next_report:
+            next_report += 1000
+            elapsed = time.monotonic() - start
+            print(f"   {pages} pages, {counts['extracted']} recipes "
+                  f"({pages / elapsed:.0f} pages/s)")
+
+    # Closed last in, first out: the writer flushes into the seen store
+    with ExitStack() as stack:
+        if seen is not None:
+            stack.callback(seen.close)
+        if recipe_log is not None:
+            stack.callback(recipe_log.close)
+        stack.enter_context(writer)
+
+        workers = workers or os.cpu_count() or 1
+        max_pending = 2 * workers
+        # spawn, like the embedding pool: the parent holds a Chroma client's threads
+        context = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker) as executor:
+            print(f"🧵 Extracting with {workers} worker processes")
+            pending = set()
+            for batch in _batched(iter_pages(paths), batch_size):
+                pending.add(executor.submit(_extract_batch, batch))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future.result())
+            for future in pending:
+                handle(future.result())
+    if rebuild:
+        _swap_in_rebuild(collection_name)
+
+    elapsed = time.monotonic() - start
+    pages = sum(counts.values())
+    print(f"\n✨ {pages} pages in {elapsed:.1f}s ({pages / max(elapsed, 1e-9):.0f} pages/s): "
+          f"{dict(counts)}")
+    print(f"📦 Indexed {writer.items} chunks in {writer.batches} batches")
+    return counts
+
+
+def ingest_log(collection_name: str = "recipes", log_dir: str = None,
+               embedding_pool=None, rebuild: bool = False) -> int:
+    """
+    Index the latest logged version of every recipe, without any extraction.
+
+    Args:
+        collection_name: Chroma collection to upsert into
+        log_dir: Recipe log directory. Defaults to data/recipe_log
+        embedding_pool: Optional EmbeddingWorkerPool computing chunk embeddings
+        rebuild: Index into a fresh copy of the collection, without diffing
+            against stored chunks, and swap it in once the log is done
+
+    Returns:
+        Number of recipes indexed
+    """
+    from scraper.RecipeTransformer import RecipeTransformer
+
+    writer = _open_writer(collection_name, embedding_pool, rebuild)
+    start = time.monotonic()
+    recipes = 0
+    with writer:
+        for record in RecipeLog(log_dir).iter_records(latest_only=True):
+            chroma_data = RecipeTransformer(
+                record["data"], source_url=record["url"]).transform_for_chroma()
+            if rebuild:
+                writer.add(chroma_data)
+            else:
+                writer.add_recipe(chroma_data)
+            recipes += 1
+    if rebuild:
+        _swap_in_rebuild(collection_name)
+
+    elapsed = time.monotonic() - start
+    print(f"\n✨ {recipes} logged recipes in {elapsed:.1f}s")
+    print(f"📦 Indexed {writer.items} chunks in {writer.batches} batches")
+    return recipes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index recipes from saved HTML/WARC files")
+    parser.add_argument("paths", nargs="*", help="Files or directories of saved pages")
+    parser.add_argument("--from-log", action="store_true",
+                        help="Index the recipe log instead of saved pages")
+    parser.add_argument("--collection", default="recipes", help="Chroma collection")
+    parser.add_argument("--workers", type=int, help="Extraction processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Pages per worker task")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Index from scratch into a copy and swap it in when done")
+    parser.add_argument("--embed-workers", type=int, default=0,
+                        help="Embed chunks on an ImageBind worker pool of this many "
+                             "processes (for ImageBind collections)")
+    parser.add_argument("--no-seen", action="store_true",
+                        help="Do not record indexed recipes in the seen store")
+
+    args = parser.parse_args()
+    if not (args.from_log or args.paths):
+        parser.print_help()
+        raise SystemExit(1)
+
+    embedding_pool = None
+    if args.embed_workers:
+        from .embedding_pool import EmbeddingWorkerPool
+        embedding_pool = EmbeddingWorkerPool(num_workers=args.embed_workers)
+    try:
+        if args.from_log:
+            ingest_log(collection_name=args.collection, embedding_pool=embedding_pool,
+                       rebuild=args.rebuild)
+        else:
+            ingest_archives(args.paths, collection_name=args.collection, workers=args.workers,
+                            batch_size=args.batch_size, embedding_pool=embedding_pool,
+                            rebuild=args.rebuild, update_seen=not args.no_seen)
+    finally:
+        if embedding_pool is not None:
+            embedding_pool.close()
@@ -0,0 +1,327 @@
+"""
+Streaming crawl -> extract -> transform -> index pipeline.
+
+Stages run concurrently on their own worker threads and are connected by
+bounded queues, so fetching, parsing and embedding overlap and memory is
+capped by the queue sizes instead of the crawl size. Each stage reports
+its throughput and how long it was starved for input or blocked by a
+full downstream queue (back-pressure).
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+from .ingest_writer import MAX_BATCH_ITEMS, BatchedChromaWriter
+from .recipe_log import RecipeLog
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+
+@dataclass
+class StageStats:
+    """Counters for one pipeline stage (times are summed over workers)."""
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    idle_seconds: float = 0.0      # waiting for input
+    blocked_seconds: float = 0.0   # waiting for room downstream
+    max_queue_depth: int = 0       # deepest output queue seen
+
+
+class Stage:
+    """
+    One pipeline stage: func(item) returns an iterable of output items.
+
+    Returning an empty iterable filters the item out; returning several
+    fans it out. on_close(), if given, runs once after all workers have
+    finished and may return final items (e.g. a last partial batch).
+    """
+
+    def __init__(self, name: str, func, workers: int = 1, on_close=None) -> None:
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.on_close = on_close
+        self.stats = StageStats(name, workers)
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas) -> None:
+        with self._lock:
+            for field, delta in deltas.items():
+                setattr(self.stats, field, getattr(self.stats, field) + delta)
+
+    def _put(self, outq: queue.Queue | None, item) -> None:
+        if outq is None:
+            return
+        start = time.monotonic()
+        outq.put(item)
+        with self._lock:
+            self.stats.blocked_seconds += time.monotonic() - start
+            self.stats.items_out += 1
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, outq.qsize())
+
+    def _work(self, inq: queue.Queue, outq: queue.Queue | None) -> None:
+        while True:
+            start = time.monotonic()
+            item = inq.get()
+            self._count(idle_seconds=time.monotonic() - start)
+            if item is _DONE:
+                inq.put(_DONE)  # let sibling workers see it too
+                return
+
+            start = time.monotonic()
+            try:
+                outputs = list(self.func(item) or ())
+            except Exception as e:
+                print(f"⚠️  [{self.name}] {e}")
+                self._count(items_in=1, errors=1, busy_seconds=time.monotonic() - start)
+                continue
+            self._count(items_in=1, busy_seconds=time.monotonic() - start)
+
+            for output in outputs:
+                self._put(outq, output)
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues.
+
+    Usage:
+        pipeline = Pipeline([
+            Stage("fetch", fetch, workers=8),
+            Stage("extract", extract, workers=2),
+            Stage("index", index, on_close=flush),
+        ], queue_size=32)
+        pipeline.run(urls)
+        pipeline.report()
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 32) -> None:
+        self.stages = stages
+        self.queue_size = queue_size
+        self.elapsed = 0.0
+
+    def run(self, source) -> None:
+        """Feed every item of source through the stages and wait for completion."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+
+        for i, stage in enumerate(self.stages):
+            inq = queues[i]
+            outq = queues[i + 1] if i + 1 < len(queues) else None
+            workers = [threading.Thread(target=stage._work, args=(inq, outq),
+                                        name=f"{stage.name}-{n}", daemon=True)
+                       for n in range(stage.workers)]
+            for worker in workers:
+                worker.start()
+            # Closes the stage's output once all of its workers are finished
+            closer = threading.Thread(target=self._close_stage, args=(stage, workers, outq),
+                                      name=f"{stage.name}-close", daemon=True)
+            closer.start()
+            threads.append(closer)
+
+        start = time.monotonic()
+        for item in source:
+            queues[0].put(item)
+        queues[0].put(_DONE)
+
+        for closer in threads:
+            closer.join()
+        self.elapsed = time.monotonic() - start
+
+    @staticmethod
+    def _close_stage(stage: Stage, workers: list[threading.Thread], outq) -> None:
+        for worker in workers:
+            worker.join()
+        if stage.on_close is not None:
+            try:
+                for output in stage.on_close() or ():
+                    stage._put(outq, output)
+            except Exception as e:
+                print(f"⚠️  [{stage.name}] {e}")
+                stage._count(errors=1)
+        if outq is not None:
+            outq.put(_DONE)
+
+    def report(self) -> None:
+        """Print per-stage throughput, utilization and back-pressure."""
+        print(f"\n{'stage':<10} {'workers':>7} {'in':>7} {'out':>7} {'err':>5} "
+              f"{'items/s':>8} {'busy':>6} {'starved':>8} {'blocked':>8} {'max q':>6}")
+        for stage in self.stages:
+            s = stage.stats
+            capacity = max(self.elapsed * s.workers, 1e-9)
+            rate = s.items_in / self.elapsed if self.elapsed else 0.0
+            print(f"{s.name:<10} {s.workers:>7} {s.items_in:>7} {s.items_out:>7} {s.errors:>5} "
+                  f"{rate:>8.2f} {s.busy_seconds / capacity:>6.0%} "
+                  f"{s.idle_seconds / capacity:>8.0%} {s.blocked_seconds / capacity:>8.0%} "
+                  f"{s.max_queue_depth:>6}")
+        print(f"Total: {self.elapsed:.1f}s")
+
+
+class CrawlSource:
+    """
+    Frontier-driven URL source for a fetch stage.
+
+    Yields URLs while the page budget allows and waits for in-flight
+    fetches when the frontier is momentarily empty; fetch workers report
+    back through finish(), which queues discovered links.
+    """
+
+    def __init__(self, crawler, seed_url: str, max_pages: int, frontier=None,
+                 skip=None) -> None:
+        from scraper.frontier import MemoryFrontier
+        from scraper.urls import canonicalize_url
+
+        self.crawler = crawler
+        self.max_pages = max_pages
+        self.skip = skip
+        self.frontier = frontier if frontier is not None else MemoryFrontier()
+        self.seed_url = canonicalize_url(seed_url)
+        self.frontier.add(self.seed_url, crawler.url_priority(self.seed_url))
+        self.crawled = 0
+        self.in_flight = 0
+        self._changed = threading.Condition()
+
+    def __iter__(self):
+        while True:
+            with self._changed:
+                while True:
+                    if self.crawled >= self.max_pages:
+                        return
+                    url = None
+                    if self.crawled + self.in_flight < self.max_pages:
+                        url = self._next_url()
+                    if url is not None:
+                        self.in_flight += 1
+                        break
+                    if not self.in_flight:
+                        return
+                    self._changed.wait()
+            yield url
+
+    def _next_url(self) -> str | None:
+        """Pop the next URL that is not skipped (the seed is never skipped)."""
+        url = self.frontier.pop()
+        while url is not None and self.skip and url != self.seed_url and self.skip(url):
+            self.frontier.mark_done(url)
+            url = self.frontier.pop()
+        return url
+
+    def finish(self, url: str, result: dict | None, retry: bool) -> None:
+        """Record a fetch outcome and queue the page's links."""
+        with self._changed:
+            self.in_flight -= 1
+            if result:
+                self.crawled += 1
+                self.frontier.mark_done(url)
+                self.frontier.add_many(
+                    [(link, self.crawler.url_priority(link)) for link in result['links']])
+            else:
+                self.frontier.mark_failed(url, retry=retry)
+            self._changed.notify_all()
+
+
+def run_streaming_pipeline(seed_url, max_pages=50, collection_name="recipes",
+                           embedding_pool=None, use_sitemaps=False,
+                           fetch_workers=8, extract_workers=2, transform_workers=1,
+                           index_batch_size=MAX_BATCH_ITEMS, queue_size=32, frontier=None):
+    """
+    Crawl, scrape and index recipes as one streaming pipeline.
+
+    Unlike run_recipe_pipeline, recipes are extracted and indexed while the
+    crawl is still running, and only pages in the queues are held in memory.
+
+    Args:
+        seed_url: Starting URL
+        max_pages: Crawl budget (recipe and hub pages)
+        collection_name: Chroma collection to upsert into
+        embedding_pool: Optional EmbeddingWorkerPool computing chunk embeddings
+        use_sitemaps: Also queue recipe URLs from the site's sitemaps
+        fetch_workers, extract_workers, transform_workers: Threads per stage
+        index_batch_size: Maximum chunks per Chroma upsert
+        queue_size: Capacity of each inter-stage queue
+        frontier: Optional (e.g. SQLite) frontier to resume from
+
+    Returns:
+        The Pipeline, for its per-stage stats
+    """
+    from scraper.AllRecipesWebCrawler import AllRecipesCrawler, is_recipe_url
+    from scraper.RecipeTransformer import RecipeTransformer
+    from scraper.WebScraper import WebScraper
+    from scraper.politeness import DomainThrottle
+    from scraper.seen_store import content_fingerprint
+    from scraper.utils import open_seen_store
+    from .database import get_chromadb_client
+
+    crawler = AllRecipesCrawler(delay=0.8, keep_text=False)
+    scraper = WebScraper()
+    throttle = DomainThrottle(delay=crawler.delay)
+    collection = get_chromadb_client().get_or_create_collection(name=collection_name)
+
+    # Seen recipe pages are skipped before they are fetched
+    seen = open_seen_store()
+    print(f"Loaded {len(seen)} seen recipes")
+
+    source = CrawlSource(crawler, seed_url, max_pages, frontier=frontier,
+                         skip=lambda url: is_recipe_url(url) and url in seen)
+    if use_sitemaps:
+        crawler.seed_from_sitemaps(source.seed_url, source.frontier, limit=max_pages,
+                                   seen=seen)
+
+    def fetch(url):
+        keep_html = is_recipe_url(url)
+        result, retry = None, False
+        try:
+            result, retry = crawler.fetch_page(url, keep_html=keep_html, throttle=throttle)
+        finally:
+            source.finish(url, result, retry)
+        if result and keep_html and url not in seen and not seen.has_legacy_title(result['title']):
+            yield url, result
+
+    # Structured copy of every extracted recipe, for rebuilding indexes
+    recipe_log = RecipeLog.from_env()
+
+    def extract(page):
+        url, info = page
+        raw_recipe_data = scraper.extract_from_html(info.pop('html'))
+        fingerprint = content_fingerprint(raw_recipe_data)
+        if recipe_log is not None:
+            recipe_log.append(url, raw_recipe_data, title=info['title'], fingerprint=fingerprint)
+        yield (url, info['title'], fingerprint), raw_recipe_data
+
+    def transform(recipe):
+        entry, raw_recipe_data = recipe
+        transformer = RecipeTransformer(raw_recipe_data, source_url=entry[0])
+        yield entry, transformer.transform_for_chroma()
+
+    # A recipe enters the seen store once all of its chunks are written
+    writer = BatchedChromaWriter(
+        collection, max_items=index_batch_size,
+        embed=embedding_pool.embed_text if embedding_pool is not None else None,
+        on_flush=seen.add_many)
+
+    def index(recipe):
+        entry, chroma_data = recipe
+        writer.add_recipe(chroma_data, tag=entry)
+        return ()
+
+    try:
+        pipeline = Pipeline([
+            Stage("fetch", fetch, workers=fetch_workers),
+            Stage("extract", extract, workers=extract_workers),
+            Stage("transform", transform, workers=transform_workers),
+            Stage("index", index, workers=1, on_close=writer.close),
+        ], queue_size=queue_size)
+        pipeline.run(source)
+        print(f"📦 Indexed {writer.items} chunks in {writer.batches} batches")
+    finally:
+        if recipe_log is not None:
+            recipe_log.close()
+
+    seen.close()
+    pipeline.report()
+    return pipeline
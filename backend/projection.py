@@ -0,0 +1,145 @@
+"""
+PCA projection of ImageBind vectors for fast first-stage retrieval.
+
+A projection fitted on the corpus maps 1024-d embeddings to a 128-256-d
+copy stored in a companion Chroma collection. Queries find a shortlist in
+the reduced space and rerank it with the full-precision vectors.
+"""
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_PROJECTION_DIR = Path(__file__).parent.parent / "data" / "projections"
+
+
+class PCAProjection:
+    """
+    Linear PCA projection with unit-normalized output.
+
+    Usage:
+        projection = PCAProjection.fit(embeddings, dim=256)
+        path = projection.save("recipes_imagebind")
+        reduced = projection.transform(embeddings)
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray) -> None:
+        """
+        Args:
+            mean: (input_dim,) mean of the fitting data
+            components: (dim, input_dim) principal axes
+        """
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        """Output dimension."""
+        return self.components.shape[0]
+
+    @property
+    def version(self) -> str:
+        """Short content hash identifying this exact projection."""
+        digest = hashlib.sha1(self.mean.tobytes())
+        digest.update(self.components.tobytes())
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def fit(cls, vectors, dim: int = 256) -> "PCAProjection":
+        """
+        Fit a projection on corpus embeddings.
+
+        Args:
+            vectors: (n, input_dim) array-like of embeddings
+            dim: Output dimension
+
+        Returns:
+            Fitted PCAProjection
+        """
+        data = np.asarray(vectors, dtype=np.float32)
+        if data.shape[0] < dim:
+            raise ValueError(
+                f"Need at least {dim} vectors to fit a {dim}-d projection, got {data.shape[0]}")
+
+        mean = data.mean(axis=0)
+        # Rows of vt are the principal axes, ordered by explained variance
+        _, _, vt = np.linalg.svd(data - mean, full_matrices=False)
+        return cls(mean, vt[:dim])
+
+    def transform(self, vectors) -> np.ndarray:
+        """
+        Project embeddings into the reduced space.
+
+        Args:
+            vectors: (n, input_dim) array-like of embeddings
+
+        Returns:
+            (n, dim) float32 array of unit-length vectors
+        """
+        data = np.asarray(vectors, dtype=np.float32)
+        reduced = (data - self.mean) @ self.components.T
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        return reduced / np.maximum(norms, 1e-12)
+
+    def save(self, name: str, directory: str = None) -> Path:
+        """
+        Save the projection as <name>-pca<dim>-<version>.npz.
+
+        Older versions are kept, so collections still pointing at them keep working.
+
+        Args:
+            name: Usually the name of the full-precision collection
+            directory: Target directory (default: data/projections)
+
+        Returns:
+            Path of the saved file
+        """
+        directory = Path(directory or DEFAULT_PROJECTION_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{name}-pca{self.dim}-{self.version}.npz"
+        np.savez(path, mean=self.mean, components=self.components)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "PCAProjection":
+        """Load a projection saved with save()."""
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
+
+
+def distance_space(collection) -> str:
+    """
+    Distance function of a collection: "l2", "cosine" or "ip".
+
+    collection.modify() cannot carry 'hnsw:space', so collections whose
+    metadata was rewritten keep a copy under 'distance_space'.
+    """
+    metadata = collection.metadata or {}
+    return metadata.get("hnsw:space") or metadata.get("distance_space", "l2")
+
+
+def open_reduced_index(client, collection):
+    """
+    Load the reduced index recorded in a collection's metadata.
+
+    Args:
+        client: Chroma client holding both collections
+        collection: Full-precision collection
+
+    Returns:
+        (PCAProjection, reduced collection), or None if the collection has none
+
+    Raises:
+        Exception: If the projection file or reduced collection is missing, or
+            the reduced collection was built with a different projection
+    """
+    metadata = collection.metadata or {}
+    reduced_name = metadata.get("reduced_collection")
+    if not reduced_name:
+        return None
+
+    projection = PCAProjection.load(DEFAULT_PROJECTION_DIR / metadata["projection_file"])
+    reduced_collection = client.get_collection(reduced_name)
+    if (reduced_collection.metadata or {}).get("projection_version") != projection.version:
+        raise ValueError(f"'{reduced_name}' was built with a different projection")
+    return projection, reduced_collection
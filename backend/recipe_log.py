@@ -0,0 +1,278 @@
+"""
+Append-only log of extracted recipes.
+
+Every recipe the ingestion paths extract is appended here in its
+structured form (the extractor's chunk list plus source URL, title and
+fetch time), before it is chunked into Chroma. New derived indexes (BM25,
+ingredient or nutrition tables, another embedding model) are built by
+streaming the log instead of re-scraping or pulling chunks back out of
+Chroma.
+
+The log is a directory of gzip-compressed JSON-lines segments. The
+segment being written ends in .open and is renamed once it is full, so
+readers only ever see complete, immutable segments and can process them
+in parallel, one segment per worker.
+
+Several processes may write to one directory: each writer appends to its
+own segment and holds an exclusive lock on it, so only segments left by
+crashed writers (whose locks are free) are sealed by others.
+"""
+import errno
+import gzip
+import json
+import multiprocessing as mp
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments are not locked, use one writer per directory
+    fcntl = None
+
+DEFAULT_LOG_DIR = Path(__file__).parent.parent / "data" / "recipe_log"
+SEGMENT_BYTES = 64 * 1024**2  # compressed size at which a segment is sealed
+MEMBER_BYTES = 1024**2        # uncompressed records buffered per gzip member
+
+_SEGMENT_NAME = re.compile(r"^segment-(\d{6})\.jsonl\.gz(\.open)?$")
+
+
+def iter_segment(path):
+    """
+    Records of one segment, in append order.
+
+    A torn final gzip member (from a crash mid-write) ends the segment
+    instead of raising.
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return
+
+
+def _seal_path(path: Path) -> None:
+    """Rename an .open segment to its sealed name, never replacing a file."""
+    try:
+        os.link(path, path.with_suffix(""))
+    except FileExistsError:
+        print(f"⚠️  {path.name}: sealed segment already exists, left open")
+        return
+    os.unlink(path)
+
+
+def _map_segment(func, path):
+    return func(iter_segment(path))
+
+
+class RecipeLog:
+    """
+    Writer and reader of the recipe log.
+
+    Any number of processes may write to and read a log directory. Records
+    are buffered and written as one gzip member per MEMBER_BYTES, so a
+    crash loses at most the unflushed buffer.
+
+    Usage:
+        log = RecipeLog.from_env()
+        if log is not None:
+            log.append(url, raw_recipe_data, title=title)
+            log.close()
+
+        for record in RecipeLog().iter_records(latest_only=True):
+            ...
+        counts = RecipeLog().map_segments(count_ingredients, workers=8)
+    """
+
+    def __init__(self, log_dir: str = None, segment_bytes: int = SEGMENT_BYTES,
+                 member_bytes: int = MEMBER_BYTES) -> None:
+        """
+        Args:
+            log_dir: Directory of segments. Defaults to RECIPE_LOG_DIR or
+                data/recipe_log
+            segment_bytes: Compressed size at which a segment is sealed
+            member_bytes: Uncompressed bytes buffered before they are written
+        """
+        self.log_dir = Path(log_dir or os.getenv("RECIPE_LOG_DIR", DEFAULT_LOG_DIR))
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.member_bytes = member_bytes
+
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._active = None  # path of the .open segment, created on first write
+        self._file = None    # its locked file object
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RecipeLog | None":
+        """Log configured by RECIPE_LOG: "on" (default) or "off" (None)."""
+        if os.getenv("RECIPE_LOG", "on").lower() == "off":
+            return None
+        return cls()
+
+    def _segment_numbers(self) -> list[tuple[int, Path]]:
+        numbered = []
+        for path in self.log_dir.iterdir():
+            match = _SEGMENT_NAME.match(path.name)
+            if match:
+                numbered.append((int(match.group(1)), path))
+        return sorted(numbered)
+
+    def segments(self) -> list[Path]:
+        """Sealed segments, oldest first."""
+        return [path for _, path in self._segment_numbers() if path.suffix != ".open"]
+
+    # Writing
+
+    def append(self, url: str | None, recipe_data: list, title: str = None,
+               fetched_at: float = None, **fields) -> None:
+        """
+        Log one extracted recipe.
+
+        Args:
+            url: Source page (None if unknown)
+            recipe_data: Chunk list from WebScraper.extract_from_html/extract_data
+            title: Recipe title
+            fetched_at: When the page was fetched (default: now)
+            **fields: Extra JSON-serializable fields, e.g. fingerprint
+        """
+        now = time.time()
+        record = {"url": url, "title": title,
+                  "fetched_at": fetched_at if fetched_at is not None else now,
+                  "logged_at": now, **fields, "data": recipe_data}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            if self._buffered_bytes >= self.member_bytes:
+                self._write()
+
+    def flush(self) -> None:
+        """Write buffered records to the active segment."""
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._active, self._file = self._open_segment()
+        member = gzip.compress("".join(self._buffer).encode("utf-8"))
+        self._file.write(member)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer, self._buffered_bytes = [], 0
+        if self._file.tell() >= self.segment_bytes:
+            self._seal()
+
+    def _open_segment(self) -> tuple[Path, object]:
+        """
+        Seal segments left open by crashed writers and start a new one.
+
+        Runs under a directory lock, and the new segment is locked before
+        that is released, so a segment whose lock is free has no writer.
+        """
+        with open(self.log_dir / ".lock", "a") as dir_lock:
+            if fcntl is not None:
+                fcntl.flock(dir_lock, fcntl.LOCK_EX)
+            numbered = self._segment_numbers()
+            for _, path in numbered:
+                if path.suffix == ".open":
+                    self._seal_abandoned(path)
+            number = numbered[-1][0] + 1 if numbered else 1
+            path = self.log_dir / f"segment-{number:06d}.jsonl.gz.open"
+            segment = open(path, "xb")
+            if fcntl is not None:
+                fcntl.flock(segment, fcntl.LOCK_EX)
+            return path, segment
+
+    @staticmethod
+    def _seal_abandoned(path: Path) -> None:
+        """Seal an .open segment unless its writer still holds its lock."""
+        try:
+            segment = open(path, "ab")
+        except FileNotFoundError:
+            return  # sealed by its writer meanwhile
+        with segment:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError as e:
+                    if e.errno in (errno.EAGAIN, errno.EACCES):
+                        return  # live writer
+                    raise
+            _seal_path(path)
+
+    def _seal(self) -> None:
+        if self._file is not None:
+            _seal_path(self._active)  # still locked, so nobody else seals it
+            self._file.close()
+        self._active, self._file = None, None
+
+    def close(self) -> None:
+        """Write what is buffered and seal the active segment."""
+        with self._lock:
+            self._write()
+            self._seal()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Reading
+
+    def iter_records(self, latest_only: bool = False):
+        """
+        Stream records from all sealed segments, oldest first.
+
+        Args:
+            latest_only: Yield only the last record logged for each URL
+                (records without a URL are always yielded). Costs an extra
+                pass over the log that keeps only positions in memory.
+                Concurrent writers interleave segments, so "last" is by
+                logged_at, then by position.
+        """
+        segments = self.segments()
+        latest = None
+        if latest_only:
+            latest = {}
+            for segment_index, path in enumerate(segments):
+                for line_index, record in enumerate(iter_segment(path)):
+                    url = record.get("url")
+                    if url:
+                        position = (record.get("logged_at", 0), segment_index, line_index)
+                        if url not in latest or position > latest[url]:
+                            latest[url] = position
+
+        for segment_index, path in enumerate(segments):
+            for line_index, record in enumerate(iter_segment(path)):
+                url = record.get("url")
+                if latest is None or not url or latest[url][1:] == (segment_index, line_index):
+                    yield record
+
+    def map_segments(self, func, workers: int = None) -> list:
+        """
+        Apply func(records iterator) to every sealed segment in parallel.
+
+        func must be a module-level function (it is sent to worker
+        processes); its results come back in segment order, for the caller
+        to merge (e.g. summing per-segment term counts).
+        """
+        segments = self.segments()
+        if not segments:
+            return []
+        workers = min(workers or os.cpu_count() or 1, len(segments))
+        if workers == 1:
+            return [func(iter_segment(path)) for path in segments]
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=mp.get_context("spawn")) as executor:
+            return list(executor.map(_map_segment, [func] * len(segments), segments))
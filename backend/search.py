@@ -6,12 +6,19 @@ Supports multimodal search with ImageBind embeddings (text, image, video).
 """
 import time
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 import numpy as np
 from rank_bm25 import BM25Okapi
 from openai import OpenAI
 from .database import get_chromadb_client
+from .projection import distance_space, open_reduced_index
+
+if TYPE_CHECKING:
+    # Only importable with the ImageBind stack installed
+    from .media_pipeline import MediaInput
+
+REDUCED_CHECK_SECONDS = 60  # how often the reduced index's size is compared
 
 
 class HybridRecipeSearch:
@@ -67,6 +74,12 @@ class HybridRecipeSearch:
             self.collection = self.client.get_or_create_collection(
                 name=collection_name)
 
+        # Reduced-dimension index (see migrate_to_imagebind.build_reduced_index)
+        self.rerank_factor = 10
+        self._reduced_index = None
+        self._reduced_stale = False
+        self._reduced_checked = None  # time of the last staleness check
+
         # BM25 index caching
         self.bm25_index = None
         self.bm25_doc_ids = None
@@ -534,9 +547,129 @@ class HybridRecipeSearch:
 
     # ==================== ImageBind Multimodal Search Methods ====================
 
+    def _get_reduced_index(self):
+        """
+        Load the PCA projection and reduced collection, if the collection has one.
+
+        The reduced collection is only used while it holds as many vectors as
+        the full one; otherwise it is stale and queries use full vectors. The
+        counts are compared at most every REDUCED_CHECK_SECONDS, not per
+        query. BatchedChromaWriter keeps both collections in step; after
+        writing the full collection any other way, rebuild the reduced one
+        (migrate_to_imagebind.py --reduce-only), as equal counts do not
+        prove equal contents.
+
+        Returns:
+            (PCAProjection, reduced collection) or None
+        """
+        if self._reduced_index is None:
+            try:
+                self._reduced_index = open_reduced_index(self.client, self.collection) or False
+            except Exception as e:
+                print(f"⚠️  Reduced index unavailable, using full vectors: {e}")
+                self._reduced_index = False
+            if self._reduced_index:
+                projection, reduced_collection = self._reduced_index
+                print(f"📐 Using {projection.dim}-d reduced index '{reduced_collection.name}'")
+
+        if not self._reduced_index:
+            return None
+        now = time.monotonic()
+        if self._reduced_checked is None or now - self._reduced_checked >= REDUCED_CHECK_SECONDS:
+            self._reduced_checked = now
+            stale = self._reduced_index[1].count() != self.collection.count()
+            if stale != self._reduced_stale:
+                self._reduced_stale = stale
+                print("⚠️  Reduced index is stale, using full vectors" if stale
+                      else "📐 Reduced index is up to date again")
+        return None if self._reduced_stale else self._reduced_index
+
+    def _vector_query(self, embedding: list[float], top_k: int) -> dict:
+        """
+        Nearest-neighbour query by embedding.
+
+        With a reduced index, a shortlist of top_k * rerank_factor candidates is
+        retrieved in the reduced space and reranked with full-precision vectors.
+
+        Args:
+            embedding: Full-dimension query embedding
+            top_k: Number of results to return
+
+        Returns:
+            Dict with keys: ids, documents, metadatas, distances
+        """
+        reduced_index = self._get_reduced_index()
+
+        if reduced_index is None:
+            results = self.collection.query(
+                query_embeddings=[embedding],
+                n_results=top_k,
+                include=["documents", "metadatas", "distances"]
+            )
+            return {
+                'ids': results['ids'][0],
+                'documents': results['documents'][0],
+                'metadatas': results['metadatas'][0],
+                'distances': results['distances'][0]
+            }
+
+        projection, reduced_collection = reduced_index
+        shortlist = reduced_collection.query(
+            query_embeddings=projection.transform([embedding]).tolist(),
+            n_results=top_k * self.rerank_factor,
+            include=["distances"]
+        )['ids'][0]
+
+        candidates = self.collection.get(
+            ids=shortlist, include=["embeddings", "documents", "metadatas"])
+        vectors = np.asarray(candidates['embeddings'], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+
+        # Match the full collection's distance function
+        space = distance_space(self.collection)
+        if space == "cosine":
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            distances = 1 - (vectors @ query) / np.maximum(norms, 1e-12)
+        elif space == "ip":
+            distances = 1 - vectors @ query
+        else:
+            distances = np.sum((vectors - query) ** 2, axis=1)
+
+        order = np.argsort(distances)[:top_k]
+        return {
+            'ids': [candidates['ids'][i] for i in order],
+            'documents': [candidates['documents'][i] for i in order],
+            'metadatas': [candidates['metadatas'][i] for i in order],
+            'distances': [float(distances[i]) for i in order]
+        }
+
+    def _embed_media_query(self, media, kind: str) -> list[float]:
+        """
+        Embed one or several images/videos into a single query vector.
+
+        Several inputs are embedded in one batched forward pass and averaged,
+        so a handful of photos of the same dish act as one query.
+
+        Args:
+            media: A media input (path, bytes, file-like, PIL image, array) or a list
+            kind: "image" or "video"
+
+        Returns:
+            Unit-length query embedding
+        """
+        items = list(media) if isinstance(media, (list, tuple)) else [media]
+        embed = self.embedder.embed_image if kind == "image" else self.embedder.embed_video
+        vectors = embed(items)
+
+        if len(vectors) == 1:
+            return vectors[0]
+
+        combined = np.mean(vectors, axis=0)
+        return (combined / np.linalg.norm(combined)).tolist()
+
     def search_by_image(
         self,
-        image_path: str,
+        image_path: Union["MediaInput", list],
         top_k: int = 10,
     ) -> dict:
         """
@@ -545,7 +678,8 @@ class HybridRecipeSearch:
         Requires ImageBind to be enabled (use_imagebind=True in constructor).
         
         Args:
-            image_path: Path to query image file
+            image_path: Query image as a path, bytes, file-like object, PIL image
+                or HxWxC array - or a list of these, embedded as one batch
             top_k: Number of results to return
         
         Returns:
@@ -554,6 +688,7 @@ class HybridRecipeSearch:
         Example:
             >>> searcher = HybridRecipeSearch(collection_name="recipes_imagebind", use_imagebind=True)
             >>> results = searcher.search_by_image("pasta_photo.jpg", top_k=5)
+            >>> results = searcher.search_by_image(uploaded_file.getvalue())
         """
         if not self.use_imagebind or self.embedder is None:
             raise ValueError(
@@ -561,30 +696,22 @@ class HybridRecipeSearch:
                 "and ensure you're using an ImageBind-embedded collection."
             )
         
-        print(f"🖼️  Searching by image: {image_path}")
+        from .media_pipeline import describe_media
+        print(f"🖼️  Searching by image: {describe_media(image_path)}")
         
         # Generate image embedding
-        image_embedding = self.embedder.embed_image([image_path])[0]
+        image_embedding = self._embed_media_query(image_path, "image")
         
         # Query ChromaDB with the image embedding
-        results = self.collection.query(
-            query_embeddings=[image_embedding],
-            n_results=top_k,
-            include=["documents", "metadatas", "distances"]
-        )
+        results = self._vector_query(image_embedding, top_k)
         
-        print(f"✅ Found {len(results['ids'][0])} results")
+        print(f"✅ Found {len(results['ids'])} results")
         
-        return {
-            'ids': results['ids'][0],
-            'documents': results['documents'][0],
-            'metadatas': results['metadatas'][0],
-            'distances': results['distances'][0]
-        }
+        return results
 
     def search_by_video(
         self,
-        video_path: str,
+        video_path: Union["MediaInput", list],
         top_k: int = 10,
     ) -> dict:
         """
@@ -593,7 +720,8 @@ class HybridRecipeSearch:
         Requires ImageBind to be enabled (use_imagebind=True in constructor).
         
         Args:
-            video_path: Path to query video file
+            video_path: Query video as a path, bytes, file-like object or
+                TxHxWxC frame array - or a list of these
             top_k: Number of results to return
         
         Returns:
@@ -609,32 +737,24 @@ class HybridRecipeSearch:
                 "and ensure you're using an ImageBind-embedded collection."
             )
         
-        print(f"🎬 Searching by video: {video_path}")
+        from .media_pipeline import describe_media
+        print(f"🎬 Searching by video: {describe_media(video_path)}")
         
         # Generate video embedding
-        video_embedding = self.embedder.embed_video([video_path])[0]
+        video_embedding = self._embed_media_query(video_path, "video")
         
         # Query ChromaDB with the video embedding
-        results = self.collection.query(
-            query_embeddings=[video_embedding],
-            n_results=top_k,
-            include=["documents", "metadatas", "distances"]
-        )
+        results = self._vector_query(video_embedding, top_k)
         
-        print(f"✅ Found {len(results['ids'][0])} results")
+        print(f"✅ Found {len(results['ids'])} results")
         
-        return {
-            'ids': results['ids'][0],
-            'documents': results['documents'][0],
-            'metadatas': results['metadatas'][0],
-            'distances': results['distances'][0]
-        }
+        return results
 
     def multimodal_search(
         self,
         query_text: Optional[str] = None,
-        image_path: Optional[str] = None,
-        video_path: Optional[str] = None,
+        image_path: Optional[Union["MediaInput", list]] = None,
+        video_path: Optional[Union["MediaInput", list]] = None,
         top_k: int = 10,
         text_weight: float = 0.5,
         image_weight: float = 0.5,
@@ -649,8 +769,8 @@ class HybridRecipeSearch:
         
         Args:
             query_text: Optional text query
-            image_path: Optional path to query image
-            video_path: Optional path to query video
+            image_path: Optional query image(s): path, bytes, file-like, PIL image or array
+            video_path: Optional query video(s): path, bytes, file-like or frame array
             top_k: Number of results to return
             text_weight: Weight for text embedding (0-1)
             image_weight: Weight for image embedding (0-1)
@@ -675,7 +795,7 @@ class HybridRecipeSearch:
                 "and ensure you're using an ImageBind-embedded collection."
             )
         
-        if not any([query_text, image_path, video_path]):
+        if not query_text and image_path is None and video_path is None:
             raise ValueError("At least one of query_text, image_path, or video_path must be provided")
         
         embeddings = []
@@ -688,14 +808,14 @@ class HybridRecipeSearch:
             weights.append(text_weight)
             modalities_used.append("text")
         
-        if image_path:
-            img_emb = self.embedder.embed_image([image_path])[0]
+        if image_path is not None:
+            img_emb = self._embed_media_query(image_path, "image")
             embeddings.append(img_emb)
             weights.append(image_weight)
             modalities_used.append("image")
         
-        if video_path:
-            vid_emb = self.embedder.embed_video([video_path])[0]
+        if video_path is not None:
+            vid_emb = self._embed_media_query(video_path, "video")
             embeddings.append(vid_emb)
             weights.append(video_weight)
             modalities_used.append("video")
@@ -708,24 +828,15 @@ class HybridRecipeSearch:
         combined = combined / np.linalg.norm(combined)
         
         # Query ChromaDB
-        results = self.collection.query(
-            query_embeddings=[combined.tolist()],
-            n_results=top_k,
-            include=["documents", "metadatas", "distances"]
-        )
+        results = self._vector_query(combined.tolist(), top_k)
         
-        print(f"✅ Found {len(results['ids'][0])} results")
+        print(f"✅ Found {len(results['ids'])} results")
         
-        return {
-            'ids': results['ids'][0],
-            'documents': results['documents'][0],
-            'metadatas': results['metadatas'][0],
-            'distances': results['distances'][0]
-        }
+        return results
 
     def search_by_image_and_generate(
         self,
-        image_path: str,
+        image_path: Union["MediaInput", list],
         query_text: Optional[str] = None,
         top_k: int = 5,
         model: str = "gpt-4o-mini",
@@ -736,7 +847,7 @@ class HybridRecipeSearch:
         Search by image and generate a response using LLM.
         
         Args:
-            image_path: Path to query image
+            image_path: Query image(s), as accepted by search_by_image()
             query_text: Optional additional text query/context
             top_k: Number of context chunks to retrieve
             model: OpenAI model to use
@@ -850,7 +961,7 @@ def quick_ask(query: str, top_k: int = 10) -> str:
 # ==================== ImageBind Convenience Functions ====================
 
 def quick_image_search(
-    image_path: str,
+    image_path: Union["MediaInput", list],
     top_k: int = 5,
     collection_name: str = "recipes_imagebind"
 ) -> dict:
@@ -858,7 +969,7 @@ def quick_image_search(
     Quick image search using ImageBind embeddings.
 
     Args:
-        image_path: Path to query image
+        image_path: Query image(s), as accepted by search_by_image()
         top_k: Number of results
         collection_name: Name of ImageBind-embedded collection
 
@@ -874,7 +985,7 @@ def quick_image_search(
 
 def quick_multimodal_search(
     query_text: str = None,
-    image_path: str = None,
+    image_path: Union["MediaInput", list] = None,
     top_k: int = 5,
     collection_name: str = "recipes_imagebind"
 ) -> dict:
@@ -883,7 +994,7 @@ def quick_multimodal_search(
 
     Args:
         query_text: Optional text query
-        image_path: Optional image path
+        image_path: Optional query image(s), as accepted by search_by_image()
         top_k: Number of results
         collection_name: Name of ImageBind-embedded collection
 
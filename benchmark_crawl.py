@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark crawling, parsing and extraction offline, against recorded pages.
+
+Pages recorded from the live site are replayed by a local FixtureServer
+with configurable latency, error rate and robots.txt. Reports:
+1. Crawl throughput (pages/s) of the sequential and the async crawler
+2. Parse time (ms/page) of crawler pages and extraction success rate
+3. Optionally, per-stage throughput of the streaming ingestion pipeline
+   (fetch -> extract -> transform; nothing is written to Chroma)
+
+Usage:
+    python benchmark_crawl.py --record https://www.allrecipes.com/recipes/ --max-pages 100
+    python benchmark_crawl.py                                  # replay data/fixtures/archive
+    python benchmark_crawl.py --latency 0.1 --jitter 0.05 --error-rate 0.02 --pipeline
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from scraper.AllRecipesWebCrawler import AllRecipesCrawler
+from scraper.RecipeTransformer import RecipeTransformer
+from scraper.WebScraper import WebScraper
+from scraper.fixtures import DEFAULT_ARCHIVE_DIR, FixtureArchive, FixtureServer, record_site
+from scraper.robots import RobotsCache
+
+REQUIRED_CHUNKS = {"title", "ingredients", "directions"}
+
+
+def make_crawler(args):
+    # No disk cache: every page must come from the fixture server
+    return AllRecipesCrawler(delay=args.delay, http_cache=False, keep_text=False)
+
+
+def bench_crawl(label, crawl, server, max_pages):
+    """Run one crawl against the server and print its throughput."""
+    requests_before, errors_before = server.requests, server.errors
+    start = time.perf_counter()
+    pages = crawl()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<34} {len(pages) / elapsed:8.1f} pages/s  "
+          f"({len(pages)}/{max_pages} pages in {elapsed:.1f}s, "
+          f"{server.requests - requests_before} requests, "
+          f"{server.errors - errors_before} injected errors)")
+    return pages
+
+
+def bench_parsing(archive, crawler, scraper):
+    """Parse ms/page over archived pages and extraction success on recipe pages."""
+    pages = []
+    for url in archive.urls():
+        status, content_type, body = archive.get(url)
+        if status == 200 and content_type.startswith("text/html"):
+            pages.append((url, body.decode("utf-8", errors="replace")))
+    if not pages:
+        return
+
+    start = time.perf_counter()
+    for url, html in pages:
+        crawler.parse_page(url, html)
+    parse_ms = (time.perf_counter() - start) / len(pages) * 1000
+
+    recipes = [(url, html) for url, html in pages if crawler.is_valid_link(url, url)]
+    succeeded, extract_seconds = 0, 0.0
+    for url, html in recipes:
+        start = time.perf_counter()
+        try:
+            chunks = scraper.extract_from_html(html)
+        except Exception:
+            chunks = []
+        extract_seconds += time.perf_counter() - start
+        if REQUIRED_CHUNKS <= {chunk["metadata"]["type"] for chunk in chunks}:
+            succeeded += 1
+
+    print(f"   crawler parse                      {parse_ms:8.2f} ms/page  ({len(pages)} pages)")
+    if recipes:
+        print(f"   recipe extraction                  "
+              f"{extract_seconds / len(recipes) * 1000:8.2f} ms/page  "
+              f"({succeeded}/{len(recipes)} succeeded, {succeeded / len(recipes):.0%})")
+
+
+def bench_pipeline(args, server, seed_url):
+    """Fetch -> extract -> transform over the server, with per-stage stats."""
+    from backend.pipeline import CrawlSource, Pipeline, Stage
+
+    crawler = make_crawler(args)
+    scraper = WebScraper(http_cache=False)
+    source = CrawlSource(crawler, seed_url, args.max_pages)
+
+    def fetch(url):
+        result, retry = None, False
+        try:
+            result, retry = crawler.fetch_page(url, keep_html=crawler.is_valid_link(url, url))
+        finally:
+            source.finish(url, result, retry)
+        if result and 'html' in result:
+            yield url, result
+
+    def extract(page):
+        url, info = page
+        yield url, scraper.extract_from_html(info.pop('html'))
+
+    def transform(recipe):
+        url, raw_recipe_data = recipe
+        RecipeTransformer(raw_recipe_data, source_url=url).transform_for_chroma()
+        return ()
+
+    pipeline = Pipeline([
+        Stage("fetch", fetch, workers=args.concurrency),
+        Stage("extract", extract, workers=2),
+        Stage("transform", transform, workers=1),
+    ])
+    pipeline.run(source)
+    pipeline.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawling against recorded pages")
+    parser.add_argument("--archive", type=Path, default=DEFAULT_ARCHIVE_DIR,
+                        help="Fixture archive directory")
+    parser.add_argument("--record", metavar="SEED_URL",
+                        help="Crawl the live site from this URL into the archive first")
+    parser.add_argument("--seed", help="Seed URL (default: first archived page)")
+    parser.add_argument("--max-pages", type=int, default=50, help="Pages per crawl")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds the server waits before each response")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Extra random latency of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of page requests answered with 503")
+    parser.add_argument("--robots", type=Path,
+                        help="robots.txt to serve instead of the archived one")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Crawler delay between requests")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Async crawler / pipeline fetch concurrency")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Also benchmark the streaming ingestion pipeline")
+    args = parser.parse_args()
+
+    archive = FixtureArchive(args.archive)
+    if args.record:
+        record_site(AllRecipesCrawler(), args.record, max_pages=args.max_pages, archive=archive)
+
+    page_urls = [url for url in archive.urls() if not url.endswith("/robots.txt")]
+    if not page_urls:
+        print(f"No pages in {args.archive}; record some with --record SEED_URL")
+        return 1
+    seed_url = args.seed or page_urls[0]
+
+    robots_txt = args.robots.read_text() if args.robots else None
+    with FixtureServer(archive, latency=args.latency, jitter=args.jitter,
+                       error_rate=args.error_rate, robots_txt=robots_txt, seed=0) as server:
+        print(f"📄 {len(page_urls)} archived pages served at {server.base_url} "
+              f"(latency {args.latency}s ± {args.jitter}s, error rate {args.error_rate:.0%})\n")
+        local_seed = server.url(seed_url)
+        # Ports are reused between runs; don't trust an earlier run's robots.txt
+        RobotsCache.shared().invalidate(server.base_url)
+
+        print("Crawl:")
+        bench_crawl("WebCrawler.crawl (sequential)",
+                    lambda: make_crawler(args).crawl(local_seed, max_pages=args.max_pages),
+                    server, args.max_pages)
+        bench_crawl(f"WebCrawler.crawl_async ({args.concurrency})",
+                    lambda: make_crawler(args).crawl_async(
+                        local_seed, max_pages=args.max_pages, concurrency=args.concurrency),
+                    server, args.max_pages)
+
+        print("\nParse and extract:")
+        bench_parsing(archive, make_crawler(args), WebScraper(http_cache=False))
+
+        if args.pipeline:
+            print("\nIngestion pipeline:")
+            bench_pipeline(args, server, local_seed)
+
+        print(f"\nServer: {server.requests} requests, {server.errors} injected errors, "
+              f"{server.misses} pages not archived")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
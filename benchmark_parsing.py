@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML parsing: full html.parser trees vs. lxml partial parsing.
+
+Compares, on saved fixture pages:
+1. Crawler: full parse + text + links  vs. links-only partial parse
+2. Scraper: full parse + extract_data  vs. strained parse / JSON-LD fast path
+
+Usage:
+    python benchmark_parsing.py                       # pages in data/fixtures/pages
+    python benchmark_parsing.py --fetch URL [URL ...] # save pages first
+    python benchmark_parsing.py --pages DIR --repeat 5
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bs4 import BeautifulSoup
+
+from scraper.AllRecipesWebCrawler import AllRecipesCrawler
+from scraper.WebScraper import WebScraper
+from scraper.parsing import HTML_PARSER
+
+DEFAULT_PAGES_DIR = Path(__file__).parent / "data" / "fixtures" / "pages"
+
+
+def fetch_pages(urls, pages_dir):
+    """Download pages into the fixture directory."""
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    scraper = WebScraper()
+    for i, url in enumerate(urls):
+        response = scraper.get(url)
+        path = pages_dir / f"page_{i:03d}.html"
+        path.write_text(response.text, encoding="utf-8")
+        print(f"💾 {url} -> {path.name} ({len(response.text):,} chars)")
+        time.sleep(scraper.delay)
+
+
+def load_pages(pages_dir):
+    """Load (name, url, html) fixtures; the URL is only used to resolve links."""
+    pages = []
+    for path in sorted(pages_dir.glob("*.html")):
+        pages.append((path.name, f"https://www.allrecipes.com/{path.stem}",
+                      path.read_text(encoding="utf-8")))
+    return pages
+
+
+def old_crawl_parse(crawler, url, html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'title': crawler.get_title(url, soup),
+        'text': crawler.extract_text(soup),
+        'links': crawler.extract_links(soup, url),
+    }
+
+
+def old_extract(scraper, html):
+    return scraper.extract_data(BeautifulSoup(html, 'html.parser'))
+
+
+def try_extract(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        return f"error: {e}"
+
+
+def bench(label, func, pages, repeat):
+    """Time func over all pages; returns results of the last round."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(page) for page in pages]
+    elapsed = time.perf_counter() - start
+    rate = len(pages) * repeat / elapsed
+    print(f"   {label:<38} {rate:8.1f} pages/s  ({elapsed / repeat * 1000:7.1f} ms/round)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parsing paths")
+    parser.add_argument("--pages", type=Path, default=DEFAULT_PAGES_DIR,
+                        help="Directory of saved .html pages")
+    parser.add_argument("--fetch", nargs="+", metavar="URL",
+                        help="Download these pages into --pages first")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Rounds over the page set")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_pages(args.fetch, args.pages)
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"No .html pages in {args.pages}; save some with --fetch URL ...")
+        return 1
+    print(f"📄 {len(pages)} pages, {sum(len(p[2]) for p in pages) / 1e6:.1f} MB, "
+          f"fast parser: {HTML_PARSER}\n")
+
+    full_crawler = AllRecipesCrawler(http_cache=None)
+    links_crawler = AllRecipesCrawler(http_cache=None, keep_text=False)
+    scraper = WebScraper(http_cache=None)
+
+    print("Crawler (title + links):")
+    old = bench("html.parser, full tree + text", lambda p: old_crawl_parse(full_crawler, p[1], p[2]),
+                pages, args.repeat)
+    new = bench(f"{HTML_PARSER}, links only", lambda p: links_crawler.parse_page(p[1], p[2]),
+                pages, args.repeat)
+    same_links = sum(o['links'] == n['links'] and o['title'] == n['title']
+                     for o, n in zip(old, new))
+    print(f"   identical title/links: {same_links}/{len(pages)}\n")
+
+    print("Scraper (recipe chunks):")
+    old = bench("html.parser, full tree", lambda p: try_extract(old_extract, scraper, p[2]),
+                pages, args.repeat)
+    strained = bench(f"{HTML_PARSER}, recipe sections only",
+                     lambda p: try_extract(lambda h: scraper.extract_data(scraper.parse(h)), p[2]),
+                     pages, args.repeat)
+    bench("JSON-LD fast path (DOM fallback)",
+          lambda p: try_extract(scraper.extract_from_html, p[2]), pages, args.repeat)
+    same_chunks = sum(o == s for o, s in zip(old, strained))
+    print(f"   identical DOM chunks: {same_chunks}/{len(pages)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
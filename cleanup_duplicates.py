@@ -9,12 +9,20 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from backend.database import get_chromadb_client
-from scraper.utils import save_seen_urls
+from scraper.utils import open_seen_store
+
+
+def save_seen_dishes(dishes, sources):
+    """Record dishes in the seen store: by source URL where known, else by title."""
+    seen = open_seen_store()
+    seen.add_many((url, title, None) for url, title in sources.items())
+    seen.add_titles(dishes - set(sources.values()))
+    seen.close()
 
 
 def cleanup_duplicates():
     """
-    Main function to clean up duplicates and populate seen_recipes.json.
+    Main function to clean up duplicates and populate the seen store.
     """
     
     # Step 1: Connect to ChromaDB
@@ -65,8 +73,9 @@ def cleanup_duplicates():
     # Value: list of IDs that share this content
     content_map = defaultdict(list)
     
-    # Track dishes for seen_recipes.json
+    # Track dishes (and their source pages, when recorded) for the seen store
     dishes = set()
+    sources = {}
     
     # Iterate through each chunk
     for i, doc_id in enumerate(all_ids):
@@ -80,6 +89,8 @@ def cleanup_duplicates():
         # If chunk is a title and the dish is not in the set, add it to the set
         if metadata['type'] == 'title' and metadata['recipe'] not in dishes:
             dishes.add(metadata['recipe'])
+        if metadata['type'] == 'title' and metadata.get('source_url'):
+            sources[metadata['source_url']] = metadata['recipe']
         
         # Create a unique and deterministic hash for this content
         # Format: "recipe_name:chunk_type:actual_content"
@@ -124,10 +135,10 @@ def cleanup_duplicates():
     if len(duplicate_ids) == 0:
         print("\nNo duplicates found.")
         
-        # Still dishes seen to seen_recipes.json
+        # Still save seen dishes to the seen store
         if dishes:
-            print(f"\nSaving {len(dishes)} seen dishes to seen_recipes.json...")
-            save_seen_urls(dishes)
+            print(f"\nSaving {len(dishes)} seen dishes to the seen store...")
+            save_seen_dishes(dishes, sources)
         
         return
     
@@ -181,10 +192,10 @@ def cleanup_duplicates():
     print(f"  Success rate:   {removed_count / len(duplicate_ids) * 100:.1f}%")
     print("=" * 70)
     
-    # Step 11: Save seen dishes to seen_recipes.json
+    # Step 11: Save seen dishes to the seen store
     if dishes:
-        print(f"\nSaving {len(dishes)} source seen dishes to seen_recipes.json...")
-        save_seen_urls(dishes)
+        print(f"\nSaving {len(dishes)} source seen dishes to the seen store...")
+        save_seen_dishes(dishes, sources)
         print(f"Seen dishes saved successfully!")
     else:
         print(f"\nNo source seen dishes found in metadata.")
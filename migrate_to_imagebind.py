@@ -6,9 +6,14 @@ This script:
 2. Creates a new 'recipes_imagebind' collection with ImageBind embeddings
 3. Re-embeds and inserts documents in batches
 4. Verifies migration was successful
+5. Optionally fits a PCA projection and stores a reduced copy of every
+   embedding for fast candidate generation
 
 Usage:
     python migrate_to_imagebind.py
+    python migrate_to_imagebind.py --workers 8   # re-embed with 8 processes
+    python migrate_to_imagebind.py --pca-dim 256 # also build the reduced index
+    python migrate_to_imagebind.py --reduce-only --pca-dim 256
 """
 import sys
 from pathlib import Path
@@ -18,12 +23,17 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.database import get_chromadb_client
 from backend.imagebind_embeddings import ImageBindEmbedder, ImageBindEmbeddingFunction
+from backend.embedding_pool import EmbeddingWorkerPool
+from backend.projection import PCAProjection, distance_space
+
+import numpy as np
 
 
 def migrate_to_imagebind(
     old_collection_name: str = "recipes",
     new_collection_name: str = "recipes_imagebind",
-    batch_size: int = 32
+    batch_size: int = 32,
+    workers: int = 1
 ):
     """
     Migrate existing ChromaDB data to use ImageBind embeddings.
@@ -32,12 +42,13 @@ def migrate_to_imagebind(
         old_collection_name: Name of existing collection to migrate from
         new_collection_name: Name of new collection to create
         batch_size: Number of documents to process at once
+        workers: Number of embedding worker processes (1 = embed in this process)
     """
     
     # Initialize
     client = get_chromadb_client()
-    embedder = ImageBindEmbedder()
-    embedding_fn = ImageBindEmbeddingFunction(embedder)
+    # The model is loaded lazily: with workers > 1 only the pool loads it
+    embedding_fn = ImageBindEmbeddingFunction()
     
     # Step 1: Export from old collection
     print(f"📤 Exporting data from '{old_collection_name}' collection...")
@@ -83,30 +94,44 @@ def migrate_to_imagebind(
     print(f"🔄 Migrating {total_docs} documents in batches of {batch_size}...")
     
     failed_batches = []
+    batch_starts = range(0, total_docs, batch_size)
+    doc_batches = (all_data["documents"][i:i + batch_size] for i in batch_starts)
     
-    for i in range(0, total_docs, batch_size):
-        batch_end = min(i + batch_size, total_docs)
-        
-        batch_ids = all_data["ids"][i:batch_end]
-        batch_docs = all_data["documents"][i:batch_end]
-        batch_meta = all_data["metadatas"][i:batch_end]
-        
-        try:
-            # Generate embeddings explicitly
-            batch_embeddings = embedder.embed_text(batch_docs)
-            
-            new_collection.add(
-                ids=batch_ids,
-                documents=batch_docs,
-                metadatas=batch_meta,
-                embeddings=batch_embeddings
-            )
+    if workers > 1:
+        pool = EmbeddingWorkerPool(num_workers=workers)
+        embedded_batches = pool.imap_text(doc_batches, return_exceptions=True)
+    else:
+        pool = None
+        embedded_batches = (
+            _embed_or_error(embedding_fn.embedder, docs) for docs in doc_batches)
+    
+    try:
+        for i, batch_embeddings in zip(batch_starts, embedded_batches):
+            batch_end = min(i + batch_size, total_docs)
             
-            print(f"   ✅ Migrated {batch_end}/{total_docs} documents")
+            batch_ids = all_data["ids"][i:batch_end]
+            batch_docs = all_data["documents"][i:batch_end]
+            batch_meta = all_data["metadatas"][i:batch_end]
             
-        except Exception as e:
-            print(f"   ❌ Error in batch {i}-{batch_end}: {e}")
-            failed_batches.append((i, batch_end))
+            try:
+                if isinstance(batch_embeddings, Exception):
+                    raise batch_embeddings
+                
+                new_collection.add(
+                    ids=batch_ids,
+                    documents=batch_docs,
+                    metadatas=batch_meta,
+                    embeddings=batch_embeddings
+                )
+                
+                print(f"   ✅ Migrated {batch_end}/{total_docs} documents")
+                
+            except Exception as e:
+                print(f"   ❌ Error in batch {i}-{batch_end}: {e}")
+                failed_batches.append((i, batch_end))
+    finally:
+        if pool is not None:
+            pool.close()
     
     if failed_batches:
         print(f"\n⚠️  {len(failed_batches)} batches failed. You may need to retry.")
@@ -117,7 +142,15 @@ def migrate_to_imagebind(
     print("✅ Migration complete! Verifying...")
     print("="*60)
     
-    return verify_migration(old_collection, new_collection, embedder)
+    return verify_migration(old_collection, new_collection, embedding_fn.embedder)
+
+
+def _embed_or_error(embedder: ImageBindEmbedder, docs: list[str]):
+    """Embed a batch in-process, returning the exception instead of raising."""
+    try:
+        return embedder.embed_text(docs)
+    except Exception as e:
+        return e
 
 
 def verify_migration(old_collection, new_collection, embedder: ImageBindEmbedder) -> bool:
@@ -187,6 +220,88 @@ def verify_migration(old_collection, new_collection, embedder: ImageBindEmbedder
     return True
 
 
+def build_reduced_index(
+    collection_name: str = "recipes_imagebind",
+    dim: int = 256,
+    batch_size: int = 300,
+    max_fit_vectors: int = 50000
+) -> bool:
+    """
+    Fit a PCA projection on a collection and store reduced copies of its vectors.
+
+    The reduced vectors go to '<collection>_pca<dim>' (same ids), and the full
+    collection's metadata records the reduced collection and projection
+    version, which HybridRecipeSearch picks up automatically.
+
+    Args:
+        collection_name: ImageBind collection holding full 1024-d vectors
+        dim: Reduced dimension (128-256 recommended)
+        batch_size: Items per Chroma read/write (ChromaDB limit is ~300)
+        max_fit_vectors: Maximum number of vectors used to fit the projection
+
+    Returns:
+        True if the reduced index was built
+    """
+    client = get_chromadb_client()
+    collection = client.get_collection(collection_name)
+    total = collection.count()
+
+    print(f"📐 Reading {total} embeddings from '{collection_name}'...")
+    ids = []
+    vectors = []
+    for offset in range(0, total, batch_size):
+        batch = collection.get(
+            limit=batch_size, offset=offset, include=["embeddings"])
+        ids.extend(batch["ids"])
+        vectors.append(np.asarray(batch["embeddings"], dtype=np.float32))
+
+    if not ids:
+        print("❌ Collection is empty. Nothing to project.")
+        return False
+    vectors = np.concatenate(vectors)
+
+    rng = np.random.default_rng(0)
+    fit_rows = rng.choice(len(vectors), min(len(vectors), max_fit_vectors), replace=False)
+    projection = PCAProjection.fit(vectors[fit_rows], dim=dim)
+    projection_path = projection.save(collection_name)
+    print(f"   Fitted {dim}-d projection v{projection.version} -> {projection_path}")
+
+    reduced_name = f"{collection_name}_pca{dim}"
+    try:
+        client.delete_collection(reduced_name)
+    except Exception:
+        pass
+    reduced_collection = client.create_collection(
+        name=reduced_name,
+        metadata={
+            "projection_version": projection.version,
+            "embedding_dim": str(dim),
+            "reduced_from": collection_name
+        }
+    )
+
+    reduced = projection.transform(vectors)
+    for start in range(0, len(ids), batch_size):
+        reduced_collection.add(
+            ids=ids[start:start + batch_size],
+            embeddings=reduced[start:start + batch_size].tolist()
+        )
+    print(f"   ✅ Stored {len(ids)} reduced vectors in '{reduced_name}'")
+
+    # Point the full collection at its reduced index. modify() rejects
+    # 'hnsw:*' keys, so the distance function is kept as 'distance_space'
+    metadata = {key: value for key, value in (collection.metadata or {}).items()
+                if not key.startswith("hnsw:")}
+    metadata.update({
+        "distance_space": distance_space(collection),
+        "reduced_collection": reduced_name,
+        "projection_file": projection_path.name,
+        "projection_version": projection.version
+    })
+    collection.modify(metadata=metadata)
+    return True
+
+
 def show_collection_info():
     """Show information about existing collections."""
     client = get_chromadb_client()
@@ -208,12 +323,20 @@ if __name__ == "__main__":
     parser.add_argument("--old", default="recipes", help="Old collection name")
     parser.add_argument("--new", default="recipes_imagebind", help="New collection name")
     parser.add_argument("--batch-size", type=int, default=32, help="Batch size for migration")
+    parser.add_argument("--workers", type=int, default=1, help="Embedding worker processes")
+    parser.add_argument("--pca-dim", type=int, default=0,
+                        help="Also build a PCA-reduced index of this dimension (e.g. 256)")
+    parser.add_argument("--reduce-only", action="store_true",
+                        help="Only (re)build the reduced index of --new")
     parser.add_argument("--info", action="store_true", help="Show collection info only")
     
     args = parser.parse_args()
     
     if args.info:
         show_collection_info()
+    elif args.reduce_only:
+        if not build_reduced_index(args.new, dim=args.pca_dim or 256):
+            sys.exit(1)
     else:
         print("="*60)
         print("  ImageBind Migration Script")
@@ -224,9 +347,13 @@ if __name__ == "__main__":
         success = migrate_to_imagebind(
             old_collection_name=args.old,
             new_collection_name=args.new,
-            batch_size=args.batch_size
+            batch_size=args.batch_size,
+            workers=args.workers
         )
         
+        if success and args.pca_dim:
+            success = build_reduced_index(args.new, dim=args.pca_dim)
+        
         if success:
             print("\n✅ Migration successful!")
         else:
@@ -2,6 +2,12 @@ from scraper.WebCrawler import WebCrawler
 from bs4 import BeautifulSoup
 
 
+def is_recipe_url(url: str) -> bool:
+    """True for recipe (leaf) pages, as opposed to category hubs."""
+    url = url.lower()
+    return "/recipe/" in url or "-recipe-" in url
+
+
 class AllRecipesCrawler(WebCrawler):
     """
     A specialised crawler for AllRecipes.com that only follows 
@@ -18,7 +24,7 @@ class AllRecipesCrawler(WebCrawler):
             return False
 
         # Then, add our custom site-specific filter
-        return "/recipe/" in href.lower() or "-recipe-" in href.lower()
+        return is_recipe_url(href)
 
     def get_title(self, url: str, soup: BeautifulSoup) -> str:
         """
@@ -27,3 +33,9 @@ class AllRecipesCrawler(WebCrawler):
         """
         title = super().get_title(url, soup)
         return title.replace(" Recipe", "").strip()
+
+    def url_priority(self, url: str) -> int:
+        """
+        OVERRIDE: Fetch recipe pages before hub/category pages.
+        """
+        return 10 if is_recipe_url(url) else 0
@@ -0,0 +1,163 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+from scraper.frontier import MemoryFrontier
+from scraper.politeness import DomainThrottle
+from scraper.urls import canonicalize_url
+from scraper.WebCrawler import WebCrawler
+
+
+class AsyncCrawler:
+    """
+    Concurrent asyncio crawler driving any WebCrawler's hooks.
+
+    Many requests stay in flight across domains while a per-domain
+    DomainThrottle enforces politeness (robots.txt Crawl-delay included)
+    and backs off on 429/5xx responses. Fetching and parsing run on a
+    thread pool through the wrapped crawler (one session per thread), so
+    subclasses such as AllRecipesCrawler work unchanged. Frontier and skip()
+    calls, which may hit SQLite, run off the event loop too.
+
+    Usage:
+        crawler = AllRecipesCrawler(delay=0.8)
+        data = asyncio.run(AsyncCrawler(crawler, concurrency=16).crawl(url, max_pages=100))
+        # or simply: crawler.crawl_async(url, max_pages=100)
+    """
+
+    def __init__(self, crawler: WebCrawler, concurrency: int = 16, burst: int = 1) -> None:
+        """
+        Args:
+            crawler: Crawler providing fetch, robots and parsing hooks
+            concurrency: Maximum number of requests in flight
+            burst: Requests a single domain may receive back-to-back
+        """
+        self.crawler = crawler
+        self.concurrency = concurrency
+        self.throttle = DomainThrottle(delay=crawler.delay, burst=burst)
+
+    async def _run(self, func, *args):
+        """Run a blocking crawler call on the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def fetch_page(self, url: str, keep_html: bool = False) -> tuple[dict | None, bool]:
+        """
+        Fetch and parse one page, honoring robots.txt and the domain's pace.
+
+        With keep_html, the raw body is kept under 'html' (see WebCrawler.crawl_page).
+
+        Returns:
+            (page data or None, whether the URL should be retried)
+        """
+        crawler = self.crawler
+        domain = crawler.get_domain(url)
+
+        if not await self._run(crawler.can_fetch, url):
+            print(f"[robots.txt blocked] {url}")
+            return None, False
+        self.throttle.set_crawl_delay(domain, await self._run(crawler.crawl_delay, url))
+
+        if not crawler.offline:
+            await self.throttle.acquire(domain)
+        try:
+            response = await self._run(crawler.get, url)
+        except Exception as e:
+            print(f"[Error] {url}: {e}")
+            self.throttle.record(domain, None)
+            return None, True
+
+        self.throttle.record(domain, response.status_code,
+                             response.headers.get("Retry-After"))
+        if response.status_code != 200:
+            print(f"[HTTP {response.status_code}] {url}")
+            retry = response.status_code == 429 or response.status_code >= 500
+            return None, retry
+
+        try:
+            return await self._run(crawler.parse_page, url, response.text, keep_html), False
+        except Exception as e:
+            print(f"[Error] {url}: {e}")
+            return None, False
+
+    async def crawl(self, seed_url: str, max_pages: int = 20, keep_html=None,
+                    frontier=None, sitemaps: bool = False, skip=None) -> dict[str, dict]:
+        """
+        Crawl from seed_url, discovering links in (roughly) BFS order.
+
+        Args:
+            seed_url: Starting URL
+            max_pages: Maximum number of pages to crawl
+            keep_html: Optional predicate url -> bool, as in WebCrawler.crawl()
+            frontier: Optional frontier to resume from, as in WebCrawler.crawl()
+            sitemaps: Also queue URLs from the site's sitemaps, as in WebCrawler.crawl()
+            skip: Optional predicate url -> bool of URLs not to fetch, as in WebCrawler.crawl()
+
+        Returns:
+            Dictionary mapping URL -> page data
+        """
+        crawler = self.crawler
+        crawled = {}
+        if frontier is None:
+            frontier = MemoryFrontier()
+        seed_url = canonicalize_url(seed_url)
+        frontier.add(seed_url, crawler.url_priority(seed_url))
+        in_flight = 0
+        changed = asyncio.Condition()
+        pbar = tqdm(total=max_pages, desc="Crawling")
+
+        # Frontier and skip() calls may hit SQLite, so they run on threads
+        def next_url():
+            url = frontier.pop()
+            while url is not None and skip and url != seed_url and skip(url):
+                frontier.mark_done(url)
+                url = frontier.pop()
+            return url
+
+        def record_page(url, result):
+            frontier.mark_done(url)
+            frontier.add_many([(link, crawler.url_priority(link)) for link in result['links']])
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    # Wait for work; stop once the budget is met or nothing is left
+                    while True:
+                        if len(crawled) >= max_pages:
+                            changed.notify_all()
+                            return
+                        url = None
+                        if len(crawled) + in_flight < max_pages:
+                            url = await asyncio.to_thread(next_url)
+                        if url is not None:
+                            in_flight += 1
+                            break
+                        if not in_flight:
+                            changed.notify_all()
+                            return
+                        await changed.wait()
+
+                result, retry = await self.fetch_page(
+                    url, keep_html=bool(keep_html and keep_html(url)))
+
+                async with changed:
+                    in_flight -= 1
+                    if result:
+                        crawled[url] = result
+                        pbar.update(1)
+                        pbar.set_description(f"Crawling: {result['title'][:25]}...")
+                        await asyncio.to_thread(record_page, url, result)
+                    else:
+                        await asyncio.to_thread(frontier.mark_failed, url, retry=retry)
+                    changed.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as self._executor:
+            if sitemaps:
+                await self._run(crawler.seed_from_sitemaps, seed_url, frontier, max_pages)
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        pbar.close()
+        print(f"\nCrawled {len(crawled)} pages!")
+        return crawled
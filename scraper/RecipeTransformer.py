@@ -1,31 +1,69 @@
-import uuid
+import hashlib
+import json
+
+from scraper.urls import canonicalize_url
 
 
 class RecipeTransformer:
-    def __init__(self, recipe_data: list):
+    def __init__(self, recipe_data: list, source_url: str = None):
+        """
+        Args:
+            recipe_data: Chunk list from WebScraper.extract_data/extract_from_html
+            source_url: Page the recipe came from; its canonical form keys
+                the chunk IDs (the recipe name is used when it is missing)
+        """
         self.data = recipe_data
+        self.source_url = canonicalize_url(source_url) if source_url else None
+
+    def recipe_key(self) -> str:
+        """Stable key of the recipe: a hash of its URL, else its name slug."""
+        if self.source_url:
+            return hashlib.sha1(self.source_url.encode()).hexdigest()[:16]
+        recipe_name = self.data[0]['metadata'].get('recipe', 'unknown') if self.data else 'unknown'
+        return recipe_name.replace(" ", "-").lower()
+
+    @staticmethod
+    def content_hash(text: str, metadata: dict) -> str:
+        """Hash of a chunk's text and metadata."""
+        content = text + "\x00" + json.dumps(metadata, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
 
     def transform_for_chroma(self):
-        """Converts raw list of dicts into ChromaDB's 3-list format."""
+        """
+        Converts raw list of dicts into ChromaDB's 3-list format.
+
+        IDs are deterministic: <recipe key>-<type>-<position>-<content hash>,
+        so re-ingesting an unchanged recipe upserts the same chunks, and an
+        edited chunk gets a new ID (its old one becomes stale).
+        """
         documents = []
         metadatas = []
         ids = []
 
-        for i, entry in enumerate(self.data):
+        recipe_key = self.recipe_key()
+        positions = {}
+
+        for entry in self.data:
             # Clean/Prettify the text if needed
             doc_text = entry['text'].strip()
 
             # Extract metadata
-            metadata = entry['metadata']
+            metadata = dict(entry['metadata'])
+            content_hash = self.content_hash(doc_text, metadata)
+
+            # Position of the chunk among chunks of its type
+            chunk_type = metadata['type']
+            position = positions.get(chunk_type, 0)
+            positions[chunk_type] = position + 1
 
-            # Create a unique ID
-            recipe_name = metadata.get(
-                'recipe', 'unknown').replace(" ", "-").lower()
-            unique_id = f"{recipe_name}-{metadata['type']}-{uuid.uuid4().hex[:8]}"
+            metadata['recipe_key'] = recipe_key
+            metadata['content_hash'] = content_hash
+            if self.source_url:
+                metadata['source_url'] = self.source_url
 
             documents.append(doc_text)
             metadatas.append(metadata)
-            ids.append(unique_id)
+            ids.append(f"{recipe_key}-{chunk_type}-{position}-{content_hash}")
 
         return {
             "documents": documents,
@@ -1,11 +1,17 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, unquote
-from urllib.robotparser import RobotFileParser
-from collections import deque
+import threading
 import time
 from tqdm import tqdm
 
+from scraper.frontier import MemoryFrontier
+from scraper.http_cache import HttpCache
+from scraper.parsing import LINKS_ONLY, parse_html
+from scraper.robots import RobotsCache
+from scraper.sitemap import SitemapReader
+from scraper.urls import canonicalize_url
+
 # Configuration
 USER_AGENT = "HybridSearchWorkshop/1.0 (Educational)"
 REQUEST_DELAY = 0.5  # seconds between requests
@@ -23,38 +29,75 @@ class WebCrawler:
         data = crawler.crawl("https://example.com", max_pages=10)
     """
 
-    def __init__(self, user_agent: str = USER_AGENT, delay: float = REQUEST_DELAY) -> None:
+    def __init__(self, user_agent: str = USER_AGENT, delay: float = REQUEST_DELAY,
+                 http_cache: HttpCache | bool = None, keep_text: bool = True,
+                 robots_cache: RobotsCache = None) -> None:
+        """
+        Args:
+            user_agent: User-Agent header sent with every request
+            delay: Seconds between requests
+            http_cache: On-disk HTTP cache, or False for none. Defaults to the
+                one configured by HTTP_CACHE (on, offline or off; see
+                HttpCache.from_env)
+            keep_text: Extract page text. When False, pages are parsed only
+                for their title and links, and 'text' is empty
+            robots_cache: robots.txt cache. Defaults to the process-wide one
+                shared with WebScraper (see RobotsCache.shared)
+        """
         self.user_agent = user_agent
         self.delay = delay
-        self.session = requests.Session()
-        self.session.headers["User-Agent"] = user_agent
-        self.robots_cache = {}  # Cache robots parsers per domain
+        self.keep_text = keep_text
+        self._local = threading.local()  # per-thread requests.Session
+        self.robots_cache = robots_cache if robots_cache is not None else RobotsCache.shared()
+        if http_cache is None:
+            http_cache = HttpCache.from_env()
+        self.http_cache = http_cache or None
+
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session; requests.Session is not safe to share across threads."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+        return session
 
     def get_domain(self, url: str) -> str:
         """Extract the domain from a URL."""
         parsed = urlparse(url)
         return f"{parsed.scheme}://{parsed.netloc}"
 
+    def fetch_robots(self, robots_url: str) -> requests.Response | None:
+        """Fetch a robots.txt for the robots cache (None if unknown offline)."""
+        response = self.get(robots_url, timeout=5)
+        if self.offline and not response.from_cache:
+            return None  # not replayable; don't cache a verdict
+        return response
+
     def can_fetch(self, url: str) -> bool:
         """Check if URL is allowed by robots.txt."""
-        domain = self.get_domain(url)
-        if domain not in self.robots_cache:
-            try:
-                rp = RobotFileParser()
-                robots_url = f"{domain}/robots.txt"
-                robots_txt = self.session.get(robots_url, timeout=5).text
-                rp.parse(robots_txt.splitlines())
-                self.robots_cache[domain] = rp
-            except:
-                # If we can't fetch robots.txt, assume allowed
-                return True
-        return self.robots_cache[domain].can_fetch("*", url)
+        return self.robots_cache.can_fetch(url, self.user_agent, fetch=self.fetch_robots)
+
+    def crawl_delay(self, url: str) -> float | None:
+        """Return the robots.txt Crawl-delay for the URL's domain, if any."""
+        return self.robots_cache.crawl_delay(url, self.user_agent)
+
+    def request_delay(self, url: str) -> float:
+        """Seconds to wait after a request: the larger of delay and Crawl-delay."""
+        return max(self.delay, self.crawl_delay(url) or 0.0)
 
     def get(self, url: str, **kwargs) -> requests.Response:
-        """Make a GET request with proper headers."""
+        """Make a GET request with proper headers, revalidating cached copies."""
         kwargs.setdefault('timeout', 10)
+        if self.http_cache is not None:
+            return self.http_cache.get(self.session, url, **kwargs)
         return self.session.get(url, **kwargs)
 
+    @property
+    def offline(self) -> bool:
+        """True when pages are replayed from the HTTP cache only."""
+        return self.http_cache is not None and self.http_cache.offline
+
     def get_title(self, url: str, soup: BeautifulSoup) -> str:
         """Extract page title. Override in subclass for custom logic."""
         title_tag = soup.find('title')
@@ -82,85 +125,233 @@ class WebCrawler:
             return False
         return True
 
+    def url_priority(self, url: str) -> int:
+        """Frontier priority of a URL (higher is fetched first). Override in subclass."""
+        return 0
+
     def extract_links(self, soup: BeautifulSoup, base_url: str) -> list[str]:
-        """Extract all valid links from the page."""
+        """Extract all valid links from the page, canonicalized."""
+        base = urlparse(base_url)
         links = []
         for a in soup.find_all('a', href=True):
             href = a['href']
             if self.is_valid_link(href, base_url):
                 # Convert relative URLs to absolute
                 full_url = urljoin(base_url, href)
-                # Only follow links on the same domain
-                if self.get_domain(full_url) == self.get_domain(base_url):
-                    links.append(full_url)
+                # Only follow links on the same host (http/https variants included)
+                if urlparse(full_url).netloc.lower() == base.netloc.lower():
+                    links.append(canonicalize_url(full_url, scheme=base.scheme))
         return list(dict.fromkeys(links))  # Remove duplicates, preserve order
 
-    def crawl_page(self, url: str) -> dict | None:
-        """Crawl a single page and extract title, text, and links."""
+    def crawl_page(self, url: str, keep_html: bool = False) -> dict | None:
+        """
+        Crawl a single page and extract title, text, and links.
+
+        With keep_html, the raw response body is kept under 'html' so it can
+        be scraped without downloading the page again.
+        """
+        return self.fetch_page(url, keep_html)[0]
+
+    def fetch_page(self, url: str, keep_html: bool = False,
+                   throttle=None) -> tuple[dict | None, bool]:
+        """
+        Like crawl_page(), but also report whether a failure is worth retrying.
+
+        Args:
+            url: URL to fetch
+            keep_html: Keep the raw body under 'html'
+            throttle: Optional DomainThrottle to wait on before the request
+                and to report the response (status and Retry-After) to.
+                Not used offline
+
+        Returns:
+            (page data or None, whether the URL should be retried)
+        """
         if not self.can_fetch(url):
             print(f"[robots.txt blocked] {url}")
-            return None
+            return None, False
 
+        domain = self.get_domain(url)
+        if self.offline:
+            throttle = None
+        if throttle is not None:
+            throttle.set_crawl_delay(domain, self.crawl_delay(url))
+            throttle.wait(domain)
         try:
             response = self.get(url)
-            if response.status_code != 200:
-                print(f"[HTTP {response.status_code}] {url}")
-                return None
-
-            soup = BeautifulSoup(response.text, 'html.parser')
+        except Exception as e:
+            print(f"[Error] {url}: {e}")
+            if throttle is not None:
+                throttle.record(domain, None)
+            return None, True
 
-            return {
-                'url': url,
-                'title': self.get_title(url, soup),
-                'text': self.extract_text(soup),
-                'links': self.extract_links(soup, url)
-            }
+        if throttle is not None:
+            throttle.record(domain, response.status_code, response.headers.get("Retry-After"))
+        if response.status_code != 200:
+            print(f"[HTTP {response.status_code}] {url}")
+            return None, response.status_code == 429 or response.status_code >= 500
 
+        try:
+            return self.parse_page(url, response.text, keep_html), False
         except Exception as e:
             print(f"[Error] {url}: {e}")
-            return None
+            return None, False
+
+    def parse_page(self, url: str, html: str, keep_html: bool = False) -> dict:
+        """Parse a fetched page into title, text, links (and optionally raw html)."""
+        if self.keep_text:
+            soup = parse_html(html)
+            title = self.get_title(url, soup)
+            text = self.extract_text(soup)
+        else:
+            # Partial parse; drop page chrome as extract_text() would
+            soup = parse_html(html, parse_only=LINKS_ONLY)
+            title = self.get_title(url, soup)
+            text = ''
+            for tag in soup(['nav', 'footer', 'header']):
+                tag.decompose()
+
+        result = {
+            'url': url,
+            'title': title,
+            'text': text,
+            'links': self.extract_links(soup, url)
+        }
+        if keep_html:
+            result['html'] = html
+        return result
+
+    def seed_from_sitemaps(self, seed_url: str, frontier, limit: int = None,
+                           since=None, seen=None) -> int:
+        """
+        Queue the site's sitemap URLs that pass is_valid_link().
+
+        Each URL is queued with its lastmod date, so within a priority the
+        most recently modified pages are fetched first.
 
-    def crawl(self, seed_url: str, max_pages: int = 20) -> dict[str, dict]:
+        Args:
+            seed_url: Any URL on the site
+            frontier: Frontier to add the URLs to
+            limit: Stop after this many new URLs (None for the whole sitemap)
+            since: Only queue pages modified at or after this datetime
+            seen: Optional SeenStore; already ingested pages whose lastmod is
+                newer than their last crawl are made due for a recrawl
+
+        Returns:
+            Number of new URLs queued
+        """
+        base = urlparse(seed_url)
+        added = 0
+        modified = []
+        for loc, lastmod in SitemapReader(self).iter_urls(seed_url, since=since):
+            if limit is not None and added >= limit:
+                break
+            if not self.is_valid_link(loc, seed_url):
+                continue
+            if urlparse(loc).netloc.lower() != base.netloc.lower():
+                continue
+            url = canonicalize_url(loc, scheme=base.scheme)
+            lastmod = lastmod.timestamp() if lastmod else None
+            if seen is not None and lastmod is not None:
+                modified.append((url, lastmod))
+            added += frontier.add(url, self.url_priority(url), lastmod=lastmod)
+        print(f"Queued {added} URLs from sitemaps")
+        rescheduled = seen.mark_modified(modified) if modified else 0
+        if rescheduled:
+            print(f"Scheduled {rescheduled} modified recipes for a recrawl")
+        return added
+
+    def crawl(self, seed_url: str, max_pages: int = 20, keep_html=None,
+              frontier=None, sitemaps: bool = False, skip=None) -> dict[str, dict]:
         """
         Crawl starting from seed_url using Breadth-First Search (BFS).
 
+        Within BFS order, URLs with a higher url_priority() are fetched first.
+
         Args:
             seed_url: Starting URL
             max_pages: Maximum number of pages to crawl
+            keep_html: Optional predicate url -> bool; matching pages keep their
+                raw body under 'html', all others drop it after parsing
+            frontier: Optional frontier (e.g. SQLiteFrontier) to resume from and
+                record progress in. Defaults to a fresh in-memory frontier
+            sitemaps: Also queue up to max_pages URLs from the site's sitemaps,
+                so leaf pages are reached without walking hub pages
+            skip: Optional predicate url -> bool; matching URLs (other than the
+                seed) are not fetched, e.g. recipes already ingested
 
         Returns:
-            Dictionary mapping URL -> page data
+            Dictionary mapping URL -> page data (pages fetched by this run)
         """
         crawled = {}
-        visited = set()
-        queue = deque([seed_url])
+        if frontier is None:
+            frontier = MemoryFrontier()
+        seed_url = canonicalize_url(seed_url)
+        frontier.add(seed_url, self.url_priority(seed_url))
+        if sitemaps:
+            self.seed_from_sitemaps(seed_url, frontier, limit=max_pages)
 
         pbar = tqdm(total=max_pages, desc="Crawling")
 
-        while queue and len(crawled) < max_pages:
-            url = queue.popleft()
-            if url in visited:
+        while len(crawled) < max_pages:
+            url = frontier.pop()
+            if url is None:
+                break
+            if skip and url != seed_url and skip(url):
+                frontier.mark_done(url)
                 continue
 
-            visited.add(url)
-            result = self.crawl_page(url)
+            result, retry = self.fetch_page(url, keep_html=bool(keep_html and keep_html(url)))
 
             if result:
+                frontier.mark_done(url)
                 crawled[url] = result
                 pbar.update(1)
                 pbar.set_description(f"Crawling: {result['title'][:25]}...")
 
-                # Add new links to the queue (BFS)
-                for link in result['links']:
-                    if link not in visited:
-                        queue.append(link)
+                # Add new links to the frontier (BFS)
+                frontier.add_many(
+                    [(link, self.url_priority(link)) for link in result['links']])
+            else:
+                frontier.mark_failed(url, retry=retry)
 
-            time.sleep(self.delay)
+            if not self.offline:
+                time.sleep(self.request_delay(url))
 
         pbar.close()
         print(f"\nCrawled {len(crawled)} pages!")
         return crawled
 
+    def crawl_async(self, seed_url: str, max_pages: int = 20, concurrency: int = 16,
+                    keep_html=None, frontier=None, sitemaps: bool = False,
+                    skip=None) -> dict[str, dict]:
+        """
+        Crawl with many requests in flight, throttled per domain.
+
+        Same hooks and result format as crawl(), but pages from different
+        domains (and successive pages of one domain, as politeness allows)
+        are fetched concurrently. See AsyncCrawler.
+
+        Args:
+            seed_url: Starting URL
+            max_pages: Maximum number of pages to crawl
+            concurrency: Maximum number of requests in flight
+            keep_html: Optional predicate url -> bool, as in crawl()
+            frontier: Optional frontier to resume from, as in crawl()
+            sitemaps: Also queue URLs from the site's sitemaps, as in crawl()
+            skip: Optional predicate url -> bool of URLs not to fetch, as in crawl()
+
+        Returns:
+            Dictionary mapping URL -> page data
+        """
+        import asyncio
+        from scraper.AsyncCrawler import AsyncCrawler
+
+        crawler = AsyncCrawler(self, concurrency=concurrency)
+        return asyncio.run(crawler.crawl(
+            seed_url, max_pages, keep_html=keep_html, frontier=frontier, sitemaps=sitemaps,
+            skip=skip))
+
     def show_robots_txt(self, url: str, max_rules: int = 10) -> None:
         """Fetch and display important rules from a site's robots.txt."""
         try:
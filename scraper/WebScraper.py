@@ -2,6 +2,11 @@ import requests
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
+from scraper.http_cache import HttpCache
+from scraper.jsonld import find_recipe_jsonld, recipe_chunks
+from scraper.parsing import RECIPE_SECTIONS, parse_html
+from scraper.robots import RobotsCache
+
 USER_AGENT = "educational webscraper"
 REQUEST_DELAY = 0.5  # seconds between requests
 
@@ -18,24 +23,83 @@ class WebScraper:
         data = scraper.scrape("https://example.com", max_pages=10)
     """
 
+    # Elements kept by parse(); None parses the whole page
+    strainer = RECIPE_SECTIONS
+
     def __init__(
-        self, user_agent: str = USER_AGENT, delay: float = REQUEST_DELAY
+        self, user_agent: str = USER_AGENT, delay: float = REQUEST_DELAY,
+        http_cache: HttpCache | bool = None, robots_cache: RobotsCache = None
     ) -> None:
         self.user_agent = user_agent
         self.delay = delay  # request delays
         self.session = requests.Session()  # reuse TCP connections for efficiency
         self.session.headers["User-Agent"] = user_agent
         self.visited = set()  # Cache robots parsers per domain
+        # On-disk HTTP cache (HTTP_CACHE=on|offline|off); False disables it
+        if http_cache is None:
+            http_cache = HttpCache.from_env()
+        self.http_cache = http_cache or None
+        # robots.txt rules, shared with the crawler (see RobotsCache.shared)
+        self.robots_cache = robots_cache if robots_cache is not None else RobotsCache.shared()
 
     def get(self, url: str, **kwargs) -> requests.Response:
-        """Make a GET request with proper headers."""
+        """Make a GET request with proper headers, revalidating cached copies."""
         kwargs.setdefault('timeout', 10)
+        if self.http_cache is not None:
+            return self.http_cache.get(self.session, url, **kwargs)
         return self.session.get(url, **kwargs)
 
-    def get_data(self, url: str, **kwargs) -> BeautifulSoup:
+    def fetch_robots(self, robots_url: str) -> requests.Response | None:
+        """Fetch a robots.txt for the robots cache (None if unknown offline)."""
+        response = self.get(robots_url, timeout=5)
+        offline = self.http_cache is not None and self.http_cache.offline
+        if offline and not response.from_cache:
+            return None  # not replayable; don't cache a verdict
+        return response
+
+    def can_fetch(self, url: str) -> bool:
+        """Check if URL is allowed by robots.txt."""
+        return self.robots_cache.can_fetch(url, self.user_agent, fetch=self.fetch_robots)
+
+    def get_data(self, url: str, **kwargs) -> BeautifulSoup | None:
+        """Fetch and fully parse a page (None if robots.txt disallows it)."""
+        if not self.can_fetch(url):
+            print(f"[robots.txt blocked] {url}")
+            return None
         data = self.get(url=url)
-        soup = BeautifulSoup(data.text, 'html.parser')
-        return soup
+        return parse_html(data.text)
+
+    def get_recipe_soup(self, url: str) -> BeautifulSoup | None:
+        """
+        Like get_data(), but keep only the recipe sections extract_data() reads.
+        """
+        if not self.can_fetch(url):
+            print(f"[robots.txt blocked] {url}")
+            return None
+        return self.parse(self.get(url=url).text)
+
+    def parse(self, html: str) -> BeautifulSoup:
+        """Parse an already-fetched page (e.g. kept by the crawler) for extract_data."""
+        return parse_html(html, parse_only=self.strainer)
+
+    def extract_from_html(self, html: str) -> list[dict]:
+        """
+        Extract recipe chunks from a page's HTML.
+
+        Uses the page's JSON-LD Recipe block when present (no DOM is built),
+        and falls back to extract_data() on the parsed page when there is
+        none or it lists neither ingredients nor directions.
+        """
+        recipe = find_recipe_jsonld(html)
+        if recipe is not None:
+            try:
+                chunks = recipe_chunks(recipe)
+            except ValueError:
+                chunks = []
+            if any(chunk["metadata"]["type"] in ("ingredients", "directions")
+                   for chunk in chunks):
+                return chunks
+        return self.extract_data(self.parse(html))
 
     def extract_data(self, soup: BeautifulSoup):
         data = []
@@ -0,0 +1,252 @@
+"""
+Recorded page archives and a local HTTP server that replays them.
+
+A FixtureArchive holds pages recorded from a real site. A FixtureServer
+serves one on localhost with configurable latency, error rate and
+robots.txt, rewriting the site's absolute links to point back at the
+server, so crawlers, the scraper and the ingestion pipeline can be
+benchmarked and regression-tested without touching the network.
+"""
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+from scraper.urls import canonicalize_url
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "fixtures" / "archive"
+
+ALLOW_ALL_ROBOTS = "User-agent: *\nAllow: /\n"
+
+
+def _site_path(url: str) -> str:
+    """Path and query of a canonical URL: the archive's lookup key."""
+    parsed = urlparse(canonicalize_url(url))
+    return (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+
+class FixtureArchive:
+    """
+    Pages of one site, stored on disk by canonical path.
+
+    Layout:
+        index.json       - origin and path -> status, content type, body file
+        bodies/<key>.gz  - gzip-compressed response bodies
+
+    Usage:
+        archive = FixtureArchive("data/fixtures/archive")
+        archive.add(url, 200, "text/html; charset=utf-8", html.encode())
+        archive.save()
+    """
+
+    def __init__(self, root: str = None) -> None:
+        """
+        Args:
+            root: Archive directory. Defaults to data/fixtures/archive
+        """
+        self.root = Path(root or DEFAULT_ARCHIVE_DIR)
+        self.origin = None
+        self.pages = {}  # path -> {"url", "status", "content_type", "file"}
+        self._lock = threading.Lock()
+
+        index_path = self.root / "index.json"
+        if index_path.exists():
+            index = json.loads(index_path.read_text())
+            self.origin = index["origin"]
+            self.pages = index["pages"]
+
+    def add(self, url: str, status: int, content_type: str, body: bytes) -> None:
+        """Store a response (replacing an earlier one for the same page)."""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        path = _site_path(url)
+        key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+        body_path = self.root / "bodies" / f"{key}.gz"
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(gzip.compress(body))
+        with self._lock:
+            if self.origin is None:
+                self.origin = origin
+            elif origin != self.origin:
+                raise ValueError(f"{url} is not on {self.origin}")
+            self.pages[path] = {"url": url, "status": status,
+                                "content_type": content_type, "file": body_path.name}
+
+    def get(self, url_or_path: str) -> tuple[int, str, bytes] | None:
+        """(status, content type, body) of an archived page, or None."""
+        if url_or_path.startswith("/"):
+            url_or_path = "http://fixture" + url_or_path
+        entry = self.pages.get(_site_path(url_or_path))
+        if entry is None:
+            return None
+        body = gzip.decompress((self.root / "bodies" / entry["file"]).read_bytes())
+        return entry["status"], entry["content_type"], body
+
+    def urls(self) -> list[str]:
+        """Original URLs of the archived pages."""
+        return [entry["url"] for entry in self.pages.values()]
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def save(self) -> None:
+        """Write the index."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            index = {"origin": self.origin, "pages": self.pages}
+        (self.root / "index.json").write_text(json.dumps(index, indent=1, ensure_ascii=False))
+
+
+def record_site(crawler, seed_url: str, max_pages: int = 50, archive: FixtureArchive = None,
+                sitemaps: bool = False) -> FixtureArchive:
+    """
+    Crawl a live site and archive every fetched page and its robots.txt.
+
+    Args:
+        crawler: WebCrawler (or subclass) deciding which links to follow
+        seed_url: Starting URL
+        max_pages: Pages to record
+        archive: Archive to add to. Defaults to data/fixtures/archive
+        sitemaps: Also queue URLs from the site's sitemaps
+
+    Returns:
+        The archive, saved
+    """
+    archive = archive if archive is not None else FixtureArchive()
+    robots_url = f"{crawler.get_domain(seed_url)}/robots.txt"
+    response = crawler.get(robots_url)
+    if response.status_code == 200:
+        archive.add(robots_url, 200, "text/plain", response.content)
+
+    pages = crawler.crawl(seed_url, max_pages=max_pages, keep_html=lambda url: True,
+                          sitemaps=sitemaps)
+    for url, page in pages.items():
+        archive.add(url, 200, "text/html; charset=utf-8", page["html"].encode("utf-8"))
+    archive.save()
+    print(f"💾 Archived {len(pages)} pages in {archive.root}")
+    return archive
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+
+    def do_GET(self):
+        status, content_type, body = self.server.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local HTTP server replaying a FixtureArchive.
+
+    Usage:
+        with FixtureServer(archive, latency=0.05, error_rate=0.02) as server:
+            crawler.crawl(server.url(seed_url), max_pages=100)
+            print(server.requests, server.errors)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, archive: FixtureArchive, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, robots_txt: str = None, rewrite_links: bool = True,
+                 seed: int = None, port: int = 0) -> None:
+        """
+        Args:
+            archive: Pages to serve
+            latency: Seconds added before every response
+            jitter: Extra random delay of up to this many seconds
+            error_rate: Fraction of page requests answered with 503
+            robots_txt: robots.txt to serve instead of the archived one
+                (allow-all if neither exists)
+            rewrite_links: Point the site's absolute links at this server
+            seed: Random seed for jitter and errors, for repeatable runs
+            port: Port to listen on (0 picks a free one)
+        """
+        super().__init__(("127.0.0.1", port), _FixtureHandler)
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.robots_txt = robots_txt
+        self.rewrite_links = rewrite_links
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+
+        self.requests = 0
+        self.errors = 0    # injected 503s
+        self.misses = 0    # pages not in the archive
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def url(self, url: str) -> str:
+        """Local URL of an archived page."""
+        return self.base_url + _site_path(url)
+
+    def respond(self, path: str) -> tuple[int, str, bytes]:
+        """(status, content type, body) for a request path."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+
+        if urlparse(path).path == "/robots.txt":
+            if self.robots_txt is not None:
+                return 200, "text/plain", self.robots_txt.encode("utf-8")
+            archived = self.archive.get(path)
+            if archived is None:
+                return 200, "text/plain", ALLOW_ALL_ROBOTS.encode("utf-8")
+            return archived
+
+        if fail:
+            with self._lock:
+                self.errors += 1
+            return 503, "text/plain", b"Service Unavailable (injected)"
+
+        archived = self.archive.get(path)
+        if archived is None:
+            with self._lock:
+                self.misses += 1
+            return 404, "text/plain", b"Not in fixture archive"
+        status, content_type, body = archived
+        if self.rewrite_links and self.archive.origin and content_type.startswith("text/html"):
+            netloc = urlparse(self.archive.origin).netloc
+            for origin in (f"https://{netloc}", f"http://{netloc}"):
+                body = body.replace(origin.encode("utf-8"), self.base_url.encode("utf-8"))
+        return status, content_type, body
+
+    def start(self) -> "FixtureServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fixture-server",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,342 @@
+"""
+Crawl frontiers: the queue of URLs to fetch plus the record of URLs seen.
+
+MemoryFrontier lives for a single crawl. SQLiteFrontier persists queued,
+in-flight, done and failed URLs so a crawl can be interrupted and resumed
+by later runs.
+"""
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from scraper.urls import BloomFilter
+
+MAX_RETRIES = 3  # attempts per URL before it is marked failed
+
+
+class MemoryFrontier:
+    """
+    In-process priority frontier (higher priority first, FIFO within a priority).
+
+    A failed URL keeps its priority and is retried after the fresh URLs of
+    that priority.
+
+    Seen URLs are tracked in a BloomFilter, so the visited set stays a fixed
+    size however long the crawl runs; a false positive skips a new URL.
+
+    Usage:
+        frontier = MemoryFrontier()
+        frontier.add("https://example.com", priority=0)
+        url = frontier.pop()
+        frontier.mark_done(url)
+    """
+
+    def __init__(self, max_retries: int = MAX_RETRIES, expected_urls: int = 1_000_000,
+                 false_positive_rate: float = 1e-4) -> None:
+        """
+        Args:
+            max_retries: Attempts per URL before it is dropped
+            expected_urls: URLs the visited set is sized for
+            false_positive_rate: Chance of skipping a new URL at that size
+        """
+        self.max_retries = max_retries
+        self._heap = []
+        self._counter = itertools.count()
+        self._seen = BloomFilter(expected_urls, false_positive_rate)
+        self._retries = {}
+        self._popped = {}  # url -> (priority, lastmod) of URLs being fetched
+        self._lock = threading.Lock()
+
+    def add(self, url: str, priority: int = 0, lastmod: float = None) -> bool:
+        """
+        Queue a URL unless it was seen before. Returns True if it was new.
+
+        Within a priority, URLs with a more recent lastmod (Unix time, e.g.
+        from a sitemap) come first, then URLs without one in FIFO order.
+        """
+        with self._lock:
+            if not self._seen.add(url):
+                return False
+            self._push(url, priority, lastmod, retries=0)
+            return True
+
+    def _push(self, url: str, priority: int, lastmod: float | None, retries: int) -> None:
+        heapq.heappush(self._heap, (-priority, retries, -(lastmod or 0), next(self._counter),
+                                    url, lastmod))
+
+    def add_many(self, urls: list[tuple[str, int]]) -> int:
+        """Queue many (url, priority) pairs. Returns how many were new."""
+        return sum(self.add(url, priority) for url, priority in urls)
+
+    def pop(self) -> str | None:
+        """Take the next URL to fetch, or None if the queue is empty."""
+        with self._lock:
+            if not self._heap:
+                return None
+            neg_priority, _, _, _, url, lastmod = heapq.heappop(self._heap)
+            self._popped[url] = (-neg_priority, lastmod)
+            return url
+
+    def mark_done(self, url: str) -> None:
+        """Record a successful fetch."""
+        with self._lock:
+            self._popped.pop(url, None)
+
+    def mark_failed(self, url: str, retry: bool = True, error: str = None) -> None:
+        """
+        Record a failed fetch, re-queueing it after the fresh URLs of its
+        priority if retries remain.
+        """
+        with self._lock:
+            attempts = self._retries.get(url, 0) + 1
+            self._retries[url] = attempts
+            priority, lastmod = self._popped.pop(url, (0, None))
+            if retry and attempts < self.max_retries:
+                self._push(url, priority, lastmod, retries=attempts)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._seen
+
+    def __len__(self) -> int:
+        """Number of queued URLs."""
+        return len(self._heap)
+
+
+class SQLiteFrontier:
+    """
+    Disk-backed priority frontier shared by successive crawl runs.
+
+    Every URL has a state (queued, in_flight, done, failed), a priority, an
+    optional lastmod date and a retry count. Failed URLs keep their priority
+    and are retried after the fresh URLs of that priority. URLs left in flight by a
+    crashed or interrupted run are re-queued when the frontier is opened
+    again.
+
+    Several processes (or hosts sharing the file) can crawl from one
+    frontier with lease(): a leased URL that is not marked done or failed
+    before its visibility timeout returns to the queue as a failed attempt.
+
+    Usage:
+        frontier = SQLiteFrontier("data/frontier.db")
+        crawler.crawl(seed_url, max_pages=500, frontier=frontier)
+        # ... Ctrl-C, then later:
+        crawler.crawl(seed_url, max_pages=500, frontier=SQLiteFrontier("data/frontier.db"))
+    """
+
+    def __init__(self, db_path: str = None, max_retries: int = MAX_RETRIES,
+                 requeue_on_open: bool = True) -> None:
+        """
+        Args:
+            db_path: SQLite file. Defaults to data/frontier.db
+            max_retries: Attempts per URL before it is marked failed
+            requeue_on_open: Re-queue all in-flight URLs on open. Disable when
+                other workers may be crawling from the same file
+        """
+        if db_path is None:
+            db_path = Path(__file__).parent.parent / 'data' / 'frontier.db'
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_retries = max_retries
+
+        # One long-lived connection: frontier calls are frequent and tiny
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._init_db()
+        if requeue_on_open:
+            self.requeue_in_flight()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL UNIQUE,
+                    state TEXT NOT NULL DEFAULT 'queued'
+                        CHECK (state IN ('queued', 'in_flight', 'done', 'failed')),
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    retries INTEGER NOT NULL DEFAULT 0,
+                    discovered_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            ''')
+            # Lease and lastmod columns, added to frontiers created before them
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(urls)')}
+            for column, decl in (('lease_owner', 'TEXT'), ('lease_expires', 'REAL'),
+                                 ('lastmod', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE urls ADD COLUMN {column} {decl}')
+            self._conn.execute('DROP INDEX IF EXISTS idx_urls_next')
+            self._conn.execute('DROP INDEX IF EXISTS idx_urls_next_lastmod')
+            self._conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_urls_next_retries
+                ON urls (state, priority DESC, retries, lastmod DESC, id)
+            ''')
+
+    def requeue_in_flight(self) -> int:
+        """Return URLs left in flight by an interrupted run to the queue."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE urls SET state = 'queued', updated_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL WHERE state = 'in_flight'",
+                (time.time(),))
+            return cursor.rowcount
+
+    def add(self, url: str, priority: int = 0, lastmod: float = None) -> bool:
+        """
+        Queue a URL unless it is already known. Returns True if it was new.
+
+        Within a priority, URLs with a more recent lastmod (Unix time, e.g.
+        from a sitemap) are fetched first.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute('''
+                INSERT OR IGNORE INTO urls (url, priority, lastmod, discovered_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (url, priority, lastmod, now, now))
+            return cursor.rowcount > 0
+
+    def add_many(self, urls: list[tuple[str, int]]) -> int:
+        """
+        Queue many (url, priority) pairs in one transaction.
+
+        Returns:
+            Number of URLs that were new
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('''
+                INSERT OR IGNORE INTO urls (url, priority, discovered_at, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', [(url, priority, now, now) for url, priority in urls])
+            return self._conn.total_changes - before
+
+    def pop(self) -> str | None:
+        """Move the highest-priority queued URL to in_flight and return it."""
+        with self._lock, self._conn:
+            row = self._conn.execute('''
+                SELECT id, url FROM urls
+                WHERE state = 'queued'
+                ORDER BY priority DESC, retries, lastmod DESC, id
+                LIMIT 1
+            ''').fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE urls SET state = 'in_flight', updated_at = ? WHERE id = ?",
+                (time.time(), row[0]))
+            return row[1]
+
+    def lease(self, owner: str, timeout: float = 60.0) -> str | None:
+        """
+        Lease the highest-priority queued URL to a worker.
+
+        Expired leases are returned to the queue first and count as failed
+        attempts, so a URL that crashes or hangs every worker ends up failed
+        after max_retries leases. The lease is a single atomic UPDATE, so
+        concurrent workers never receive the same URL.
+
+        Args:
+            owner: Worker identifier recorded with the lease
+            timeout: Seconds before an unfinished lease expires
+
+        Returns:
+            The leased URL, or None if nothing is queued
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('''
+                UPDATE urls
+                SET retries = retries + 1,
+                    state = CASE WHEN retries + 1 < ? THEN 'queued' ELSE 'failed' END,
+                    updated_at = ?,
+                    last_error = 'lease expired',
+                    lease_owner = NULL,
+                    lease_expires = NULL
+                WHERE state = 'in_flight' AND lease_expires < ?
+            ''', (self.max_retries, now, now))
+            row = self._conn.execute('''
+                UPDATE urls
+                SET state = 'in_flight', lease_owner = ?, lease_expires = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM urls
+                    WHERE state = 'queued'
+                    ORDER BY priority DESC, retries, lastmod DESC, id
+                    LIMIT 1
+                )
+                RETURNING url
+            ''', (owner, now + timeout, now)).fetchone()
+            return row[0] if row else None
+
+    def mark_done(self, url: str, owner: str = None) -> bool:
+        """
+        Record a successful fetch.
+
+        A leased URL is only updated by the lease's owner, so a worker whose
+        lease expired cannot overwrite the outcome of the worker holding it now.
+
+        Returns:
+            False if the URL is leased to another worker
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE urls SET state = 'done', updated_at = ?, last_error = NULL, "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE url = ? AND (lease_owner IS NULL OR lease_owner = ?)",
+                (time.time(), url, owner))
+            return cursor.rowcount > 0
+
+    def mark_failed(self, url: str, retry: bool = True, error: str = None,
+                    owner: str = None) -> bool:
+        """
+        Record a failed fetch, re-queueing it after the fresh URLs of its
+        priority if retries remain.
+
+        Like mark_done(), a leased URL is only updated by the lease's owner.
+
+        Returns:
+            False if the URL is leased to another worker
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute('''
+                UPDATE urls
+                SET retries = retries + 1,
+                    state = CASE WHEN ? AND retries + 1 < ? THEN 'queued' ELSE 'failed' END,
+                    updated_at = ?,
+                    last_error = ?,
+                    lease_owner = NULL,
+                    lease_expires = NULL
+                WHERE url = ? AND (lease_owner IS NULL OR lease_owner = ?)
+            ''', (retry, self.max_retries, time.time(), error, url, owner))
+            return cursor.rowcount > 0
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM urls WHERE url = ?', (url,)).fetchone()
+            return row is not None
+
+    def __len__(self) -> int:
+        """Number of queued URLs."""
+        return self.stats()['queued']
+
+    def stats(self) -> dict:
+        """Count URLs per state."""
+        counts = {'queued': 0, 'in_flight': 0, 'done': 0, 'failed': 0}
+        with self._lock:
+            for state, count in self._conn.execute(
+                    'SELECT state, COUNT(*) FROM urls GROUP BY state'):
+                counts[state] = count
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,246 @@
+"""
+On-disk HTTP cache with conditional revalidation.
+
+Bodies are stored zlib-compressed next to a small JSON record of their
+validators. Revisits send If-None-Match / If-Modified-Since and a 304 is
+served from disk; offline mode serves everything from disk without
+touching the network. 404 and 410 responses are cached too, so offline
+replay reproduces them. Beyond a byte budget, the least recently used
+entries are deleted.
+"""
+import hashlib
+import json
+from http import HTTPStatus
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "http_cache"
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+# Statuses stored on disk: bodies, plus missing pages (negative caching)
+CACHED_STATUSES = (200, 404, 410)
+
+DEFAULT_MAX_BYTES = 2 * 1024**3  # compressed bytes on disk
+PRUNE_RATIO = 0.9                # pruning frees space down to this share of the budget
+
+
+class HttpCache:
+    """
+    Conditional-GET cache for crawler and scraper requests.
+
+    Layout on disk (key = sha256 of the URL):
+        <key[:2]>/<key>.json  - URL, status, encoding, validators, fetch time
+        <key[:2]>/<key>.zz    - zlib-compressed body
+
+    Usage:
+        cache = HttpCache()
+        response = cache.get(session, url, timeout=10)
+        response.from_cache  # True if the body came from disk
+    """
+
+    def __init__(self, cache_dir: str = None, offline: bool = False,
+                 max_bytes: int = None) -> None:
+        """
+        Args:
+            cache_dir: Directory for cache files. Defaults to HTTP_CACHE_DIR
+                or data/http_cache
+            offline: Serve only from the cache; misses get a 504 response
+            max_bytes: Disk budget; least recently used entries are deleted
+                beyond it. Defaults to HTTP_CACHE_MAX_BYTES or 2 GB; 0 keeps
+                everything
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("HTTP_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        if max_bytes is None:
+            max_bytes = int(os.getenv("HTTP_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+
+        self._size = None  # bytes on disk, counted on the first store
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HttpCache | None":
+        """
+        Cache configured by HTTP_CACHE: "on" (default), "offline" or "off" (None).
+        """
+        mode = os.getenv("HTTP_CACHE", "on").lower()
+        if mode == "off":
+            return None
+        return cls(offline=mode == "offline")
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        directory = self.cache_dir / key[:2]
+        return directory / f"{key}.json", directory / f"{key}.zz"
+
+    def _load(self, url: str) -> dict | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            meta["body"] = zlib.decompress(body_path.read_bytes())
+        except (OSError, ValueError, zlib.error):
+            return None
+        return meta
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(exist_ok=True)
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "headers": {name: response.headers[name]
+                        for name in STORED_HEADERS if name in response.headers},
+            "fetched_at": time.time(),
+        }
+        body = zlib.compress(response.content)
+        record = json.dumps(meta).encode("utf-8")
+        # Body first, then its record: a record never points at a missing body
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, record)
+        self._account(len(body) + len(record))
+
+    def _account(self, added: int) -> None:
+        """Count newly stored bytes and prune once the budget is exceeded."""
+        if not self.max_bytes:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()  # includes what was just stored
+            else:
+                self._size += added
+            if self._size > self.max_bytes:
+                self._size = self.prune(int(self.max_bytes * PRUNE_RATIO))
+
+    def _entries(self) -> list[tuple[float, int, Path, Path]]:
+        """(last use, bytes, record path, body path) of every entry."""
+        entries = []
+        for meta_path in self.cache_dir.glob("*/*.json"):
+            body_path = meta_path.with_suffix(".zz")
+            try:
+                meta_stat = meta_path.stat()
+                size = meta_stat.st_size + body_path.stat().st_size
+            except OSError:
+                continue  # pruned or replaced meanwhile
+            entries.append((meta_stat.st_mtime, size, meta_path, body_path))
+        return entries
+
+    def size(self) -> int:
+        """Bytes used on disk by cached entries."""
+        return sum(size for _, size, _, _ in self._entries())
+
+    def prune(self, max_bytes: int) -> int:
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Bytes left on disk
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, meta_path, body_path in entries:
+            if total <= max_bytes:
+                break
+            # Record first, so no record is left pointing at a deleted body
+            meta_path.unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            total -= size
+        return total
+
+    def _mark_used(self, url: str) -> None:
+        """Record a hit served without revalidation, for LRU pruning."""
+        try:
+            os.utime(self._paths(url)[0])
+        except OSError:
+            pass
+
+    def _touch(self, url: str, meta: dict, headers) -> None:
+        """Refresh the validators and fetch time of a revalidated entry."""
+        meta_path, _ = self._paths(url)
+        record = {k: v for k, v in meta.items() if k != "body"}
+        for name in ('ETag', 'Last-Modified'):
+            if name in headers:
+                record["headers"][name] = headers[name]
+        record["fetched_at"] = time.time()
+        _write_atomic(meta_path, json.dumps(record).encode("utf-8"))
+
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        GET a URL through the cache.
+
+        A streaming request (stream=True) whose response is stored is read
+        in full first; iter_content() then yields the stored body.
+
+        Args:
+            session: Session used for network requests
+            url: URL to fetch
+            **kwargs: Passed on to session.get()
+
+        Returns:
+            requests.Response with a from_cache attribute
+        """
+        if self.offline:
+            entry = self._load(url)
+            if entry is None:
+                return _make_response(url, 504, b"", {}, None, from_cache=False,
+                                      reason="Gateway Timeout (offline)")
+            self._mark_used(url)
+            return _cached_response(url, entry)
+
+        entry = self._load(url)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if "ETag" in entry["headers"]:
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = session.get(url, headers=headers, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 304 and entry is not None:
+            self._touch(url, entry, response.headers)
+            return _cached_response(url, entry)
+        if response.status_code in CACHED_STATUSES:
+            self._store(url, response)  # reads a streamed body
+        return response
+
+    def __contains__(self, url: str) -> bool:
+        return self._paths(url)[0].exists()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temporary file so readers never see a partial file."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _cached_response(url: str, entry: dict) -> requests.Response:
+    return _make_response(url, entry["status"], entry["body"], entry["headers"],
+                          entry["encoding"], from_cache=True)
+
+
+def _make_response(url, status, body, headers, encoding, from_cache,
+                   reason: str = None) -> requests.Response:
+    """Build a requests.Response that behaves like a network response."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.reason = reason or HTTPStatus(status).phrase
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response._content_consumed = True  # iter_content() then reads _content, not raw
+    response.encoding = encoding
+    response.from_cache = from_cache
+    return response
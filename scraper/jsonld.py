@@ -0,0 +1,156 @@
+"""
+Fast-path recipe extraction from schema.org JSON-LD.
+
+Most recipe pages embed a <script type="application/ld+json"> Recipe
+object. Only that block is located (by regex) and parsed, so no DOM is
+built; the result is the same chunk list WebScraper.extract_data returns.
+"""
+import html
+import json
+import re
+
+JSONLD_PATTERN = re.compile(
+    r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# schema.org NutritionInformation field -> category label used by the DOM path
+NUTRITION_FIELDS = (
+    ("calories", "Calories"),
+    ("fatContent", "Fat"),
+    ("carbohydrateContent", "Carbs"),
+    ("proteinContent", "Protein"),
+)
+
+
+def _clean(value) -> str:
+    """Unescape HTML entities and collapse whitespace."""
+    return " ".join(html.unescape(str(value)).split())
+
+
+def _is_recipe(node: dict) -> bool:
+    types = node.get("@type", [])
+    if isinstance(types, str):
+        types = [types]
+    return "Recipe" in types
+
+
+def _find_recipe(node):
+    """Depth-first search for a Recipe object (handles lists and @graph)."""
+    if isinstance(node, list):
+        for item in node:
+            found = _find_recipe(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        if _is_recipe(node):
+            return node
+        if "@graph" in node:
+            return _find_recipe(node["@graph"])
+    return None
+
+
+def find_recipe_jsonld(page_html: str) -> dict | None:
+    """
+    Return the schema.org Recipe object embedded in a page, if any.
+
+    Malformed JSON-LD blocks are skipped. Raw control characters (newlines,
+    tabs) inside strings are accepted, as many sites emit them.
+    """
+    for match in JSONLD_PATTERN.finditer(page_html):
+        try:
+            data = json.loads(match.group(1), strict=False)
+        except ValueError:
+            continue
+        recipe = _find_recipe(data)
+        if recipe is not None:
+            return recipe
+    return None
+
+
+def _instruction_steps(instructions) -> list[str]:
+    """Flatten recipeInstructions (text, HowToStep, HowToSection) into step texts."""
+    if isinstance(instructions, str):
+        return [line for line in (_clean(l) for l in instructions.splitlines()) if line]
+    if isinstance(instructions, dict):
+        instructions = [instructions]
+
+    steps = []
+    for item in instructions or []:
+        if isinstance(item, str):
+            steps.append(_clean(item))
+        elif isinstance(item, dict):
+            if "itemListElement" in item:
+                steps.extend(_instruction_steps(item["itemListElement"]))
+            elif item.get("text") or item.get("name"):
+                steps.append(_clean(item.get("text") or item.get("name")))
+    return [step for step in steps if step]
+
+
+def _nutrition_value(value) -> str:
+    """'350 kcal' -> '350', '12 g' -> '12g' (the DOM summary's format)."""
+    value = _clean(value)
+    number, _, unit = value.partition(" ")
+    if unit in ("kcal", "calories", "cal"):
+        return number
+    return number + unit
+
+
+def recipe_chunks(recipe: dict) -> list[dict]:
+    """
+    Convert a JSON-LD Recipe into the chunk list of WebScraper.extract_data.
+
+    Raises:
+        ValueError: If the recipe has no name
+    """
+    title = _clean(recipe.get("name") or "")
+    if not title:
+        raise ValueError("JSON-LD Recipe has no name")
+
+    data = [{"text": title,
+             "metadata": {
+                 "type": "title",
+                 "recipe": title
+             }}]
+
+    ingredients = recipe.get("recipeIngredient") or []
+    if isinstance(ingredients, str):
+        ingredients = [ingredients]
+    ingredients = [item for item in map(_clean, ingredients) if item]
+    if ingredients:
+        section_name = "Ingredients"
+        data.append({
+            "text": f"{section_name} " + ", ".join(ingredients),
+            "metadata": {
+                "type": "ingredients",
+                "recipe": title,
+                "section": section_name
+            }
+        })
+
+    for idx, direction in enumerate(_instruction_steps(recipe.get("recipeInstructions")), start=1):
+        data.append({
+            "text": direction,
+            "metadata": {
+                "type": "directions",
+                "recipe": title,
+                "step": idx,
+                "step_text": direction
+            }
+        })
+
+    nutrition = recipe.get("nutrition") or {}
+    for field, category in NUTRITION_FIELDS:
+        if nutrition.get(field):
+            value = _nutrition_value(nutrition[field])
+            data.append({
+                "text": f"{value} {category}",
+                "metadata": {
+                    "type": "nutrition",
+                    "recipe": title,
+                    "value": value,
+                    "category": category
+                }
+            })
+
+    return data
@@ -0,0 +1,43 @@
+"""
+Shared HTML parsing: lxml backend and partial-parse strainers.
+
+Callers parse only the parts of a page they use, so link discovery does
+not build a full tree and recipe extraction skips navigation, ads and
+scripts entirely.
+"""
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Link discovery: the page title and anchors, plus the page chrome whose
+# links the full-text path drops (see WebCrawler.parse_page)
+LINKS_ONLY = SoupStrainer(["title", "a", "nav", "header", "footer"])
+
+# Recipe extraction: the blocks WebScraper.extract_data reads
+RECIPE_SECTIONS = SoupStrainer(class_=re.compile(
+    r"article-heading"
+    r"|mm-recipes-structured-ingredients"
+    r"|mm-recipes-steps__content"
+    r"|mm-recipes-nutrition-facts-summary__table-body"
+))
+
+
+def parse_html(html: str, parse_only: SoupStrainer = None) -> BeautifulSoup:
+    """
+    Parse HTML with the fastest available backend.
+
+    Args:
+        html: Page source
+        parse_only: Optional strainer; only matching elements (and their
+            subtrees) are kept in the tree
+
+    Returns:
+        BeautifulSoup tree
+    """
+    return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
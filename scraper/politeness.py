@@ -0,0 +1,248 @@
+"""
+Per-domain politeness scheduling for concurrent crawlers.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class _DomainState:
+    """Token bucket and backoff state for one domain."""
+    tokens: float
+    updated: float = field(default_factory=time.monotonic)
+    crawl_delay: float | None = None
+    backoff: float = 1.0
+    blocked_until: float = 0.0
+
+
+class DomainThrottle:
+    """
+    Token bucket per domain that spaces out requests to each host.
+
+    Each domain refills one token every `delay` seconds (or its robots.txt
+    Crawl-delay, if larger) up to `burst` tokens. 429 and 5xx responses
+    double the domain's interval up to `max_backoff` times, and successful
+    responses halve it again. A Retry-After header pauses the domain
+    outright.
+
+    Usage:
+        throttle = DomainThrottle(delay=0.5)
+        await throttle.acquire(domain)      # asyncio callers
+        throttle.wait(domain)               # threaded callers
+        throttle.record(domain, response.status_code)
+    """
+
+    def __init__(self, delay: float = 0.5, burst: int = 1, max_backoff: float = 64.0) -> None:
+        """
+        Args:
+            delay: Minimum seconds between requests to the same domain
+            burst: Requests a domain may receive back-to-back after being idle
+            max_backoff: Largest multiplier applied to the delay after errors
+        """
+        self.delay = delay
+        self.burst = burst
+        self.max_backoff = max_backoff
+        self._domains: dict[str, _DomainState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, domain: str) -> _DomainState:
+        if domain not in self._domains:
+            self._domains[domain] = _DomainState(tokens=float(self.burst))
+        return self._domains[domain]
+
+    def interval(self, domain: str) -> float:
+        """Current seconds between requests for a domain."""
+        with self._lock:
+            return self._interval(self._state(domain))
+
+    def _interval(self, state: _DomainState) -> float:
+        base = max(self.delay, state.crawl_delay or 0.0)
+        return base * state.backoff
+
+    def set_crawl_delay(self, domain: str, crawl_delay: float | None) -> None:
+        """Apply a robots.txt Crawl-delay to a domain."""
+        with self._lock:
+            self._state(domain).crawl_delay = crawl_delay
+
+    def reserve(self, domain: str) -> float:
+        """
+        Take a token for the next request to a domain.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            state = self._state(domain)
+            now = time.monotonic()
+            interval = self._interval(state)
+
+            # Refill, then take a token; a negative balance queues the caller
+            if interval > 0:
+                state.tokens = min(self.burst, state.tokens + (now - state.updated) / interval)
+            else:
+                state.tokens = float(self.burst)
+            state.updated = now
+            state.tokens -= 1
+
+            wait = -state.tokens * interval if state.tokens < 0 else 0.0
+            return max(wait, state.blocked_until - now)
+
+    async def acquire(self, domain: str) -> None:
+        """Wait (asynchronously) until a request to the domain is allowed."""
+        wait = self.reserve(domain)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def wait(self, domain: str) -> None:
+        """Block until a request to the domain is allowed."""
+        wait = self.reserve(domain)
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, domain: str, status_code: int | None, retry_after: str | None = None) -> None:
+        """
+        Adapt a domain's pace to the response it just gave.
+
+        Args:
+            domain: Domain the request went to
+            status_code: HTTP status, or None if the request failed outright
+            retry_after: Value of the Retry-After header, if any
+        """
+        with self._lock:
+            state = self._state(domain)
+            if status_code is None or status_code == 429 or status_code >= 500:
+                state.backoff = min(self.max_backoff, state.backoff * 2)
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + pause)
+            else:
+                state.backoff = max(1.0, state.backoff / 2)
+
+
+class SharedDomainThrottle(DomainThrottle):
+    """
+    DomainThrottle whose state lives in SQLite, shared by worker processes.
+
+    Every worker reserves its next request slot for a domain in one atomic
+    UPDATE, so the domain sees at most one request per interval no matter
+    how many processes (or hosts sharing the file) are crawling it. Slots
+    are wall-clock times, so hosts need reasonably synchronized clocks.
+    Bursts are not supported: requests are spaced evenly.
+
+    Usage:
+        throttle = SharedDomainThrottle("data/crawl.db", delay=0.8)
+        throttle.wait(domain)
+        throttle.record(domain, response.status_code)
+    """
+
+    def __init__(self, db_path: str = None, delay: float = 0.5,
+                 max_backoff: float = 64.0) -> None:
+        """
+        Args:
+            db_path: SQLite file (may be shared with the frontier).
+                Defaults to data/crawl.db
+            delay: Minimum seconds between requests to the same domain
+            max_backoff: Largest multiplier applied to the delay after errors
+        """
+        super().__init__(delay=delay, burst=1, max_backoff=max_backoff)
+        if db_path is None:
+            db_path = Path(__file__).parent.parent / 'data' / 'crawl.db'
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS domains (
+                    domain TEXT PRIMARY KEY,
+                    next_allowed REAL NOT NULL DEFAULT 0,
+                    crawl_delay REAL,
+                    backoff REAL NOT NULL DEFAULT 1,
+                    blocked_until REAL NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
+
+    def _ensure(self, domain: str) -> None:
+        self._conn.execute('INSERT OR IGNORE INTO domains (domain) VALUES (?)', (domain,))
+
+    def interval(self, domain: str) -> float:
+        """Current seconds between requests for a domain."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(?, COALESCE(crawl_delay, 0)) * backoff FROM domains WHERE domain = ?',
+                (self.delay, domain)).fetchone()
+        return row[0] if row else self.delay
+
+    def set_crawl_delay(self, domain: str, crawl_delay: float | None) -> None:
+        """Apply a robots.txt Crawl-delay to a domain."""
+        with self._lock, self._conn:
+            self._ensure(domain)
+            self._conn.execute('UPDATE domains SET crawl_delay = ? WHERE domain = ?',
+                               (crawl_delay, domain))
+
+    def reserve(self, domain: str) -> float:
+        """
+        Take the domain's next free request slot.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._ensure(domain)
+            # The slot is the later of now, the previous slot's end and any
+            # Retry-After pause; the next slot starts one interval after it
+            slot = self._conn.execute('''
+                UPDATE domains
+                SET next_allowed = MAX(?, next_allowed, blocked_until)
+                                   + MAX(?, COALESCE(crawl_delay, 0)) * backoff
+                WHERE domain = ?
+                RETURNING next_allowed - MAX(?, COALESCE(crawl_delay, 0)) * backoff
+            ''', (now, self.delay, domain, self.delay)).fetchone()[0]
+        return max(0.0, slot - now)
+
+    def record(self, domain: str, status_code: int | None, retry_after: str | None = None) -> None:
+        """Adapt a domain's pace (for all workers) to the response it just gave."""
+        with self._lock, self._conn:
+            self._ensure(domain)
+            if status_code is None or status_code == 429 or status_code >= 500:
+                pause = _parse_retry_after(retry_after)
+                self._conn.execute('''
+                    UPDATE domains
+                    SET backoff = MIN(?, backoff * 2),
+                        blocked_until = MAX(blocked_until, ?)
+                    WHERE domain = ?
+                ''', (self.max_backoff, time.time() + pause if pause else 0, domain))
+            else:
+                self._conn.execute(
+                    'UPDATE domains SET backoff = MAX(1, backoff / 2) WHERE domain = ?',
+                    (domain,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,117 @@
+"""
+Incremental recrawl scheduling with change detection.
+
+Each seen recipe page carries a recrawl interval that adapts to how often
+the page actually changes: it shrinks when a recheck finds new content
+and grows when it does not. Rechecks go through the HTTP cache, so an
+unchanged page usually costs one conditional request answered with 304,
+and a page that did change is compared by content fingerprint before
+anything is transformed or embedded.
+"""
+import time
+
+from scraper.seen_store import DEFAULT_RECRAWL_INTERVAL, SeenStore, content_fingerprint
+
+DAY = 24 * 3600
+
+# Outcomes of RecrawlScheduler.check()
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+GONE = "gone"
+FAILED = "failed"
+
+
+class RecrawlScheduler:
+    """
+    Picks due pages and adapts their recrawl intervals.
+
+    Usage:
+        scheduler = RecrawlScheduler(seen_store)
+        for record in scheduler.due(limit=100):
+            status, data = scheduler.check(crawler, scraper, record)
+            ...
+            scheduler.record(record, status, content_hash)
+    """
+
+    def __init__(self, seen: SeenStore, min_interval: float = DAY,
+                 max_interval: float = 90 * DAY, speedup: float = 2.0,
+                 slowdown: float = 1.5) -> None:
+        """
+        Args:
+            seen: Store holding the pages and their schedule
+            min_interval: Shortest time between checks of one page (seconds)
+            max_interval: Longest time between checks of one page (seconds)
+            speedup: Interval divisor after a check that found a change
+            slowdown: Interval multiplier after a check that found none
+        """
+        self.seen = seen
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.slowdown = slowdown
+
+    def due(self, limit: int = 100, now: float = None) -> list[dict]:
+        """Pages due for a recheck, most overdue first."""
+        return self.seen.due(time.time() if now is None else now, limit)
+
+    def next_interval(self, record: dict, changed: bool) -> float:
+        """New recrawl interval of a page after a check."""
+        interval = record.get('recrawl_interval') or DEFAULT_RECRAWL_INTERVAL
+        interval = interval / self.speedup if changed else interval * self.slowdown
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def check(self, crawler, scraper, record: dict):
+        """
+        Re-fetch a page (conditionally, through the crawler's HTTP cache).
+
+        Args:
+            crawler: WebCrawler used for robots.txt and fetching
+            scraper: WebScraper used to extract the recipe
+            record: SeenStore record of the page
+
+        Returns:
+            (status, extracted chunk list or None). The chunks are returned
+            only when the recipe's content fingerprint changed.
+        """
+        url = record['url']
+        if not crawler.can_fetch(url):
+            print(f"[robots.txt blocked] {url}")
+            return UNCHANGED, None  # keep the indexed copy, check less often
+        try:
+            response = crawler.get(url)
+        except Exception as e:
+            print(f"[Error] {url}: {e}")
+            return FAILED, None
+
+        if response.status_code in (404, 410):
+            return GONE, None
+        if response.status_code != 200:
+            print(f"[HTTP {response.status_code}] {url}")
+            return FAILED, None
+        if getattr(response, 'from_cache', False) and not crawler.offline:
+            return UNCHANGED, None  # 304: same bytes as last time
+
+        try:
+            data = scraper.extract_from_html(response.text)
+        except Exception as e:
+            print(f"[Error] {url}: {e}")
+            return FAILED, None
+        if content_fingerprint(data) == record['content_hash']:
+            return UNCHANGED, None  # page bytes changed, recipe did not
+        return CHANGED, data
+
+    def record(self, record: dict, status: str, content_hash: str = None) -> None:
+        """Store the outcome of a check and schedule the next one."""
+        if status == GONE:
+            self.seen.remove(record['url'])
+            return
+        if status == FAILED:
+            # Transient failure: try again after the minimum interval
+            self.seen.schedule(record['url'], time.time() + self.min_interval,
+                               record.get('recrawl_interval') or DEFAULT_RECRAWL_INTERVAL,
+                               changed=False)
+            return
+        changed = status == CHANGED
+        interval = self.next_interval(record, changed)
+        self.seen.schedule(record['url'], time.time() + interval, interval,
+                           changed=changed, content_hash=content_hash)
@@ -0,0 +1,223 @@
+"""
+Persistent robots.txt cache.
+
+Parsed rules are kept in memory and their source is stored in SQLite, so
+a new process reuses robots.txt files fetched by earlier runs until they
+expire. Fetch outcomes follow RFC 9309:
+
+- 2xx: the file's rules apply
+- 4xx (robots.txt unavailable): everything is allowed
+- 5xx, 429 or a network error (unreachable): everything is disallowed
+  for a short while, or the last good copy keeps applying if there is one
+
+Failures are cached too, so an unreachable robots.txt is retried once per
+error TTL instead of before every URL of the domain.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+ROBOTS_TTL = 24 * 3600        # RFC 9309: cached copies should not outlive a day
+ERROR_TTL = 15 * 60           # retry an unreachable robots.txt after this long
+MAX_STALE = 30 * 24 * 3600    # keep using a good copy while unreachable for this long
+MAX_ROBOTS_BYTES = 500 * 1024  # RFC 9309: parse at least the first 500 KiB
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def _parser(status: int | None, body: str | None) -> RobotFileParser:
+    """Rules for a fetch outcome (status None: network error)."""
+    rp = RobotFileParser()
+    if status is not None and 200 <= status < 300:
+        rp.parse((body or "").splitlines())
+        rp.modified()
+    elif status is not None and 400 <= status < 500 and status != 429:
+        rp.allow_all = True
+    else:
+        rp.disallow_all = True
+    return rp
+
+
+class RobotsCache:
+    """
+    robots.txt rules per domain, persisted across runs.
+
+    One instance is meant to be shared by every crawler and scraper of a
+    process (see shared()), so each domain's robots.txt is fetched once.
+
+    Usage:
+        robots = RobotsCache.shared()
+        if robots.can_fetch(url, user_agent, fetch=crawler.get):
+            ...
+        delay = robots.crawl_delay(url, user_agent)
+    """
+
+    def __init__(self, db_path: str = None, ttl: float = ROBOTS_TTL,
+                 error_ttl: float = ERROR_TTL) -> None:
+        """
+        Args:
+            db_path: SQLite file. Defaults to data/robots.db
+            ttl: Seconds a fetched robots.txt is trusted
+            error_ttl: Seconds before an unreachable robots.txt is fetched again
+        """
+        if db_path is None:
+            db_path = Path(__file__).parent.parent / 'data' / 'robots.db'
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._rules = {}     # domain -> (RobotFileParser, expires_at)
+        self._fetching = {}  # domain -> lock held while its robots.txt is fetched
+        self._init_db()
+
+    @classmethod
+    def shared(cls) -> "RobotsCache":
+        """The process-wide instance, created on first use."""
+        global _shared
+        with _shared_lock:
+            if _shared is None:
+                _shared = cls()
+            return _shared
+
+    def _init_db(self):
+        """Initialize database schema."""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS robots (
+                    domain TEXT PRIMARY KEY,
+                    status INTEGER,
+                    body TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+
+    @staticmethod
+    def domain(url: str) -> str:
+        """scheme://host[:port] of a URL, the unit robots.txt applies to."""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def rules(self, domain: str, fetch=None) -> RobotFileParser | None:
+        """
+        Parsed robots.txt of a domain, fetched if missing or expired.
+
+        Args:
+            domain: scheme://host[:port]
+            fetch: Callable robots_url -> requests.Response, raising on network
+                errors, or returning None when robots.txt cannot be known
+                (e.g. an offline replay without it). Without fetch, only
+                cached rules are returned
+
+        Returns:
+            The rules, or None if they are unknown
+        """
+        cached = self._cached(domain)
+        if cached is not None or fetch is None:
+            return cached
+
+        # One fetch per domain; concurrent callers wait for its result
+        with self._lock:
+            fetching = self._fetching.setdefault(domain, threading.Lock())
+        with fetching:
+            cached = self._cached(domain)
+            if cached is not None:
+                return cached
+            return self._fetch(domain, fetch)
+
+    def _cached(self, domain: str) -> RobotFileParser | None:
+        """Unexpired rules from memory or the database."""
+        now = time.time()
+        with self._lock:
+            entry = self._rules.get(domain)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            row = self._conn.execute(
+                'SELECT status, body, expires_at FROM robots WHERE domain = ?',
+                (domain,)).fetchone()
+            if row is None or row[2] <= now:
+                return None
+            rp = _parser(row[0], row[1])
+            self._rules[domain] = (rp, row[2])
+            return rp
+
+    def _fetch(self, domain: str, fetch) -> RobotFileParser:
+        now = time.time()
+        try:
+            response = fetch(f"{domain}/robots.txt")
+        except Exception as e:
+            print(f"[robots.txt unreachable] {domain}: {e}")
+            response = False
+        if response is None:
+            rp = RobotFileParser()
+            rp.allow_all = True
+            return rp  # unknown, not cached
+
+        status = response.status_code if response is not False else None
+        if status is not None and status < 500 and status != 429:
+            body = response.text[:MAX_ROBOTS_BYTES] if 200 <= status < 300 else None
+            self._store(domain, status, body, now, now + self.ttl)
+            return self._cached(domain) or _parser(status, body)
+
+        # Unreachable: keep a recent good copy, otherwise disallow for a while
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, body, fetched_at FROM robots WHERE domain = ?',
+                (domain,)).fetchone()
+        if row is not None and row[0] is not None and now - row[2] < MAX_STALE:
+            self._store(domain, row[0], row[1], row[2], now + self.error_ttl)
+        else:
+            self._store(domain, status, None, now, now + self.error_ttl)
+        return self._cached(domain) or _parser(status, None)
+
+    def _store(self, domain: str, status: int | None, body: str | None,
+               fetched_at: float, expires_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO robots (domain, status, body, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (domain, status, body, fetched_at, expires_at))
+            self._rules.pop(domain, None)
+
+    def can_fetch(self, url: str, user_agent: str, fetch=None) -> bool:
+        """True if robots.txt allows user_agent to fetch url (see rules())."""
+        rp = self.rules(self.domain(url), fetch)
+        return True if rp is None else rp.can_fetch(user_agent, url)
+
+    def crawl_delay(self, url: str, user_agent: str) -> float | None:
+        """Crawl-delay for user_agent (or *) from cached rules, if any."""
+        rp = self.rules(self.domain(url))
+        if rp is None or rp.allow_all or rp.disallow_all:
+            return None
+        delay = rp.crawl_delay(user_agent) or rp.crawl_delay("*")
+        return float(delay) if delay is not None else None
+
+    def site_maps(self, url: str) -> list[str] | None:
+        """Sitemap URLs listed in the cached robots.txt, if any."""
+        rp = self.rules(self.domain(url))
+        return rp.site_maps() if rp is not None else None
+
+    def invalidate(self, domain: str) -> None:
+        """Forget a domain's rules, so they are fetched again."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM robots WHERE domain = ?', (domain,))
+            self._rules.pop(domain, None)
+
+    def clear(self) -> None:
+        """Forget everything."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM robots')
+            self._rules.clear()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,240 @@
+"""
+Indexed store of ingested recipes, keyed by canonical URL.
+
+Replaces the title set in seen_recipes.json: lookups are by primary key,
+so pages can be skipped before they are fetched, and each completed
+recipe is written in its own small transaction instead of rewriting the
+whole file.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from scraper.urls import canonicalize_url
+
+
+def content_fingerprint(recipe_data: list) -> str:
+    """Hash of a recipe's extracted chunk list (WebScraper.extract_* output)."""
+    content = json.dumps(recipe_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+RECORD_FIELDS = ('url', 'title', 'content_hash', 'last_crawled',
+                 'next_due', 'recrawl_interval', 'checks', 'changes')
+
+DEFAULT_RECRAWL_INTERVAL = 7 * 24 * 3600  # first recheck a week after ingestion
+
+RECRAWL_COLUMNS = (
+    ('next_due', 'REAL'),                        # when the page should be checked again
+    ('recrawl_interval', 'REAL'),                # current seconds between checks
+    ('checks', 'INTEGER NOT NULL DEFAULT 0'),    # recrawls so far
+    ('changes', 'INTEGER NOT NULL DEFAULT 0'),   # recrawls that found new content
+)
+
+
+class SeenStore:
+    """
+    SQLite table of seen recipe pages: url -> (title, content_hash, last_crawled).
+
+    Titles imported from the legacy seen_recipes.json are kept in a
+    separate table and only checked by title, since their URLs are unknown.
+
+    Usage:
+        seen = SeenStore()
+        if url not in seen:
+            ...
+            seen.add(url, title=title, content_hash=content_fingerprint(data))
+    """
+
+    def __init__(self, db_path: str = None) -> None:
+        """
+        Args:
+            db_path: SQLite file. Defaults to data/seen.db
+        """
+        if db_path is None:
+            db_path = Path(__file__).parent.parent / 'data' / 'seen.db'
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS seen (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    content_hash TEXT,
+                    last_crawled REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_seen_title ON seen (title)')
+
+            # Recrawl bookkeeping (see scraper/recrawl.py), added to older stores
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(seen)')}
+            for column, decl in RECRAWL_COLUMNS:
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE seen ADD COLUMN {column} {decl}')
+            self._conn.execute(
+                'UPDATE seen SET next_due = last_crawled + ? WHERE next_due IS NULL',
+                (DEFAULT_RECRAWL_INTERVAL,))
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_seen_next_due ON seen (next_due)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS legacy_titles (
+                    title TEXT PRIMARY KEY
+                ) WITHOUT ROWID
+            ''')
+
+    def add(self, url: str, title: str = None, content_hash: str = None) -> None:
+        """Record (or refresh) a crawled recipe."""
+        self.add_many([(url, title, content_hash)])
+
+    def add_many(self, entries) -> None:
+        """Record many (url, title, content_hash) entries in one transaction."""
+        now = time.time()
+        rows = [(canonicalize_url(url), title, content_hash, now, now + DEFAULT_RECRAWL_INTERVAL)
+                for url, title, content_hash in entries]
+        with self._lock, self._conn:
+            self._conn.executemany('''
+                INSERT INTO seen (url, title, content_hash, last_crawled, next_due)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    title = COALESCE(excluded.title, title),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    last_crawled = excluded.last_crawled
+            ''', rows)
+
+    def get(self, url: str) -> dict | None:
+        """Stored record of a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(RECORD_FIELDS)} FROM seen WHERE url = ?',
+                (canonicalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(RECORD_FIELDS, row))
+
+    def due(self, now: float, limit: int = 100) -> list[dict]:
+        """Records due for a recrawl at time `now`, most overdue first."""
+        with self._lock:
+            rows = self._conn.execute(f'''
+                SELECT {", ".join(RECORD_FIELDS)} FROM seen
+                WHERE next_due <= ?
+                ORDER BY next_due
+                LIMIT ?
+            ''', (now, limit)).fetchall()
+        return [dict(zip(RECORD_FIELDS, row)) for row in rows]
+
+    def schedule(self, url: str, next_due: float, interval: float, changed: bool,
+                 content_hash: str = None) -> None:
+        """Record the outcome of a recrawl and when to check the page next."""
+        with self._lock, self._conn:
+            self._conn.execute('''
+                UPDATE seen
+                SET next_due = ?, recrawl_interval = ?, last_crawled = ?,
+                    checks = checks + 1, changes = changes + ?,
+                    content_hash = COALESCE(?, content_hash)
+                WHERE url = ?
+            ''', (next_due, interval, time.time(), int(changed), content_hash,
+                  canonicalize_url(url)))
+
+    def mark_modified(self, entries) -> int:
+        """
+        Make pages modified since their last crawl due for a recrawl now.
+
+        Args:
+            entries: (url, lastmod Unix time) pairs, e.g. from a sitemap
+
+        Returns:
+            Number of pages rescheduled
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('''
+                UPDATE seen SET next_due = ?
+                WHERE url = ? AND last_crawled < ? AND next_due > ?
+            ''', [(now, canonicalize_url(url), lastmod, now) for url, lastmod in entries])
+            return self._conn.total_changes - before
+
+    def remove(self, url: str) -> None:
+        """Forget a URL (e.g. a page that no longer exists)."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM seen WHERE url = ?', (canonicalize_url(url),))
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM seen WHERE url = ?', (canonicalize_url(url),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def has_legacy_title(self, title: str) -> bool:
+        """
+        True if the title was imported from the legacy seen_recipes.json.
+
+        Those recipes were ingested before URLs were recorded, so their title
+        is all that identifies them. Recipes seen by URL are matched by URL
+        only; different recipes may share a title.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM legacy_titles WHERE title = ?', (title,)).fetchone()
+        return row is not None
+
+    def add_titles(self, titles) -> int:
+        """Record titles whose URLs are unknown. Returns how many were new."""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO legacy_titles (title) VALUES (?)',
+                [(title,) for title in titles])
+            return self._conn.total_changes - before
+
+    def import_json(self, json_path: str) -> int:
+        """Import the titles of a legacy seen_recipes.json. Returns how many were new."""
+        path = Path(json_path)
+        if not path.exists() or path.stat().st_size == 0:
+            return 0
+        try:
+            titles = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            print(f"⚠️  Warning: {path.name} is corrupted, nothing imported")
+            return 0
+        return self.add_titles(titles)
+
+    def sample(self, limit: int = 5) -> list[dict]:
+        """The first few records, ordered by URL."""
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {", ".join(RECORD_FIELDS)} FROM seen ORDER BY url LIMIT ?',
+                (limit,)).fetchall()
+        return [dict(zip(RECORD_FIELDS, row)) for row in rows]
+
+    def legacy_title_count(self) -> int:
+        """Number of titles imported without a URL."""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM legacy_titles').fetchone()[0]
+
+    def clear(self) -> None:
+        """Forget everything."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM seen')
+            self._conn.execute('DELETE FROM legacy_titles')
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,146 @@
+"""
+Sitemap discovery: stream page URLs (with lastmod dates) from sitemap.xml.
+
+Sitemaps are located through the `Sitemap:` lines of robots.txt and may be
+nested indexes and/or gzipped. Documents are parsed incrementally, so huge
+sitemaps never need to be held in memory.
+"""
+import xml.etree.ElementTree as ET
+import zlib
+from datetime import datetime, timezone
+
+MAX_DEPTH = 3  # levels of nested sitemap indexes to follow
+CHUNK_SIZE = 64 * 1024
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """Parse a W3C datetime lastmod (e.g. 2024-05-01 or 2024-05-01T10:00:00+00:00)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def decompress_chunks(chunks):
+    """Transparently un-gzip a stream of byte chunks if it is gzipped."""
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+    if first[:2] != b'\x1f\x8b':
+        yield first
+        yield from chunks
+        return
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    yield decompressor.decompress(first)
+    for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
+
+
+def iter_sitemap_document(chunks):
+    """
+    Incrementally parse one sitemap or sitemap index.
+
+    Args:
+        chunks: Iterable of (possibly gzipped) byte chunks of the document
+
+    Yields:
+        ('url', loc, lastmod) for pages and ('sitemap', loc, lastmod) for
+        child sitemaps of an index
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    loc = lastmod = None
+    for chunk in decompress_chunks(chunks):
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            name = _local_name(elem.tag)
+            if name == 'loc':
+                loc = (elem.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(elem.text)
+            elif name in ('url', 'sitemap'):
+                if loc:
+                    yield name, loc, lastmod
+                loc = lastmod = None
+                elem.clear()
+    parser.close()
+
+
+class SitemapReader:
+    """
+    Walks a site's sitemaps using a crawler's session and robots.txt rules.
+
+    Usage:
+        reader = SitemapReader(crawler)
+        for url, lastmod in reader.iter_urls("https://www.allrecipes.com"):
+            ...
+    """
+
+    def __init__(self, crawler, max_depth: int = MAX_DEPTH) -> None:
+        """
+        Args:
+            crawler: WebCrawler providing get(), can_fetch() and robots_cache
+            max_depth: Levels of nested sitemap indexes to follow
+        """
+        self.crawler = crawler
+        self.max_depth = max_depth
+
+    def sitemap_urls(self, url: str) -> list[str]:
+        """Sitemaps listed in the site's robots.txt (or /sitemap.xml if none)."""
+        crawler = self.crawler
+        domain = crawler.get_domain(url)
+        crawler.can_fetch(url)  # loads robots.txt into the cache
+        sitemaps = crawler.robots_cache.site_maps(url)
+        return list(sitemaps or [f"{domain}/sitemap.xml"])
+
+    def iter_urls(self, url: str, since: datetime = None):
+        """
+        Stream page URLs from all of a site's sitemaps.
+
+        Args:
+            url: Any URL on the site
+            since: Only yield pages whose lastmod is at or after this time
+                (pages without a lastmod are always yielded)
+
+        Yields:
+            (page URL, lastmod datetime or None)
+        """
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        visited = set()
+        pending = [(sitemap, 0) for sitemap in self.sitemap_urls(url)]
+
+        while pending:
+            sitemap, depth = pending.pop(0)
+            if sitemap in visited:
+                continue
+            visited.add(sitemap)
+
+            for kind, loc, lastmod in self._read(sitemap):
+                if kind == 'sitemap':
+                    # Skip child sitemaps with nothing new since the cutoff
+                    if depth < self.max_depth and not (since and lastmod and lastmod < since):
+                        pending.append((loc, depth + 1))
+                elif since is None or lastmod is None or lastmod >= since:
+                    yield loc, lastmod
+
+    def _read(self, sitemap: str):
+        """Stream the entries of one sitemap document (empty on any error)."""
+        if not self.crawler.can_fetch(sitemap):
+            print(f"[robots.txt blocked] {sitemap}")
+            return
+        try:
+            with self.crawler.get(sitemap, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"[HTTP {response.status_code}] {sitemap}")
+                    return
+                yield from iter_sitemap_document(response.iter_content(CHUNK_SIZE))
+        except Exception as e:
+            print(f"[Error] {sitemap}: {e}")
@@ -0,0 +1,113 @@
+"""
+URL canonicalization and a compact visited set for large crawls.
+"""
+import hashlib
+import math
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga'}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str, scheme: str = None) -> str:
+    """
+    Normalize a URL so that variants of one page compare equal.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the query string and strips trailing slashes.
+
+    Args:
+        url: Absolute URL
+        scheme: Force this scheme (e.g. the site's own) so http/https
+            variants of a page collapse into one
+
+    Returns:
+        Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    original_scheme = parts.scheme.lower()
+    scheme = (scheme or original_scheme).lower()
+
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    if parts.port and parts.port != DEFAULT_PORTS.get(original_scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        host = f"{userinfo}@{host}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of strings.
+
+    Membership tests never miss an added item but may report an item that
+    was never added, at roughly `false_positive_rate` while fewer than
+    `capacity` items are stored. Memory stays fixed: about 2.4 MB per
+    million items at a 1e-4 rate.
+
+    Usage:
+        seen = BloomFilter(capacity=5_000_000, false_positive_rate=1e-4)
+        seen.add(url)
+        if url in seen: ...
+    """
+
+    def __init__(self, capacity: int = 1_000_000, false_positive_rate: float = 1e-4) -> None:
+        """
+        Args:
+            capacity: Number of items the filter is sized for
+            false_positive_rate: Target false-positive rate at capacity
+        """
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.num_bits = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k indexes from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """Add an item. Returns True if it was (probably) not present before."""
+        new = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        """Approximate number of distinct items added."""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self._bits)
@@ -1,41 +1,41 @@
 """
 Utility functions for managing seen URLs and crawler state.
+
+Seen recipes live in a SeenStore (data/seen.db) keyed by canonical URL;
+titles from the legacy seen_recipes.json are imported into it once.
 """
-import json
 import os
 
+from scraper.seen_store import SeenStore
+
 # Path configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "data", "seen_recipes.json")
+SEEN_DB_PATH = os.path.join(BASE_DIR, "data", "seen.db")
 
 
-def load_seen_urls():
-    """Load the set of previously seen URLs from disk."""
-    if os.path.exists(DATA_PATH):
-        if os.path.getsize(DATA_PATH) == 0:
-            return set()
-        
-        try:
-            with open(DATA_PATH, 'r') as f:
-                return set(json.load(f))
-        except json.JSONDecodeError:
-            print("⚠️  Warning: seen_recipes.json is corrupted, returning empty set")
-            return set()
-    return set()
-
-
-def save_seen_urls(seen_set):
-    """Save the set of seen URLs to disk."""
-    os.makedirs(os.path.dirname(DATA_PATH), exist_ok=True)
-    with open(DATA_PATH, 'w') as f:
-        json.dump(sorted(list(seen_set)), f, indent=2)
-    print(f"💾 Saved {len(seen_set)} seen URLs to {DATA_PATH}")
+def open_seen_store(db_path=SEEN_DB_PATH):
+    """Open the seen store, importing legacy seen_recipes.json titles on first use."""
+    store = SeenStore(db_path)
+    if store.legacy_title_count() == 0:
+        imported = store.import_json(DATA_PATH)
+        if imported:
+            print(f"📥 Imported {imported} titles from {os.path.basename(DATA_PATH)}")
+    return store
 
 
 def clear_seen_urls():
     """Clear all seen URLs (useful for starting fresh)."""
+    cleared = False
     if os.path.exists(DATA_PATH):
         os.remove(DATA_PATH)
+        cleared = True
+    if os.path.exists(SEEN_DB_PATH):
+        store = SeenStore(SEEN_DB_PATH)
+        store.clear()
+        store.close()
+        cleared = True
+    if cleared:
         print("🗑️  Cleared all seen URLs")
     else:
         print("ℹ️  No seen URLs file to clear")
@@ -43,22 +43,25 @@ def clear_seen_urls():
 
 def print_seen_stats():
     """Print statistics about seen URLs."""
-    seen = load_seen_urls()
+    seen = open_seen_store()
+    total = len(seen)
     print(f"\n{'='*60}")
     print(f"📊 Seen URLs Statistics")
     print(f"{'='*60}")
-    print(f"Total URLs seen: {len(seen)}")
+    print(f"Total URLs seen: {total}")
+    print(f"Legacy titles (no URL): {seen.legacy_title_count()}")
     
-    if seen:
+    if total:
         print(f"\nFirst 5 URLs:")
-        for url in sorted(list(seen))[:5]:
-            print(f"  - {url}")
+        for record in seen.sample(5):
+            print(f"  - {record['url']} ({record['title']})")
         
-        if len(seen) > 5:
-            print(f"  ... and {len(seen) - 5} more")
+        if total > 5:
+            print(f"  ... and {total - 5} more")
     else:
         print("No URLs seen yet.")
     print(f"{'='*60}\n")
+    seen.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+"""
+Minimal WARC reader for archived crawls.
+
+Reads WARC 1.0/1.1 files, plain or gzip-compressed (one gzip member per
+record, as written by wget, Heritrix and warcio), and yields the HTML of
+their HTTP response records. Only the standard library is used.
+"""
+import gzip
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+WARC_SUFFIXES = ('.warc', '.warc.gz')
+
+
+def is_warc(path) -> bool:
+    """True for .warc and .warc.gz files."""
+    return str(path).lower().endswith(WARC_SUFFIXES)
+
+
+def _open(path):
+    path = Path(path)
+    if path.name.lower().endswith('.gz'):
+        return gzip.open(path, 'rb')  # reads concatenated members transparently
+    return open(path, 'rb')
+
+
+def _read_headers(stream) -> dict | None:
+    """Header lines up to a blank line, as a lowercase-keyed dict (None at EOF)."""
+    headers = {}
+    while True:
+        line = stream.readline()
+        if not line:
+            return None if not headers else headers
+        line = line.rstrip(b'\r\n')
+        if not line:
+            return headers
+        name, sep, value = line.decode('utf-8', errors='replace').partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+
+def iter_warc_records(path):
+    """
+    Iterate over the records of a WARC file.
+
+    Yields:
+        (WARC headers with lowercase names, record block bytes)
+    """
+    with _open(path) as stream:
+        while True:
+            # Skip the blank lines separating records
+            line = stream.readline()
+            while line in (b'\r\n', b'\n'):
+                line = stream.readline()
+            if not line:
+                return
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"{path}: expected a WARC record, got {line[:40]!r}")
+            headers = _read_headers(stream) or {}
+            length = int(headers.get('content-length', 0))
+            yield headers, stream.read(length)
+
+
+def _dechunk(body: bytes) -> bytes:
+    """Decode a Transfer-Encoding: chunked body."""
+    out = []
+    pos = 0
+    while pos < len(body):
+        end = body.find(b'\r\n', pos)
+        if end < 0:
+            break
+        size = int(body[pos:end].split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        out.append(body[end + 2:end + 2 + size])
+        pos = end + 2 + size + 2
+    return b''.join(out)
+
+
+def parse_http_response(block: bytes) -> tuple[int, dict, bytes]:
+    """
+    Split an archived HTTP response into status, headers and decoded body.
+
+    Chunked transfer encoding and gzip/deflate content encoding are undone.
+    """
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.decode('latin-1').partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = _dechunk(body)
+    encoding = headers.get('content-encoding', '').lower()
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        try:
+            body = zlib.decompress(body, 32 + zlib.MAX_WBITS)  # gzip or zlib header
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)      # raw deflate
+    return status, headers, body
+
+
+def _charset(content_type: str) -> str:
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return 'utf-8'
+
+
+def iter_warc_pages(path):
+    """
+    Iterate over the successful HTML responses archived in a WARC file.
+
+    Yields:
+        (target URL, fetch time as a Unix timestamp or None, HTML text)
+    """
+    for headers, block in iter_warc_records(path):
+        if headers.get('warc-type') != 'response':
+            continue
+        if not headers.get('content-type', '').startswith('application/http'):
+            continue
+        try:
+            status, http_headers, body = parse_http_response(block)
+        except (ValueError, IndexError, zlib.error):
+            continue
+        content_type = http_headers.get('content-type', '')
+        if status != 200 or 'html' not in content_type.lower():
+            continue
+
+        fetched_at = None
+        if 'warc-date' in headers:
+            try:
+                fetched_at = datetime.fromisoformat(
+                    headers['warc-date'].replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                pass
+        try:
+            html = body.decode(_charset(content_type), errors='replace')
+        except LookupError:
+            html = body.decode('utf-8', errors='replace')
+        yield headers.get('warc-target-uri', '').strip('<>'), fetched_at, html
@@ -0,0 +1,103 @@
+"""
+Test that the HTTP cache records responses online and replays them offline.
+
+This script tests:
+1. A sitemap fetched with stream=True is stored and replayed offline
+2. A 404 is cached negatively and replayed offline as a 404
+
+Usage:
+    python test_http_cache.py
+    python -m pytest test_http_cache.py
+"""
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import requests
+
+from scraper.http_cache import HttpCache
+from scraper.sitemap import CHUNK_SIZE, iter_sitemap_document
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/recipe/1</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc>https://example.com/recipe/2</loc></url>
+</urlset>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/sitemap.xml":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(SITEMAP)))
+            self.end_headers()
+            self.wfile.write(SITEMAP)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _sitemap_locs(response) -> list[str]:
+    return [loc for _, loc, _ in iter_sitemap_document(response.iter_content(CHUNK_SIZE))]
+
+
+def test_sitemap_replayed_offline():
+    """A streamed sitemap recorded online is replayed offline."""
+    server, base = _serve()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            online = HttpCache(cache_dir)
+            with online.get(requests.Session(), f"{base}/sitemap.xml",
+                            stream=True, timeout=5) as response:
+                assert response.status_code == 200
+                recorded = _sitemap_locs(response)
+        finally:
+            server.shutdown()
+
+        offline = HttpCache(cache_dir, offline=True)
+        with offline.get(requests.Session(), f"{base}/sitemap.xml", stream=True) as response:
+            assert response.status_code == 200
+            assert response.from_cache
+            replayed = _sitemap_locs(response)
+
+    assert recorded == ["https://example.com/recipe/1", "https://example.com/recipe/2"]
+    assert replayed == recorded
+    print("   ✅ Sitemap replay test passed!")
+
+
+def test_not_found_replayed_offline():
+    """A recorded 404 is replayed offline as a 404, not a 504."""
+    server, base = _serve()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            response = HttpCache(cache_dir).get(requests.Session(), f"{base}/gone", timeout=5)
+            assert response.status_code == 404
+        finally:
+            server.shutdown()
+
+        response = HttpCache(cache_dir, offline=True).get(requests.Session(), f"{base}/gone")
+        assert response.status_code == 404
+        assert response.from_cache
+        response = HttpCache(cache_dir, offline=True).get(requests.Session(), f"{base}/never")
+        assert response.status_code == 504
+    print("   ✅ Negative caching test passed!")
+
+
+if __name__ == "__main__":
+    test_sitemap_replayed_offline()
+    test_not_found_replayed_offline()